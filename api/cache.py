@@ -0,0 +1,43 @@
+"""
+Response cache for the catalog API.
+
+Rendered responses are cached under the API version, which the signals in
+``api.signals`` (and the bulk catalog import) bump after any catalog change
+commits, so stale entries are never read again and simply expire. Each
+entry keeps the ETag of its body, so a matching If-None-Match is answered
+with a 304 from the cache without touching the database.
+
+The bump is only seen by workers that share the cache. With a per-worker
+cache (LocMemCache) the others keep their entries until they expire, so
+settings.API_CACHE_SECONDS is kept short unless CACHES is shared.
+"""
+import hashlib
+
+from django.core.cache import cache
+
+VERSION_KEY = 'api_version'
+
+
+def get_api_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_api_version():
+    """Invalidate every cached API response."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
+
+
+def response_cache_key(request):
+    digest = hashlib.md5(request.get_full_path().encode(), usedforsecurity=False).hexdigest()
+    return f'api:v{get_api_version()}:{digest}'
+
+
+def body_etag(content):
+    return '"{}"'.format(hashlib.md5(content, usedforsecurity=False).hexdigest())
@@ -0,0 +1,139 @@
+"""
+Keyset (seek) pagination over every ordering field.
+
+DRF's ``CursorPagination`` positions its cursor on the first ordering
+field only and skips ties with an offset capped at ``offset_cutoff``, so a
+list whose leading field repeats (catalogue ``order``) loops once more than
+1000 rows share a value. Here the cursor holds the last row's value of
+every ordering field and the next page is filtered with the row-value
+comparison ``(a, b, id) > (x, y, z)``, so any number of ties pages in
+catalogue order. The ordering must end with a unique field.
+"""
+import base64
+import datetime
+import decimal
+import json
+import uuid
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_value(value):
+    # Full precision: DjangoJSONEncoder truncates datetimes to milliseconds,
+    # which would skip or repeat rows that differ below that
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f'Cannot put {type(value).__name__} in a cursor')
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request, queryset, view):
+        return view.ordering
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = list(self.get_ordering(request, queryset, view))
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = [self.flip(name) for name in self.ordering] if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    # ============= CURSORS =============
+
+    def flip(self, name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    def after(self, ordering, position):
+        """Rows strictly after ``position`` in ``ordering``, as one OR of prefix ties"""
+        condition = Q()
+        for index, name in enumerate(ordering):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            tie = {ordering[i].lstrip('-'): position[i] for i in range(index)}
+            condition |= Q(**tie, **{f'{field}__{lookup}': position[index]})
+        return condition
+
+    def encode_cursor(self, row, reverse):
+        position = [getattr(row, name.lstrip('-')) for name in self.ordering]
+        payload = json.dumps({'p': position, 'r': int(reverse)}, default=encode_value, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            position, reverse = payload['p'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # Cursors come from clients: every value must be one its field can hold
+        try:
+            return [self.decode_value(model, name, value) for name, value in zip(self.ordering, position)], reverse
+        except (DjangoValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_value(self, model, name, value):
+        if value is None:
+            raise ValueError('Ordering fields are never null')
+        field = model._meta.get_field(name.lstrip('-'))
+        value = field.to_python(value)
+        field.get_prep_value(value)
+        return value
@@ -0,0 +1,98 @@
+from rest_framework import serializers
+
+from core.media import media_url
+from core.models import Testimonial
+from projects.models import Project
+from services.models import CategoryItem, ServiceCategory
+
+
+class MediaURLField(serializers.Field):
+    """Public URL of an image field, or null when empty"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return media_url(value) or None
+
+
+class SparseFieldsMixin:
+    """Drop every field not listed in ``context['fields']`` (``?fields=``)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+
+class SummarySerializer(serializers.Serializer):
+    """id/name/slug reference to a related category"""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    slug = serializers.CharField()
+
+
+class GalleryImageSerializer(serializers.Serializer):
+    image = MediaURLField()
+    caption = serializers.CharField()
+    order = serializers.IntegerField()
+
+
+class ServiceCategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    featured_image = MediaURLField()
+    banner_image = MediaURLField()
+
+    class Meta:
+        model = ServiceCategory
+        fields = [
+            'id', 'name', 'slug', 'description', 'icon', 'featured_image',
+            'banner_image', 'is_featured', 'order',
+        ]
+
+
+class CategoryItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    category = SummarySerializer()
+    featured_image = MediaURLField()
+    gallery = GalleryImageSerializer(many=True)
+
+    class Meta:
+        model = CategoryItem
+        fields = [
+            'id', 'category', 'name', 'slug', 'short_description',
+            'full_description', 'featured_image', 'price_range', 'duration',
+            'ideal_space_size', 'key_features', 'materials_used',
+            'design_styles', 'is_popular', 'is_new', 'order', 'updated_at',
+            'gallery',
+        ]
+
+
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    category = SummarySerializer(allow_null=True)
+    service_categories = SummarySerializer(many=True)
+    featured_image = MediaURLField()
+    images = GalleryImageSerializer(many=True)
+
+    class Meta:
+        model = Project
+        fields = [
+            'id', 'title', 'slug', 'category', 'service_categories',
+            'client_name', 'location', 'project_date', 'status',
+            'short_description', 'full_description', 'challenge', 'solution',
+            'result', 'featured_image', 'budget_range', 'duration', 'area_sqm',
+            'tags', 'is_featured', 'updated_at', 'images',
+        ]
+
+
+class TestimonialSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    client_image = MediaURLField()
+
+    class Meta:
+        model = Testimonial
+        fields = [
+            'id', 'client_name', 'client_position', 'client_company',
+            'client_image', 'rating', 'testimonial_text', 'is_featured',
+            'created_at',
+        ]
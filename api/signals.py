@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Testimonial
+from projects.models import Project, ProjectCategory, ProjectImage
+from services.models import CategoryItem, CategoryItemImage, ServiceCategory
+from .cache import bump_api_version
+
+
+@receiver([post_save, post_delete], sender=ServiceCategory)
+@receiver([post_save, post_delete], sender=CategoryItem)
+@receiver([post_save, post_delete], sender=CategoryItemImage)
+@receiver([post_save, post_delete], sender=ProjectCategory)
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=ProjectImage)
+@receiver([post_save, post_delete], sender=Testimonial)
+@receiver(m2m_changed, sender=Project.service_categories.through)
+def invalidate_api_cache(sender, **kwargs):
+    # After commit, or a request racing the transaction could cache the
+    # old rows under the new version
+    transaction.on_commit(bump_api_version)
@@ -0,0 +1,135 @@
+import base64
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Testimonial
+from projects.models import Project, ProjectCategory, ProjectImage
+from services.models import CategoryItem, CategoryItemImage, ServiceCategory
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, METRICS_DIR='')
+class CatalogAPITests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = ServiceCategory.objects.create(
+            name='Kitchens', slug='kitchens', description='-', icon='fa-utensils',
+            featured_image='categories/kitchens.jpg',
+        )
+        cls.project_category = ProjectCategory.objects.create(name='Residential', description='-')
+
+    def setUp(self):
+        cache.clear()
+
+    def _create_items(self, total):
+        for i in range(total):
+            item = CategoryItem.objects.create(
+                category=self.category, name=f'Item {i}', slug=f'item-{i}',
+                short_description='-', full_description='<p>-</p>',
+                featured_image=f'category_items/item-{i}.jpg', order=i,
+            )
+            CategoryItemImage.objects.create(item=item, image=f'category_items/gallery/{i}.jpg', order=1)
+
+    def _create_projects(self, total, published=True):
+        for i in range(total):
+            project = Project.objects.create(
+                title=f'Project {i} {published}', category=self.project_category,
+                location='Harare', project_date=datetime.date(2024, 1, 1 + i),
+                short_description='-', full_description='-',
+                featured_image=f'projects/{i}.jpg', is_published=published,
+            )
+            project.service_categories.add(self.category)
+            ProjectImage.objects.create(project=project, image=f'projects/gallery/{i}.jpg')
+
+    def test_item_list_with_nested_gallery(self):
+        self._create_items(3)
+        # page, category join + gallery prefetch: constant in the number of rows
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('api:item-list'))
+        results = response.json()['results']
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]['category'], {'id': self.category.pk, 'name': 'Kitchens', 'slug': 'kitchens'})
+        self.assertTrue(results[0]['gallery'][0]['image'].endswith('/category_items/gallery/0.jpg'))
+
+    def test_sparse_fields_skip_unrequested_relations(self):
+        self._create_items(3)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:item-list'), {'fields': 'id,name'})
+        self.assertEqual(response.json()['results'][0], {'id': CategoryItem.objects.first().pk, 'name': 'Item 0'})
+
+        response = self.client.get(reverse('api:item-list'), {'fields': 'id,views'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_projects_are_published_and_cursor_paginated(self):
+        self._create_projects(3)
+        self._create_projects(1, published=False)
+        with self.assertNumQueries(3):
+            page = self.client.get(reverse('api:project-list'), {'page_size': 2}).json()
+        self.assertEqual([p['title'] for p in page['results']], ['Project 2 True', 'Project 1 True'])
+        self.assertEqual(page['results'][0]['service_categories'][0]['slug'], 'kitchens')
+        self.assertEqual(page['results'][0]['category']['name'], 'Residential')
+
+        rest = self.client.get(page['next']).json()
+        self.assertEqual([p['title'] for p in rest['results']], ['Project 0 True'])
+        self.assertIsNone(rest['next'])
+
+    def test_etag_and_response_cache(self):
+        Testimonial.objects.create(client_name='Rudo', testimonial_text='Great work')
+        url = reverse('api:testimonial-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).content, response.content)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_changes_invalidate_the_cache(self):
+        url = reverse('api:category-detail', args=['kitchens'])
+        self.assertEqual(self.client.get(url).json()['name'], 'Kitchens')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Kitchen Design'
+            self.category.save()
+        self.assertEqual(self.client.get(url).json()['name'], 'Kitchen Design')
+
+    @override_settings(API_CACHE_SECONDS=0)
+    def test_cached_responses_expire_when_the_version_bump_is_missed(self):
+        # What another worker sees when its LocMemCache never got the bump
+        url = reverse('api:category-detail', args=['kitchens'])
+        self.client.get(url)
+        ServiceCategory.objects.filter(pk=self.category.pk).update(name='Kitchen Design')
+        self.assertEqual(self.client.get(url).json()['name'], 'Kitchen Design')
+
+    def test_malformed_cursor_is_not_found(self):
+        url = reverse('api:category-list')
+        for payload in ('{"p":[{"x":1},1],"r":0}', '{"p":["high",1],"r":0}', '{"p":[null,1],"r":0}',
+                        '{"p":[1],"r":0}', 'not json'):
+            cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+            self.assertEqual(self.client.get(url, {'cursor': cursor}).status_code, 404, payload)
+        self.assertEqual(self.client.get(url, {'cursor': '%%%'}).status_code, 404)
+
+    def test_cursor_pages_through_more_than_a_thousand_ties(self):
+        # Every item shares the same ``order``: the cursor must still reach all of them
+        CategoryItem.objects.bulk_create([
+            CategoryItem(
+                category=self.category, name=f'Tied {i}', slug=f'tied-{i}', short_description='-',
+                full_description='-', featured_image='category_items/tied.jpg', order=0,
+            )
+            for i in range(1300)
+        ])
+        seen = []
+        url, params = reverse('api:item-list'), {'fields': 'id', 'page_size': 100}
+        for _ in range(20):
+            page = self.client.get(url, params).json()
+            seen.extend(row['id'] for row in page['results'])
+            if not page['next']:
+                break
+            url, params = page['next'], {}
+        self.assertEqual(len(seen), 1300)
+        self.assertEqual(seen, sorted(CategoryItem.objects.values_list('id', flat=True)))
+
+        previous = self.client.get(page['previous']).json()
+        self.assertEqual([row['id'] for row in previous['results']], seen[-200:-100])
@@ -0,0 +1,13 @@
+from rest_framework.routers import SimpleRouter
+
+from . import views
+
+app_name = 'api'
+
+router = SimpleRouter()
+router.register('categories', views.ServiceCategoryViewSet, basename='category')
+router.register('items', views.CategoryItemViewSet, basename='item')
+router.register('projects', views.ProjectViewSet, basename='project')
+router.register('testimonials', views.TestimonialViewSet, basename='testimonial')
+
+urlpatterns = router.urls
@@ -0,0 +1,161 @@
+"""
+Read-only catalog API (``/api/v1/``).
+
+Every list and detail endpoint accepts ``?fields=a,b,c`` to return only
+those fields. The queryset is planned from the requested fields: related
+rows are joined or prefetched only when their field is asked for, and
+only the columns needed are loaded, so no field costs a query per row.
+
+Lists are keyset paginated (``?cursor=``, ``?page_size=``, see ``api.pagination``). Responses are
+cached (see ``api.cache``) and carry an ETag; ``If-None-Match`` gets a 304.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+
+from core import surrogate
+from core.models import Testimonial
+from projects.models import Project
+from services.models import CategoryItem, ServiceCategory
+from .cache import body_etag, response_cache_key
+from .pagination import KeysetPagination
+from .serializers import (
+    CategoryItemSerializer, ProjectSerializer, ServiceCategorySerializer,
+    TestimonialSerializer,
+)
+
+
+class CatalogViewSet(viewsets.ReadOnlyModelViewSet):
+    pagination_class = KeysetPagination
+    # Keyset pagination compares every field, so the last must be unique
+    ordering = ('order', 'id')
+
+    # Collection keys of everything the endpoint can show; an empty list
+    # loads no instances to tag it, but must still be purged on create
+    surrogate_keys = ()
+
+    # serializer field: select_related path, joined only when requested
+    select_related_fields = {}
+    # serializer field: prefetch lookup or Prefetch, loaded only when requested
+    prefetch_fields = {}
+
+    def base_queryset(self):
+        return self.serializer_class.Meta.model.objects.all()
+
+    def requested_fields(self):
+        """Fields named in ``?fields=``, or every field"""
+        if not hasattr(self, '_requested_fields'):
+            available = list(self.serializer_class.Meta.fields)
+            raw = self.request.query_params.get('fields', '')
+            requested = [name.strip() for name in raw.split(',') if name.strip()]
+            unknown = [name for name in requested if name not in available]
+            if unknown:
+                raise ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}"})
+            self._requested_fields = requested or available
+        return self._requested_fields
+
+    def get_queryset(self):
+        fields = self.requested_fields()
+        queryset = self.base_queryset()
+        model = queryset.model
+
+        for field, path in self.select_related_fields.items():
+            if field in fields:
+                queryset = queryset.select_related(path)
+        prefetches = [lookup for field, lookup in self.prefetch_fields.items() if field in fields]
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+
+        concrete = {field.name for field in model._meta.concrete_fields}
+        columns = {'id', self.lookup_field, *(name.lstrip('-') for name in self.ordering)}
+        columns.update(name for name in fields if name in concrete)
+        return queryset.only(*(name for name in columns if name != 'pk'))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.requested_fields()
+        return context
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        surrogate.add_surrogate_keys(*self.surrogate_keys)
+        key = response_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response.render()
+            cached = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': body_etag(response.content),
+                'keys': sorted(surrogate.current_keys() or ()),
+            }
+            cache.set(key, cached, settings.API_CACHE_SECONDS)
+        else:
+            # Nothing is loaded from the database, so tag the page explicitly
+            surrogate.add_surrogate_keys(*cached['keys'])
+
+        response = HttpResponse(cached['content'], content_type=cached['content_type'])
+        response['ETag'] = cached['etag']
+        return get_conditional_response(request, etag=cached['etag'], response=response)
+
+
+class ServiceCategoryViewSet(CatalogViewSet):
+    serializer_class = ServiceCategorySerializer
+    lookup_field = 'slug'
+    surrogate_keys = ('categories',)
+
+
+class CategoryItemViewSet(CatalogViewSet):
+    serializer_class = CategoryItemSerializer
+    surrogate_keys = ('items', 'categories')
+    select_related_fields = {'category': 'category'}
+    prefetch_fields = {'gallery': 'gallery'}
+    ordering = ('category_id', 'order', 'id')
+
+    def filter_queryset(self, queryset):
+        category = self.request.query_params.get('category')
+        if category:
+            queryset = queryset.filter(category__slug=category)
+        return queryset
+
+
+class ProjectViewSet(CatalogViewSet):
+    serializer_class = ProjectSerializer
+    lookup_field = 'slug'
+    surrogate_keys = ('projects', 'project-categories', 'categories')
+    select_related_fields = {'category': 'category'}
+    prefetch_fields = {
+        'service_categories': Prefetch(
+            'service_categories', queryset=ServiceCategory.objects.only('id', 'name', 'slug')
+        ),
+        'images': 'images',
+    }
+    ordering = ('-project_date', '-id')
+
+    def base_queryset(self):
+        return Project.objects.published()
+
+    def filter_queryset(self, queryset):
+        params = self.request.query_params
+        if params.get('category'):
+            queryset = queryset.by_category(params['category'])
+        if params.get('service_category'):
+            queryset = queryset.by_service_category(params['service_category'])
+        if params.get('featured'):
+            queryset = queryset.featured()
+        return queryset
+
+
+class TestimonialViewSet(CatalogViewSet):
+    serializer_class = TestimonialSerializer
+    surrogate_keys = ('testimonials',)
+    ordering = ('-created_at', '-id')
@@ -1,16 +1,47 @@
-from django.contrib import admin
+import csv
+import io
+from datetime import timedelta
+
+from django import forms
+from django.contrib import admin, messages
+from django.shortcuts import redirect, render
+from django.urls import path
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import ContactMessage, QuoteRequest, Newsletter
+from .analytics import dashboard_data
+from .archive import restore_lead
+from .exports import stream_csv, stream_leads
+from .models import ContactMessage, QuoteRequest, Newsletter, LeadDailyRollup, ArchivedLead
+from .services import NewsletterService
+
+
+class NewsletterImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV or plain text; the first column of each row is read as the email")
+
+
+class LeadExportMixin:
+    """Streaming CSV/JSONL export actions; the changelist's status and date filters narrow the selection"""
+    export_kind = None
+    
+    @admin.action(description='Export selected to CSV')
+    def export_csv(self, request, queryset):
+        return stream_leads(self.export_kind, queryset, 'csv')
+    
+    @admin.action(description='Export selected to JSONL')
+    def export_jsonl(self, request, queryset):
+        return stream_leads(self.export_kind, queryset, 'jsonl')
 
 
 @admin.register(ContactMessage)
-class ContactMessageAdmin(admin.ModelAdmin):
+class ContactMessageAdmin(LeadExportMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'subject', 'status', 'created_at']
     list_filter = ['status', 'created_at']
     list_editable = ['status']
     search_fields = ['name', 'email', 'subject', 'message']
     date_hierarchy = 'created_at'
     readonly_fields = ['created_at']
+    actions = ['export_csv', 'export_jsonl']
+    export_kind = 'contact'
     
     fieldsets = (
         ('Contact Information', {
@@ -26,7 +57,7 @@ class ContactMessageAdmin(admin.ModelAdmin):
 
 
 @admin.register(QuoteRequest)
-class QuoteRequestAdmin(admin.ModelAdmin):
+class QuoteRequestAdmin(LeadExportMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'service_category', 'location', 'budget', 'status', 'created_at']
     list_filter = ['service_category', 'budget', 'status', 'created_at']
     list_editable = ['status']
@@ -34,6 +65,8 @@ class QuoteRequestAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     readonly_fields = ['created_at']
     filter_horizontal = ['category_items']
+    actions = ['export_csv', 'export_jsonl']
+    export_kind = 'quote'
     
     fieldsets = (
         ('Contact Information', {
@@ -54,4 +87,130 @@ class NewsletterAdmin(admin.ModelAdmin):
     list_filter = ['is_active', 'subscribed_at']
     list_editable = ['is_active']
     search_fields = ['email']
-    date_hierarchy = 'subscribed_at'
\ No newline at end of file
+    date_hierarchy = 'subscribed_at'
+    show_full_result_count = False
+    actions = ['activate_subscriptions', 'deactivate_subscriptions', 'export_csv']
+    change_list_template = 'admin/contact/newsletter/change_list.html'
+    
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='contact_newsletter_import'),
+        ]
+        return urls + super().get_urls()
+    
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:contact_newsletter_changelist')
+        
+        if request.method == 'POST':
+            form = NewsletterImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                lines = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig')
+                emails = (row[0] for row in csv.reader(lines) if row)
+                stats = NewsletterService.import_emails(emails)
+                self.message_user(
+                    request,
+                    f"Imported {stats['created']} new subscribers "
+                    f"({stats['existing']} already subscribed, {stats['invalid']} invalid).",
+                    messages.SUCCESS,
+                )
+                return redirect('admin:contact_newsletter_changelist')
+        else:
+            form = NewsletterImportForm()
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'form': form,
+            'title': 'Import newsletter subscribers',
+        }
+        return render(request, 'admin/contact/newsletter/import.html', context)
+    
+    @admin.action(description='Activate selected subscriptions')
+    def activate_subscriptions(self, request, queryset):
+        updated = NewsletterService.set_active(queryset, True)
+        self.message_user(request, f'{updated} subscriptions activated.', messages.SUCCESS)
+    
+    @admin.action(description='Deactivate selected subscriptions')
+    def deactivate_subscriptions(self, request, queryset):
+        updated = NewsletterService.set_active(queryset, False)
+        self.message_user(request, f'{updated} subscriptions deactivated.', messages.SUCCESS)
+    
+    @admin.action(description='Export selected subscriptions to CSV')
+    def export_csv(self, request, queryset):
+        rows = (
+            queryset.order_by('pk')
+                    .values_list('email', 'is_active', 'subscribed_at')
+                    .iterator(chunk_size=2000)
+        )
+        return stream_csv(['email', 'is_active', 'subscribed_at'], rows, 'newsletter.csv')
+
+
+@admin.register(LeadDailyRollup)
+class LeadDailyRollupAdmin(admin.ModelAdmin):
+    """Lead analytics dashboard; reads only the pre-aggregated rollups"""
+    RANGES = [30, 90, 365]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+    
+    def changelist_view(self, request, extra_context=None):
+        if not self.has_view_permission(request):
+            return redirect('admin:index')
+        
+        try:
+            days = int(request.GET.get('days', 90))
+        except ValueError:
+            days = 90
+        if days not in self.RANGES:
+            days = 90
+        
+        end = timezone.localdate()
+        start = end - timedelta(days=days - 1)
+        data = dashboard_data(start, end)
+        peak = max((max(row['contact'], row['quote']) for row in data['daily']), default=0)
+        
+        context = {
+            **self.admin_site.each_context(request),
+            **data,
+            'opts': self.model._meta,
+            'title': 'Lead analytics',
+            'days': days,
+            'ranges': self.RANGES,
+            'start': start,
+            'end': end,
+            'peak': peak or 1,
+            **(extra_context or {}),
+        }
+        return render(request, 'admin/contact/leaddailyrollup/dashboard.html', context)
+
+
+@admin.register(ArchivedLead)
+class ArchivedLeadAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'kind', 'status', 'created_at', 'archived_at']
+    list_filter = ['kind', 'status']
+    search_fields = ['=original_id']
+    date_hierarchy = 'created_at'
+    readonly_fields = ['kind', 'original_id', 'status', 'created_at', 'archived_at', 'data']
+    show_full_result_count = False
+    actions = ['restore']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    @admin.action(description='Restore selected leads', permissions=['delete'])
+    def restore(self, request, queryset):
+        restored = 0
+        for kind, original_id in queryset.values_list('kind', 'original_id'):
+            restore_lead(kind, original_id)
+            restored += 1
+        self.message_user(request, f'{restored} leads restored.', messages.SUCCESS)
@@ -0,0 +1,245 @@
+"""
+Daily lead rollups.
+
+``LeadDailyRollup`` holds one row per day, lead kind, service category,
+budget, location and status with the number of leads in that bucket. A
+day is always rebuilt as a whole (count, delete and bulk insert in one
+transaction, holding a lock per day), so re-running any range is safe,
+even while a signal or another worker rebuilds the same day.
+
+Rollups are kept current by the save/delete signals in ``signals.py``,
+which rebuild the day of the changed lead, and by ``rollup_leads`` which
+refreshes recent days (or backfills history in chunks) to pick up
+changes made with ``QuerySet.update()``. Leads moved to ``ArchivedLead``
+are still counted.
+"""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .exports import filter_leads
+from .models import ContactMessage, QuoteRequest, LeadDailyRollup, ArchivedLead
+
+LEAD_SOURCES = {
+    'contact': (ContactMessage, ['status']),
+    'quote': (QuoteRequest, ['service_category_id', 'budget', 'location', 'status']),
+}
+
+
+def normalize_location(location):
+    """Collapse spelling variants of the same free-text location"""
+    return ' '.join(location.split()).title()[:200]
+
+
+def aggregate_leads(kind, start, end):
+    """
+    Count leads of one kind per day and dimension between two dates
+
+    Returns:
+        Counter keyed by (date, service_category_id, budget, location, status)
+    """
+    model, fields = LEAD_SOURCES[kind]
+    rows = (
+        filter_leads(model.objects.all(), start, end)
+        .annotate(day=TruncDate('created_at'))
+        .order_by()
+        .values('day', *fields)
+        .annotate(count=Count('id'))
+    )
+    counts = Counter()
+    for row in rows:
+        key = (
+            row['day'],
+            row.get('service_category_id'),
+            row.get('budget', ''),
+            normalize_location(row.get('location', '')),
+            row['status'],
+        )
+        counts[key] += row['count']
+
+    archived = filter_leads(ArchivedLead.objects.filter(kind=kind), start, end)
+    for created_at, data in archived.values_list('created_at', 'data').iterator(chunk_size=2000):
+        row = data['fields']
+        key = (
+            timezone.localdate(created_at),
+            row.get('service_category'),
+            row.get('budget', ''),
+            normalize_location(row.get('location', '')),
+            row['status'],
+        )
+        counts[key] += 1
+    return counts
+
+
+ROLLUP_LOCK_NAMESPACE = 0x4C454144  # 'LEAD'
+
+
+def lock_days(start, end):
+    """
+    Hold a transaction-scoped lock on every day from start to end inclusive
+
+    Two rebuilds of one day could otherwise both delete, then both insert
+    (doubling its counts), or an older count could be written last. Taken
+    in date order, so overlapping ranges cannot deadlock. PostgreSQL only:
+    SQLite already lets a single transaction write at a time.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        day = start
+        while day <= end:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [ROLLUP_LOCK_NAMESPACE, day.toordinal()])
+            day += timedelta(days=1)
+
+
+def rollup_days(start, end):
+    """
+    Rebuild the rollups for every day from start to end inclusive
+
+    Returns:
+        Number of rollup rows written
+    """
+    with transaction.atomic():
+        lock_days(start, end)
+        # Counted under the lock, so the last rebuild to write saw every lead
+        rollups = [
+            LeadDailyRollup(
+                date=day, kind=kind, service_category_id=category_id,
+                budget=budget, location=location, status=status, count=count,
+            )
+            for kind in LEAD_SOURCES
+            for (day, category_id, budget, location, status), count in aggregate_leads(kind, start, end).items()
+        ]
+        LeadDailyRollup.objects.filter(date__gte=start, date__lte=end).delete()
+        LeadDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+_state = threading.local()
+
+
+@contextmanager
+def rollups_suspended():
+    """
+    Skip signal-driven rollup rebuilds in this thread
+
+    For bulk moves that leave the counts unchanged, like archival, where a
+    rebuild per deleted row would be pure overhead.
+    """
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def rollup_day_of(instance):
+    """Rebuild the day a lead was created on, once the surrounding transaction commits"""
+    if not instance.created_at or getattr(_state, 'suspended', False):
+        return
+    day = timezone.localdate(instance.created_at)
+    transaction.on_commit(lambda: rollup_days(day, day))
+
+
+def refresh_recent(overlap_days=1):
+    """
+    Incrementally roll up days since the last rollup
+
+    The last ``overlap_days`` already rolled up are rebuilt as well, so
+    leads that arrived after that run are counted.
+
+    Returns:
+        Tuple of (first day rebuilt, rows written), or (None, 0) when there is nothing to do
+    """
+    last = LeadDailyRollup.objects.aggregate(last=Max('date'))['last']
+    if last is None:
+        return backfill()
+    start = last - timedelta(days=overlap_days)
+    return start, rollup_days(start, timezone.localdate())
+
+
+def lead_date_range():
+    """First and last day with any lead, or (None, None)"""
+    bounds = [
+        model.objects.aggregate(first=Min('created_at'), last=Max('created_at'))
+        for model, _ in LEAD_SOURCES.values()
+    ]
+    firsts = [b['first'] for b in bounds if b['first']]
+    lasts = [b['last'] for b in bounds if b['last']]
+    if not firsts:
+        return None, None
+    return timezone.localdate(min(firsts)), timezone.localdate(max(lasts))
+
+
+def iter_backfill(start=None, end=None, chunk_days=30):
+    """
+    Rebuild history chunk_days at a time, yielding (chunk start, chunk end, rows)
+
+    Each chunk is its own transaction, so a long backfill never holds
+    locks on the whole table and can be interrupted and resumed.
+    """
+    first, last = lead_date_range()
+    start = start or first
+    end = end or last
+    if start is None or end is None:
+        return
+
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        yield chunk_start, chunk_end, rollup_days(chunk_start, chunk_end)
+        chunk_start = chunk_end + timedelta(days=1)
+
+
+def backfill(start=None, end=None, chunk_days=30):
+    """Rebuild all history; returns (first day rebuilt, rows written)"""
+    first_day, written = None, 0
+    for chunk_start, _, rows in iter_backfill(start, end, chunk_days):
+        first_day = first_day or chunk_start
+        written += rows
+    return first_day, written
+
+
+# ============= DASHBOARD QUERIES =============
+
+def dashboard_data(start, end):
+    """
+    Aggregates for the lead dashboard, read from rollups only
+
+    Args:
+        start: First day included
+        end: Last day included
+    """
+    rollups = LeadDailyRollup.objects.filter(date__gte=start, date__lte=end)
+    quotes = rollups.filter(kind='quote')
+
+    def breakdown(queryset, *fields, limit=None):
+        rows = queryset.values(*fields).annotate(total=Sum('count')).order_by('-total', *fields)
+        return list(rows[:limit] if limit else rows)
+
+    totals = {row['kind']: row['total'] for row in breakdown(rollups, 'kind')}
+    budget_labels = dict(QuoteRequest.BUDGET_CHOICES)
+    by_budget = breakdown(quotes, 'budget')
+    for row in by_budget:
+        row['label'] = budget_labels.get(row['budget'], row['budget'] or 'Not given')
+
+    daily = {}
+    for row in rollups.values('date', 'kind').annotate(total=Sum('count')).order_by('date'):
+        daily.setdefault(row['date'], {'contact': 0, 'quote': 0})[row['kind']] = row['total']
+
+    return {
+        'contact_total': totals.get('contact', 0),
+        'quote_total': totals.get('quote', 0),
+        'by_category': breakdown(quotes, 'service_category__name'),
+        'by_budget': by_budget,
+        'by_location': breakdown(quotes, 'location', limit=15),
+        'by_status': breakdown(rollups, 'kind', 'status'),
+        'daily': [{'date': day, **counts} for day, counts in daily.items()],
+    }
@@ -0,0 +1,155 @@
+"""
+Archival of old contact messages and quote requests.
+
+Leads in a closed status (settings.LEAD_ARCHIVE_STATUSES) older than
+settings.LEAD_ARCHIVE_AFTER_DAYS are moved out of the hot tables into
+``ArchivedLead`` one batch per transaction: the batch is serialized with
+Django's python serializer (m2m ids included), inserted into the cold
+table and deleted from the hot table atomically, so an interrupted run
+never loses or duplicates a row.
+
+Any archived lead can be restored by kind and original id; it comes back
+with the same primary key.
+"""
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core import serializers
+from django.db import transaction
+from django.utils import timezone
+
+from services.models import CategoryItem, ServiceCategory
+from .analytics import rollups_suspended
+from .exports import LEAD_MODELS
+from .models import ArchivedLead
+
+
+class ArchiveResult:
+    """Running totals of one archive_leads run"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.moved = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.moved / self.seconds if self.seconds else 0.0
+
+
+def archivable(kind, older_than_days=None, statuses=None):
+    """Queryset of leads eligible for archival"""
+    older_than_days = settings.LEAD_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    statuses = statuses or settings.LEAD_ARCHIVE_STATUSES
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return LEAD_MODELS[kind].objects.filter(status__in=statuses, created_at__lt=cutoff)
+
+
+def serialize_lead(row):
+    """Python-serialized row; datetimes keep the microseconds DjangoJSONEncoder would drop"""
+    data = serializers.serialize('python', [row])[0]
+    data['fields'] = {
+        name: value.isoformat() if isinstance(value, datetime) else value
+        for name, value in data['fields'].items()
+    }
+    return data
+
+
+def archive_batch(kind, queryset):
+    """
+    Move one batch of leads to the cold table in a single transaction
+
+    Args:
+        kind: 'contact' or 'quote'
+        queryset: The batch; eligibility is re-checked under the row locks
+
+    Returns:
+        Number of rows moved
+    """
+    model = LEAD_MODELS[kind]
+    with transaction.atomic():
+        queryset = queryset.select_for_update()
+        if kind == 'quote':
+            queryset = queryset.prefetch_related('category_items')
+        rows = list(queryset)
+        if not rows:
+            return 0
+
+        ArchivedLead.objects.bulk_create([
+            ArchivedLead(
+                kind=kind,
+                original_id=row.pk,
+                status=row.status,
+                created_at=row.created_at,
+                data=serialize_lead(row),
+            )
+            for row in rows
+        ])
+        # Archived leads stay in the rollups, so the per-row rebuilds can be skipped
+        with rollups_suspended():
+            model.objects.filter(pk__in=[row.pk for row in rows]).delete()
+    return len(rows)
+
+
+def archive_leads(kind, older_than_days=None, statuses=None, batch_size=500, dry_run=False, progress=None):
+    """
+    Archive every eligible lead of one kind in batches
+
+    Args:
+        kind: 'contact' or 'quote'
+        older_than_days: Minimum age in days, default settings.LEAD_ARCHIVE_AFTER_DAYS
+        statuses: Statuses to archive, default settings.LEAD_ARCHIVE_STATUSES
+        batch_size: Rows per transaction
+        dry_run: Only count what would be moved
+        progress: Optional callable receiving the running ArchiveResult after each batch
+
+    Returns:
+        ArchiveResult
+    """
+    result = ArchiveResult(kind)
+    queryset = archivable(kind, older_than_days, statuses)
+    if dry_run:
+        result.moved = queryset.count()
+        return result
+
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    started = time.perf_counter()
+    last_pk = 0
+    while batch := list(pks.filter(pk__gt=last_pk)[:batch_size]):
+        result.moved += archive_batch(kind, queryset.filter(pk__in=batch))
+        result.batches += 1
+        result.seconds = time.perf_counter() - started
+        last_pk = batch[-1]
+        if progress:
+            progress(result)
+    return result
+
+
+def restore_lead(kind, original_id):
+    """
+    Move one archived lead back into its hot table under its original id
+
+    Many-to-many links to catalog items that no longer exist are dropped,
+    as is a deleted service category.
+
+    Raises:
+        ArchivedLead.DoesNotExist: Nothing archived under that id
+    """
+    with transaction.atomic():
+        archived = ArchivedLead.objects.select_for_update().get(kind=kind, original_id=original_id)
+        data = archived.data
+        fields = dict(data['fields'])
+
+        if kind == 'quote':
+            if not ServiceCategory.objects.filter(pk=fields.get('service_category')).exists():
+                fields['service_category'] = None
+            fields['category_items'] = list(
+                CategoryItem.objects.filter(pk__in=fields.get('category_items', [])).values_list('pk', flat=True)
+            )
+
+        restored = next(serializers.deserialize('python', [{**data, 'fields': fields}]))
+        restored.save()
+        archived.delete()
+    return restored.object
@@ -0,0 +1,148 @@
+"""
+Streaming exports of contact app data.
+
+Rows are read with ``.iterator(chunk_size=...)`` and encoded as they are
+produced, so memory stays flat however many rows are exported. For quote
+requests the ``category_items`` m2m is prefetched once per chunk and
+flattened into a single ``"; "``-joined field.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from services.models import CategoryItem
+from .models import ContactMessage, QuoteRequest
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+LEAD_MODELS = {
+    'contact': ContactMessage,
+    'quote': QuoteRequest,
+}
+
+LEAD_FIELDS = {
+    'contact': ['id', 'name', 'email', 'phone', 'subject', 'message', 'status', 'created_at'],
+    'quote': [
+        'id', 'name', 'email', 'phone', 'service_category', 'category_items',
+        'location', 'budget', 'timeline', 'project_description', 'status', 'created_at',
+    ],
+}
+
+
+class Echo:
+    """File-like object that hands back what is written instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+# Cells starting with these are run as formulas by Excel and Sheets
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_safe(value):
+    """Quote a string that a spreadsheet would read as a formula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def iter_csv(header, rows):
+    """
+    Yield CSV-encoded lines one row at a time
+
+    Names, subjects and messages come from public forms, so string cells
+    are neutralised with ``csv_safe`` before staff open them in a spreadsheet.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([csv_safe(value) for value in row])
+
+
+def iter_jsonl(records):
+    """Yield one JSON document per line"""
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_csv(header, rows, filename):
+    """
+    Streaming CSV download
+
+    Rows are encoded as they are produced, so pair this with a queryset
+    read through .iterator() to keep memory flat for large exports.
+    """
+    response = StreamingHttpResponse(iter_csv(header, rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def filter_leads(queryset, since=None, until=None, statuses=None):
+    """
+    Narrow a lead queryset to a created_at date range and statuses
+
+    Args:
+        since: First date included
+        until: Last date included
+        statuses: Iterable of status values, or None for all
+    """
+    if since:
+        queryset = queryset.filter(created_at__gte=_start_of_day(since))
+    if until:
+        queryset = queryset.filter(created_at__lt=_start_of_day(until + timedelta(days=1)))
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return queryset
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def iter_lead_records(kind, queryset, chunk_size=2000):
+    """
+    Yield export dicts for ContactMessage ('contact') or QuoteRequest ('quote') rows
+
+    Quote requests join their service category and prefetch category items
+    one chunk at a time.
+    """
+    fields = LEAD_FIELDS[kind]
+    queryset = queryset.order_by('pk')
+
+    if kind == 'contact':
+        for row in queryset.values(*fields).iterator(chunk_size=chunk_size):
+            yield row
+        return
+
+    queryset = queryset.select_related('service_category').prefetch_related(
+        Prefetch('category_items', queryset=CategoryItem.objects.only('id', 'name').order_by('name'))
+    )
+    for quote in queryset.iterator(chunk_size=chunk_size):
+        record = {field: getattr(quote, field) for field in fields}
+        record['service_category'] = quote.service_category.name if quote.service_category else ''
+        record['category_items'] = '; '.join(item.name for item in quote.category_items.all())
+        yield record
+
+
+def iter_lead_export(kind, records, fmt='csv'):
+    """Encode lead records as CSV lines or JSONL"""
+    if fmt == 'jsonl':
+        return iter_jsonl(records)
+    fields = LEAD_FIELDS[kind]
+    return iter_csv(fields, ([record[field] for field in fields] for record in records))
+
+
+def stream_leads(kind, queryset, fmt='csv', chunk_size=2000):
+    """Streaming CSV or JSONL download of contact messages or quote requests"""
+    records = iter_lead_records(kind, queryset, chunk_size)
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(iter_lead_export(kind, records, fmt), content_type=content_type)
+    filename = f"{kind}-export-{timezone.localdate():%Y%m%d}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
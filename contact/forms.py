@@ -1,5 +1,6 @@
 from django import forms
 from .models import ContactMessage, QuoteRequest, Newsletter
+from services.choices import get_category_choices, get_category_items
 from services.models import ServiceCategory, CategoryItem
 
 
@@ -114,6 +115,26 @@ class QuoteRequestForm(forms.ModelForm):
         # Make category_items optional
         self.fields['category_items'].required = False
         self.fields['service_category'].empty_label = "Select Category"
+        
+        # Validation only needs each item's category id, not the full row
+        self.fields['category_items'].queryset = CategoryItem.objects.only('id', 'name', 'category_id')
+        
+        # Render choices from the cached catalog instead of querying; the
+        # item checkboxes only cover the selected category, the rest are
+        # lazy-loaded from the quote_category_items endpoint
+        self.fields['service_category'].choices = [('', "Select Category")] + [
+            (category['id'], category['name']) for category in get_category_choices()
+        ]
+        self.fields['category_items'].choices = [
+            (item['id'], item['name']) for item in get_category_items(self._selected_category_id())
+        ]
+    
+    def _selected_category_id(self):
+        value = self.data.get(self.add_prefix('service_category')) if self.is_bound else self.initial.get('service_category')
+        try:
+            return int(getattr(value, 'pk', value))
+        except (TypeError, ValueError):
+            return None
     
     def clean_project_description(self):
         """Validate project description length"""
@@ -130,10 +151,11 @@ class QuoteRequestForm(forms.ModelForm):
         service_category = cleaned_data.get('service_category')
         category_items = cleaned_data.get('category_items')
         
-        # If category items are selected, ensure they belong to the selected category
+        # If category items are selected, ensure they belong to the selected category.
+        # The items were loaded in one query by the field; compare ids only.
         if service_category and category_items:
             for item in category_items:
-                if item.category != service_category:
+                if item.category_id != service_category.pk:
                     raise forms.ValidationError(
                         f"Selected item '{item.name}' does not belong to category '{service_category.name}'."
                     )
@@ -156,8 +178,9 @@ class NewsletterForm(forms.ModelForm):
         }
     
     def clean_email(self):
-        """Check if email already exists"""
-        email = self.cleaned_data.get('email')
-        if Newsletter.objects.filter(email=email).exists():
-            raise forms.ValidationError("This email is already subscribed to our newsletter.")
-        return email
\ No newline at end of file
+        """Normalize case; duplicates are handled by NewsletterService.subscribe"""
+        return Newsletter.normalize_email(self.cleaned_data.get('email'))
+    
+    def validate_unique(self):
+        # Subscribing an existing address is not an error, it is idempotent
+        pass
\ No newline at end of file
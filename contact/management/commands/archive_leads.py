@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from contact.archive import archive_leads
+from contact.exports import LEAD_MODELS
+
+
+class Command(BaseCommand):
+    help = 'Move old closed contact messages and quote requests into the ArchivedLead cold table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', dest='kinds', action='append', choices=list(LEAD_MODELS),
+            help='Lead kind to archive; repeatable, default all',
+        )
+        parser.add_argument(
+            '--days', type=int, default=settings.LEAD_ARCHIVE_AFTER_DAYS,
+            help='Archive leads older than this many days',
+        )
+        parser.add_argument(
+            '--status', dest='statuses', action='append',
+            help=f'Status to archive; repeatable, default {", ".join(settings.LEAD_ARCHIVE_STATUSES)}',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows would move')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        def progress(result):
+            self.stdout.write(
+                f'  {result.kind}: {result.moved} rows in {result.batches} batches '
+                f'({result.rows_per_second:.0f} rows/s)'
+            )
+
+        for kind in options['kinds'] or list(LEAD_MODELS):
+            result = archive_leads(
+                kind,
+                older_than_days=options['days'],
+                statuses=options['statuses'],
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+                progress=progress,
+            )
+            if options['dry_run']:
+                self.stdout.write(f'🔍 {kind}: {result.moved} rows would be archived')
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f'✅ {kind}: archived {result.moved} rows in {result.seconds:.2f}s '
+                    f'({result.rows_per_second:.0f} rows/s)'
+                ))
@@ -0,0 +1,56 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contact.exports import EXPORT_FORMATS, LEAD_MODELS, filter_leads, iter_lead_export, iter_lead_records
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Stream contact messages or quote requests to CSV or JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(LEAD_MODELS))
+        parser.add_argument('-o', '--output', default='-', help='Output file, or "-" for stdout')
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--since', help='First created_at date included (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Last created_at date included (YYYY-MM-DD)')
+        parser.add_argument(
+            '--status', dest='statuses', action='append',
+            help='Only export rows with this status; repeatable',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        since = parse_date(options['since']) if options['since'] else None
+        until = parse_date(options['until']) if options['until'] else None
+        queryset = filter_leads(LEAD_MODELS[kind].objects.all(), since, until, options['statuses'])
+
+        exported = 0
+
+        def counted(records):
+            nonlocal exported
+            for record in records:
+                exported += 1
+                if exported % options['chunk_size'] == 0:
+                    self.stderr.write(f'  {exported} rows exported')
+                yield record
+
+        output = options['output']
+        stream = self.stdout if output == '-' else open(output, 'w', newline='', encoding='utf-8')
+        try:
+            records = counted(iter_lead_records(kind, queryset, options['chunk_size']))
+            for line in iter_lead_export(kind, records, options['format']):
+                stream.write(line)
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+
+        self.stderr.write(self.style.SUCCESS(f'✅ Exported {exported} {kind} rows'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from contact.archive import restore_lead
+from contact.exports import LEAD_MODELS
+from contact.models import ArchivedLead
+
+
+class Command(BaseCommand):
+    help = 'Move one archived contact message or quote request back into its table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(LEAD_MODELS))
+        parser.add_argument('id', type=int, help='Original primary key of the lead')
+
+    def handle(self, *args, **options):
+        try:
+            lead = restore_lead(options['kind'], options['id'])
+        except ArchivedLead.DoesNotExist:
+            raise CommandError(f'No archived {options["kind"]} with id {options["id"]}')
+        self.stdout.write(self.style.SUCCESS(f'✅ Restored {lead}'))
@@ -0,0 +1,51 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contact.analytics import iter_backfill, refresh_recent
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Refresh the daily lead rollups behind the admin analytics dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill', action='store_true',
+            help='Rebuild history in chunks instead of refreshing recent days',
+        )
+        parser.add_argument('--since', help='First day to backfill (YYYY-MM-DD), default first lead')
+        parser.add_argument('--until', help='Last day to backfill (YYYY-MM-DD), default last lead')
+        parser.add_argument('--chunk-days', type=int, default=30)
+        parser.add_argument(
+            '--overlap-days', type=int, default=1,
+            help='Already rolled up days to rebuild when refreshing',
+        )
+
+    def handle(self, *args, **options):
+        if not options['backfill']:
+            start, written = refresh_recent(options['overlap_days'])
+            if start is None:
+                self.stdout.write('No leads to roll up')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✅ Rolled up leads since {start}: {written} rows'))
+            return
+
+        since = parse_date(options['since']) if options['since'] else None
+        until = parse_date(options['until']) if options['until'] else None
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be at least 1')
+
+        chunks = written = 0
+        for chunk_start, chunk_end, rows in iter_backfill(since, until, options['chunk_days']):
+            chunks += 1
+            written += rows
+            self.stdout.write(f'  {chunk_start} → {chunk_end}: {rows} rows')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Backfilled {chunks} chunks, {written} rollup rows'))
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def normalize_emails(apps, schema_editor):
+    """Lower-case stored emails, keeping the oldest row of each duplicate"""
+    Newsletter = apps.get_model('contact', 'Newsletter')
+    seen = {}
+    duplicates = []
+    for pk, email in Newsletter.objects.order_by('subscribed_at', 'pk').values_list('pk', 'email').iterator():
+        normalized = email.strip().lower()
+        if normalized in seen:
+            duplicates.append(pk)
+        else:
+            seen[normalized] = (pk, email)
+
+    Newsletter.objects.filter(pk__in=duplicates).delete()
+    for normalized, (pk, email) in seen.items():
+        if email != normalized:
+            Newsletter.objects.filter(pk=pk).update(email=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+    ]
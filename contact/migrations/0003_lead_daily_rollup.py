@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-19 12:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0002_normalize_newsletter_emails'),
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('kind', models.CharField(choices=[('contact', 'Contact message'), ('quote', 'Quote request')], max_length=10)),
+                ('budget', models.CharField(blank=True, max_length=20)),
+                ('location', models.CharField(blank=True, max_length=200)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('service_category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='services.servicecategory')),
+            ],
+            options={
+                'verbose_name': 'lead rollup',
+                'verbose_name_plural': 'lead analytics',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['kind', 'date'], name='contact_lea_kind_e2d2ef_idx')],
+            },
+        ),
+    ]
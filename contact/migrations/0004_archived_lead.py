@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-19 12:42
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contact', '0003_lead_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedLead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('contact', 'Contact message'), ('quote', 'Quote request')], max_length=10)),
+                ('original_id', models.PositiveIntegerField()),
+                ('status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Serialized row, including many-to-many ids')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['kind', 'created_at'], name='contact_arc_kind_7ee0b1_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivedlead',
+            constraint=models.UniqueConstraint(fields=('kind', 'original_id'), name='unique_archived_lead'),
+        ),
+    ]
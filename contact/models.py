@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils.text import slugify
 from ckeditor.fields import RichTextField
@@ -64,5 +65,60 @@ class Newsletter(models.Model):
     is_active = models.BooleanField(default=True)
     subscribed_at = models.DateTimeField(auto_now_add=True)
     
+    @staticmethod
+    def normalize_email(email):
+        """Emails are stored lower-cased so uniqueness is case-insensitive"""
+        return (email or '').strip().lower()
+    
+    def save(self, *args, **kwargs):
+        self.email = self.normalize_email(self.email)
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return self.email
+
+class LeadDailyRollup(models.Model):
+    """Pre-aggregated daily lead counts, read by the admin analytics dashboard"""
+    KIND_CHOICES = [
+        ('contact', 'Contact message'),
+        ('quote', 'Quote request'),
+    ]
+    
+    date = models.DateField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    service_category = models.ForeignKey(
+        ServiceCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    budget = models.CharField(max_length=20, blank=True)
+    location = models.CharField(max_length=200, blank=True)
+    status = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-date']
+        verbose_name = 'lead rollup'
+        verbose_name_plural = 'lead analytics'
+        indexes = [models.Index(fields=['kind', 'date'])]
+    
+    def __str__(self):
+        return f"{self.date} {self.kind}: {self.count}"
+
+
+class ArchivedLead(models.Model):
+    """Cold storage for old contact messages and quote requests"""
+    kind = models.CharField(max_length=10, choices=LeadDailyRollup.KIND_CHOICES)
+    original_id = models.PositiveIntegerField()
+    status = models.CharField(max_length=20)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    data = models.JSONField(encoder=DjangoJSONEncoder, help_text="Serialized row, including many-to-many ids")
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'original_id'], name='unique_archived_lead'),
+        ]
+        indexes = [models.Index(fields=['kind', 'created_at'])]
+    
     def __str__(self):
-        return self.email
\ No newline at end of file
+        return f"{self.get_kind_display()} #{self.original_id}"
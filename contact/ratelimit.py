@@ -0,0 +1,227 @@
+"""
+Abuse throttling for the public form endpoints.
+
+Each POST goes through two cheap gates before the form is even built:
+
+1. Spam guard: a honeypot field that must stay empty and a signed render
+   timestamp that must be older than SPAM_MIN_SUBMIT_SECONDS.
+2. Token buckets keyed by client IP and by submitted email, stored in the
+   cache and configured per endpoint in settings.RATE_LIMITS.
+
+Rejected requests never touch the database or SMTP. Rate-limited requests
+get a 429 with Retry-After and a filled honeypot gets the same redirect a
+real submission would, so bots learn nothing. A missing, expired or too
+recent timestamp can also be a person (a page kept open overnight, a
+cached copy of the form, autofill), so the view shows the form again with
+an error (``spam_guard_error``) instead of dropping the message.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.utils.html import format_html
+from django.utils.http import url_has_allowed_host_and_scheme
+
+logger = logging.getLogger(__name__)
+
+HONEYPOT_FIELD = 'website'
+TIMESTAMP_FIELD = 'form_ts'
+TIMESTAMP_SALT = 'contact.ratelimit.form_ts'
+TIMESTAMP_MAX_AGE = 86400
+# Reasons a person can hit; anything else is dropped silently
+TIMESTAMP_ERRORS = {
+    'missing_timestamp': 'Your form could not be verified. Please submit it again.',
+    'bad_timestamp': 'This form has expired. Please submit it again.',
+    'too_fast': 'That was quick! Please check your details and submit again.',
+}
+LOCK_WAIT_SECONDS = 0.5
+
+
+class RejectionCounter:
+    """Process-local counts of rejected requests by endpoint and reason."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def record(self, policy, reason):
+        with self._lock:
+            self._counts[(policy, reason)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+rejections = RejectionCounter()
+
+
+class TokenBucket:
+    """
+    Cache-backed token bucket.
+
+    Holds up to ``burst`` tokens, refilled at ``rate`` tokens per ``per``
+    seconds. State is a ``(tokens, updated_at)`` tuple per key, read and
+    written under a lock taken with ``cache.add`` (atomic in every
+    backend), so concurrent posts cannot all spend the same token.
+    """
+
+    def __init__(self, name, rate, per, burst=None, cache_alias='default'):
+        self.name = name
+        self.capacity = burst or rate
+        self.refill_rate = rate / per
+        self.cache = caches[cache_alias]
+        # Keep state until the bucket would be full again
+        self.timeout = math.ceil(self.capacity / self.refill_rate) + 1
+
+    def _key(self, identity):
+        digest = hashlib.sha1(identity.encode()).hexdigest()
+        return f'ratelimit:{self.name}:{digest}'
+
+    def consume(self, identity, now=None):
+        """Take one token. Returns (allowed, retry_after_seconds)."""
+        key = self._key(identity)
+        lock = f'{key}:lock'
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while not self.cache.add(lock, 1, timeout=5):
+            if time.monotonic() >= deadline:
+                # Only a flood from this one identity keeps the lock busy
+                return False, 1
+            time.sleep(0.005)
+        try:
+            now = time.time() if now is None else now
+            tokens, updated_at = self.cache.get(key) or (self.capacity, now)
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_rate)
+
+            if tokens >= 1:
+                self.cache.set(key, (tokens - 1, now), self.timeout)
+                return True, 0
+
+            self.cache.set(key, (tokens, now), self.timeout)
+            return False, math.ceil((1 - tokens) / self.refill_rate)
+        finally:
+            self.cache.delete(lock)
+
+
+def get_client_ip(request):
+    """
+    The client address as seen by the outermost trusted proxy
+
+    Each proxy appends the address it received the request from to
+    X-Forwarded-For, so only the last RATE_LIMIT_PROXY_HOPS entries were
+    written by proxies we trust; anything left of them is whatever the
+    client sent.
+    """
+    hops = getattr(settings, 'RATE_LIMIT_PROXY_HOPS', 0)
+    if hops:
+        forwarded = [entry.strip() for entry in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+        forwarded = [entry for entry in forwarded if entry]
+        if forwarded:
+            return forwarded[-min(hops, len(forwarded))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def spam_guard_fields():
+    """Hidden honeypot and signed timestamp inputs for a public form."""
+    return format_html(
+        '<input type="text" name="{}" value="" tabindex="-1" autocomplete="off" '
+        'aria-hidden="true" style="position: absolute; left: -10000px;">'
+        '<input type="hidden" name="{}" value="{}">',
+        HONEYPOT_FIELD, TIMESTAMP_FIELD, signing.dumps(int(time.time()), salt=TIMESTAMP_SALT),
+    )
+
+
+def spam_reason(request, require_timestamp=True):
+    """Return why a POST looks automated, or None."""
+    if request.POST.get(HONEYPOT_FIELD):
+        return 'honeypot'
+
+    token = request.POST.get(TIMESTAMP_FIELD)
+    if not token:
+        return 'missing_timestamp' if require_timestamp else None
+    try:
+        rendered_at = signing.loads(token, salt=TIMESTAMP_SALT, max_age=TIMESTAMP_MAX_AGE)
+    except signing.BadSignature:
+        return 'bad_timestamp'
+    age = time.time() - rendered_at
+    if age > TIMESTAMP_MAX_AGE:
+        return 'bad_timestamp'
+    if age < settings.SPAM_MIN_SUBMIT_SECONDS:
+        return 'too_fast'
+    return None
+
+
+def spam_guard_error(request):
+    """Message to show with the form when its timestamp was rejected, or None"""
+    return getattr(request, 'spam_guard_error', None)
+
+
+def _reject(request, policy_name, reason):
+    rejections.record(policy_name, reason)
+    logger.warning(f"Rejected {policy_name} POST from {get_client_ip(request)}: {reason}")
+
+
+def _back(request):
+    referer = request.META.get('HTTP_REFERER', '')
+    if url_has_allowed_host_and_scheme(referer, allowed_hosts={request.get_host()}):
+        return redirect(referer)
+    return redirect('home')
+
+
+def rate_limit(policy_name, require_timestamp=True):
+    """
+    Throttle POSTs to a view using settings.RATE_LIMITS[policy_name].
+
+    The policy applies separately to the client IP and, when present, to
+    the submitted email address.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            if request.method != 'POST':
+                return view_func(request, *args, **kwargs)
+
+            reason = spam_reason(request, require_timestamp)
+            if reason:
+                _reject(request, policy_name, reason)
+                if reason in TIMESTAMP_ERRORS:
+                    # The view shows the form again, with a fresh timestamp
+                    request.spam_guard_error = TIMESTAMP_ERRORS[reason]
+                    return view_func(request, *args, **kwargs)
+                # Same redirect a successful submission gets
+                return redirect(request.path) if require_timestamp else _back(request)
+
+            policy = settings.RATE_LIMITS[policy_name]
+            identities = [('ip', get_client_ip(request))]
+            email = request.POST.get('email', '').strip().lower()
+            if email:
+                identities.append(('email', email))
+
+            for kind, identity in identities:
+                bucket = TokenBucket(f'{policy_name}:{kind}', **policy)
+                allowed, retry_after = bucket.consume(identity)
+                if not allowed:
+                    _reject(request, policy_name, f'rate_{kind}')
+                    response = HttpResponse(
+                        'Too many requests. Please try again later.',
+                        status=429, content_type='text/plain',
+                    )
+                    response['Retry-After'] = str(retry_after)
+                    return response
+
+            return view_func(request, *args, **kwargs)
+        return wrapped
+    return decorator
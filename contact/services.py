@@ -1,10 +1,13 @@
 from django.core.mail import send_mail
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
 from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
+from itertools import islice
 import logging
 
-from .models import ContactMessage, QuoteRequest
+from .models import ContactMessage, QuoteRequest, Newsletter
 
 logger = logging.getLogger(__name__)
 
@@ -176,4 +179,101 @@ class QuoteService:
             
         except Exception as e:
             logger.warning(f"Failed to send quote confirmation: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+
+class NewsletterService:
+    """Service for newsletter subscriptions and bulk list maintenance"""
+    
+    @staticmethod
+    def subscribe(email):
+        """
+        Idempotently subscribe an email address
+        
+        get_or_create recovers from the IntegrityError a concurrent insert
+        of the same address raises, so racing requests never 500.
+        
+        Args:
+            email: Raw email address from the request
+            
+        Returns:
+            Tuple of (Newsletter instance, status) where status is
+            'created', 'reactivated' or 'existing'
+        """
+        email = Newsletter.normalize_email(email)
+        subscription, created = Newsletter.objects.get_or_create(email=email)
+        if created:
+            return subscription, 'created'
+        
+        if not subscription.is_active:
+            Newsletter.objects.filter(pk=subscription.pk).update(is_active=True)
+            subscription.is_active = True
+            return subscription, 'reactivated'
+        
+        return subscription, 'existing'
+    
+    @staticmethod
+    def import_emails(emails, chunk_size=1000):
+        """
+        Bulk subscribe addresses in chunks
+        
+        Each chunk costs one lookup of already-subscribed addresses and one
+        bulk insert; nothing beyond the current chunk is held in memory.
+        
+        Args:
+            emails: Iterable of raw email addresses
+            chunk_size: Addresses per chunk
+            
+        Returns:
+            Dict with 'created', 'existing' and 'invalid' counts
+        """
+        stats = {'created': 0, 'existing': 0, 'invalid': 0}
+        emails = iter(emails)
+        
+        while chunk := list(islice(emails, chunk_size)):
+            valid = set()
+            for raw in chunk:
+                email = Newsletter.normalize_email(raw)
+                try:
+                    validate_email(email)
+                except ValidationError:
+                    stats['invalid'] += 1
+                    continue
+                valid.add(email)
+            
+            existing = set(
+                Newsletter.objects.filter(email__in=valid).values_list('email', flat=True)
+            )
+            new = [Newsletter(email=email) for email in valid - existing]
+            # ignore_conflicts covers rows subscribed between lookup and insert
+            Newsletter.objects.bulk_create(new, ignore_conflicts=True)
+            
+            stats['created'] += len(new)
+            stats['existing'] += len(existing)
+        
+        return stats
+    
+    @staticmethod
+    def set_active(queryset, is_active, batch_size=5000):
+        """
+        Activate or deactivate subscriptions in primary-key batches
+        
+        Only one batch of primary keys is loaded at a time and each UPDATE
+        touches at most batch_size rows, keeping locks short.
+        
+        Returns:
+            Number of rows changed
+        """
+        pks = (
+            queryset.filter(is_active=not is_active)
+                    .order_by('pk')
+                    .values_list('pk', flat=True)
+        )
+        updated = 0
+        last_pk = 0
+        
+        while batch := list(pks.filter(pk__gt=last_pk)[:batch_size]):
+            updated += Newsletter.objects.filter(pk__in=batch).update(is_active=is_active)
+            last_pk = batch[-1]
+        
+        return updated
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .analytics import rollup_day_of
+from .models import ContactMessage, QuoteRequest
+
+
+@receiver([post_save, post_delete], sender=ContactMessage)
+@receiver([post_save, post_delete], sender=QuoteRequest)
+def refresh_lead_rollup(sender, instance, **kwargs):
+    rollup_day_of(instance)
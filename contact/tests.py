@@ -1,3 +1,563 @@
-from django.test import TestCase
+import csv
+import json
+import statistics
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail, signing
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from services.choices import get_category_choices, get_category_items, get_items_by_category
+from services.models import CategoryItem, ServiceCategory
+from .archive import archive_leads, restore_lead
+from . import analytics
+from .analytics import backfill, iter_backfill, refresh_recent
+from .exports import filter_leads, iter_lead_records
+from .forms import QuoteRequestForm
+from .models import ArchivedLead, ContactMessage, LeadDailyRollup, Newsletter, QuoteRequest
+from .services import NewsletterService
+from .ratelimit import TIMESTAMP_SALT, TokenBucket, rejections
+
+
+def form_timestamp(age=60):
+    return signing.dumps(int(time.time()) - age, salt=TIMESTAMP_SALT)
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    RATE_LIMITS={
+        'contact': {'rate': 1, 'per': 3600, 'burst': 3},
+        'quote': {'rate': 1, 'per': 3600, 'burst': 3},
+        'newsletter': {'rate': 1, 'per': 3600, 'burst': 2},
+    },
+)
+class RateLimitTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        rejections.reset()
+
+    def contact_data(self, email='jane@example.com', **extra):
+        data = {
+            'name': 'Jane', 'email': email, 'phone': '+263 771 234 567',
+            'subject': 'Kitchen', 'message': 'I would like a new kitchen.',
+            'form_ts': form_timestamp(),
+        }
+        data.update(extra)
+        return data
+
+    def test_token_bucket_refills(self):
+        bucket = TokenBucket('test', rate=1, per=10, burst=2)
+        self.assertTrue(bucket.consume('a', now=0)[0])
+        self.assertTrue(bucket.consume('a', now=0)[0])
+        self.assertEqual(bucket.consume('a', now=0), (False, 10))
+        self.assertTrue(bucket.consume('a', now=10)[0])
+
+    def test_flood_is_throttled_by_ip(self):
+        statuses = [
+            self.client.post(reverse('contact'), self.contact_data(email=f'user{i}@example.com')).status_code
+            for i in range(20)
+        ]
+        self.assertEqual(statuses[:3], [302] * 3)
+        self.assertEqual(set(statuses[3:]), {429})
+        self.assertEqual(ContactMessage.objects.count(), 3)
+        self.assertEqual(rejections.snapshot()[('contact', 'rate_ip')], 17)
+
+    def test_rate_limited_response_has_retry_after(self):
+        for _ in range(3):
+            self.client.post(reverse('contact'), self.contact_data())
+        response = self.client.post(reverse('contact'), self.contact_data())
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_same_email_throttled_across_ips(self):
+        for i in range(3):
+            self.client.post(reverse('contact'), self.contact_data(), REMOTE_ADDR=f'10.0.0.{i}')
+        response = self.client.post(reverse('contact'), self.contact_data(email='JANE@example.com'),
+                                    REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(response.status_code, 429)
+
+    def test_honeypot_and_fast_submissions_are_not_saved(self):
+        honeypot = self.client.post(reverse('contact'), self.contact_data(website='http://spam.example'))
+        self.assertEqual(honeypot.status_code, 302)
+        for form_ts in (form_timestamp(age=0), ''):
+            response = self.client.post(reverse('contact'), self.contact_data(form_ts=form_ts))
+            # Shown again, with what was typed, for a person to resend
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'I would like a new kitchen.</textarea>')
+        self.assertFalse(ContactMessage.objects.exists())
+        self.assertEqual(len(mail.outbox), 0)
+        counts = rejections.snapshot()
+        self.assertEqual(counts[('contact', 'honeypot')], 1)
+        self.assertEqual(counts[('contact', 'too_fast')], 1)
+        self.assertEqual(counts[('contact', 'missing_timestamp')], 1)
+
+    def test_expired_form_shows_an_error(self):
+        response = self.client.post(reverse('contact'), self.contact_data(form_ts=form_timestamp(age=90000)))
+        self.assertContains(response, 'This form has expired')
+        self.assertContains(response, 'value="jane@example.com"')
+        self.assertFalse(ContactMessage.objects.exists())
+
+        resent = self.client.post(reverse('contact'), self.contact_data())
+        self.assertEqual(resent.status_code, 302)
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+    @override_settings(RATE_LIMIT_PROXY_HOPS=1)
+    def test_forwarded_for_entries_from_the_client_are_ignored(self):
+        statuses = [
+            self.client.post(
+                reverse('contact'), self.contact_data(email=f'user{i}@example.com'),
+                HTTP_X_FORWARDED_FOR=f'10.9.9.{i}, 203.0.113.7',
+            ).status_code
+            for i in range(5)
+        ]
+        self.assertEqual(statuses, [302, 302, 302, 429, 429])
+
+    def test_token_bucket_is_atomic_under_concurrency(self):
+        bucket = TokenBucket('test', rate=1, per=3600, burst=3)
+        barrier = threading.Barrier(20)
+        results = []
+
+        def consume():
+            barrier.wait()
+            results.append(bucket.consume('a')[0])
+
+        threads = [threading.Thread(target=consume) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 3)
+
+    def test_newsletter_throttled(self):
+        statuses = [
+            self.client.post(reverse('newsletter_subscribe'), {'email': f'n{i}@example.com'}).status_code
+            for i in range(4)
+        ]
+        self.assertEqual(statuses, [302, 302, 429, 429])
+        self.assertEqual(Newsletter.objects.count(), 2)
+
+    def test_workers_stay_responsive_under_flood(self):
+        """Rejected requests are answered from the cache, without DB writes or SMTP."""
+        accepted, rejected = [], []
+        for i in range(200):
+            started = time.perf_counter()
+            response = self.client.post(reverse('contact'), self.contact_data(email=f'f{i}@example.com'))
+            elapsed = time.perf_counter() - started
+            (rejected if response.status_code == 429 else accepted).append(elapsed)
+
+        self.assertEqual(len(accepted), 3)
+        self.assertEqual(len(rejected), 197)
+        self.assertEqual(ContactMessage.objects.count(), 3)
+        self.assertLess(statistics.median(rejected), statistics.median(accepted))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class QuoteFormTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.kitchens = ServiceCategory.objects.create(
+            name='Kitchens', icon='fa-utensils', description='-', featured_image='categories/k.jpg'
+        )
+        cls.ceilings = ServiceCategory.objects.create(
+            name='Ceilings', icon='fa-layer-group', description='-', featured_image='categories/c.jpg'
+        )
+        cls.items = [
+            CategoryItem.objects.create(
+                category=cls.kitchens, name=f'Kitchen {i}', short_description='-',
+                full_description='-', featured_image='category_items/k.jpg',
+            )
+            for i in range(5)
+        ]
+        cls.ceiling_item = CategoryItem.objects.create(
+            category=cls.ceilings, name='Bulkhead', short_description='-',
+            full_description='-', featured_image='category_items/c.jpg',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def form_data(self, items):
+        return {
+            'name': 'Jane', 'email': 'jane@example.com', 'phone': '+263771234567',
+            'service_category': self.kitchens.pk, 'category_items': [item.pk for item in items],
+            'location': 'Harare', 'budget': 'flexible', 'timeline': '3-6_months',
+            'project_description': 'A full kitchen renovation with an island.',
+        }
+
+    def test_membership_validated_without_per_item_queries(self):
+        QuoteRequestForm()  # warm the choices cache
+        counts = []
+        for items in (self.items[:1], self.items):
+            with CaptureQueriesContext(connection) as ctx:
+                form = QuoteRequestForm(self.form_data(items))
+                self.assertTrue(form.is_valid(), form.errors)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_item_from_other_category_rejected(self):
+        form = QuoteRequestForm(self.form_data([self.items[0], self.ceiling_item]))
+        self.assertFalse(form.is_valid())
+        self.assertIn('does not belong', str(form.non_field_errors()))
+
+    def test_choices_are_cached_and_invalidated(self):
+        get_items_by_category()
+        get_category_choices()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_category_items(self.kitchens.pk)), 5)
+            self.assertEqual(len(get_category_choices()), 2)
+
+        CategoryItem.objects.create(
+            category=self.kitchens, name='Kitchen 5', short_description='-',
+            full_description='-', featured_image='category_items/k.jpg',
+        )
+        self.assertEqual(len(get_category_items(self.kitchens.pk)), 6)
+
+    @override_settings(CATALOG_CHOICES_CACHE_SECONDS=0)
+    def test_choices_expire_when_the_version_bump_is_missed(self):
+        # What another worker sees when its LocMemCache never got the bump
+        get_category_choices()
+        ServiceCategory.objects.bulk_create([ServiceCategory(name='Doors', description='-')])
+        self.assertEqual(len(get_category_choices()), 3)
+
+    def test_category_items_endpoint(self):
+        response = self.client.get(reverse('quote_category_items'), {'category': self.ceilings.pk})
+        self.assertEqual(response.json(), {'items': [
+            {'id': self.ceiling_item.pk, 'name': 'Bulkhead', 'slug': self.ceiling_item.slug}
+        ]})
+        response = self.client.get(reverse('quote_category_items'), {'category': 'x'})
+        self.assertEqual(response.json(), {'items': []})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NewsletterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_subscribe_is_idempotent_and_case_insensitive(self):
+        _, status = NewsletterService.subscribe('  Jane@Example.com ')
+        self.assertEqual(status, 'created')
+        _, status = NewsletterService.subscribe('jane@example.COM')
+        self.assertEqual(status, 'existing')
+        self.assertEqual(list(Newsletter.objects.values_list('email', flat=True)), ['jane@example.com'])
+
+    def test_subscribe_recovers_from_concurrent_insert(self):
+        Newsletter.objects.create(email='jane@example.com')
+        # Simulate losing the race: the lookup misses, the insert conflicts
+        real_get = Newsletter.objects.get
+        calls = []
+
+        def racing_get(*args, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                raise Newsletter.DoesNotExist
+            return real_get(*args, **kwargs)
+
+        with mock.patch.object(Newsletter.objects, 'get', side_effect=racing_get):
+            _, status = NewsletterService.subscribe('jane@example.com')
+        self.assertEqual(status, 'existing')
+
+    def test_subscribe_reactivates(self):
+        Newsletter.objects.create(email='jane@example.com', is_active=False)
+        _, status = NewsletterService.subscribe('JANE@example.com')
+        self.assertEqual(status, 'reactivated')
+        self.assertTrue(Newsletter.objects.get().is_active)
+
+    def test_flash_message_skips_the_session(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('newsletter_subscribe'), {'email': 'jane@example.com'})
+        self.assertIn('messages', response.cookies)
+        self.assertNotIn('sessionid', response.cookies)
+        self.assertFalse([q for q in queries if 'django_session' in q['sql']])
+
+    def test_form_token_keeps_form_pages_cacheable(self):
+        page = self.client.get(reverse('contact'))
+        self.assertNotIn('csrftoken', page.cookies)
+        self.assertIn('public', page['Cache-Control'])
+        self.assertContains(page, 'data-lazy-csrf')
+
+        response = self.client.get(reverse('form_token'))
+        self.assertIn('csrftoken', response.cookies)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertTrue(response.json()['token'])
+
+    def test_view_handles_duplicates(self):
+        for email in ('jane@example.com', 'JANE@example.com'):
+            response = self.client.post(reverse('newsletter_subscribe'), {'email': email})
+            self.assertEqual(response.status_code, 302)
+        self.assertEqual(Newsletter.objects.count(), 1)
+
+    def test_import_emails_in_chunks(self):
+        Newsletter.objects.create(email='existing@example.com')
+        emails = [f'user{i}@example.com' for i in range(25)] + ['EXISTING@example.com', 'not-an-email']
+        with self.assertNumQueries(6):
+            stats = NewsletterService.import_emails(emails, chunk_size=10)
+        self.assertEqual(stats, {'created': 25, 'existing': 1, 'invalid': 1})
+        self.assertEqual(Newsletter.objects.count(), 26)
+
+    def test_set_active_in_batches(self):
+        Newsletter.objects.bulk_create(Newsletter(email=f'u{i}@example.com') for i in range(12))
+        updated = NewsletterService.set_active(Newsletter.objects.all(), False, batch_size=5)
+        self.assertEqual(updated, 12)
+        self.assertFalse(Newsletter.objects.filter(is_active=True).exists())
+
+    def test_admin_export_streams_csv(self):
+        Newsletter.objects.create(email='jane@example.com')
+        admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin_user)
+        response = self.client.post(reverse('admin:contact_newsletter_changelist'), {
+            'action': 'export_csv', '_selected_action': Newsletter.objects.values_list('pk', flat=True),
+        })
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'email,is_active,subscribed_at')
+        self.assertTrue(lines[1].startswith('jane@example.com,True,'))
+
+    def test_admin_import_view(self):
+        admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin_user)
+        upload = SimpleUploadedFile('list.csv', b'email\nJane@Example.com\nbob@example.com\n', content_type='text/csv')
+        response = self.client.post(reverse('admin:contact_newsletter_import'), {'file': upload})
+        self.assertRedirects(response, reverse('admin:contact_newsletter_changelist'))
+        self.assertEqual(
+            sorted(Newsletter.objects.values_list('email', flat=True)),
+            ['bob@example.com', 'jane@example.com'],
+        )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class LeadExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.kitchens = ServiceCategory.objects.create(
+            name='Kitchens', icon='fa-utensils', description='-', featured_image='categories/k.jpg'
+        )
+        cls.items = [
+            CategoryItem.objects.create(
+                category=cls.kitchens, name=f'Kitchen {i}', short_description='-',
+                full_description='-', featured_image='category_items/k.jpg',
+            )
+            for i in range(3)
+        ]
+
+    def create_quotes(self, count, status='pending'):
+        for i in range(count):
+            quote = QuoteRequest.objects.create(
+                name=f'Client {i}', email=f'client{i}@example.com', phone='-',
+                service_category=self.kitchens, location='Harare', budget='flexible',
+                project_description='-', timeline='-', status=status,
+            )
+            quote.category_items.set(self.items[:2])
+
+    def test_quote_export_joins_category_items(self):
+        self.create_quotes(1)
+        records = list(iter_lead_records('quote', QuoteRequest.objects.all()))
+        self.assertEqual(records[0]['service_category'], 'Kitchens')
+        self.assertEqual(records[0]['category_items'], 'Kitchen 0; Kitchen 1')
+
+    def test_quote_export_prefetches_once_per_chunk(self):
+        self.create_quotes(10)
+        # One streamed select plus one prefetch per chunk of 5
+        with self.assertNumQueries(3):
+            records = list(iter_lead_records('quote', QuoteRequest.objects.all(), chunk_size=5))
+        self.assertEqual(len(records), 10)
+
+    def test_filters(self):
+        self.create_quotes(2)
+        self.create_quotes(1, status='done')
+        old = QuoteRequest.objects.filter(status='pending').first()
+        QuoteRequest.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=30))
+
+        today = timezone.localdate()
+        queryset = filter_leads(QuoteRequest.objects.all(), since=today - timedelta(days=1), until=today)
+        self.assertEqual(queryset.count(), 2)
+        queryset = filter_leads(QuoteRequest.objects.all(), statuses=['pending'])
+        self.assertEqual(queryset.count(), 2)
+
+    def test_admin_action_streams_jsonl(self):
+        ContactMessage.objects.create(name='Jane', email='jane@example.com', phone='-', subject='Hi', message='Hello')
+        admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin_user)
+        response = self.client.post(reverse('admin:contact_contactmessage_changelist'), {
+            'action': 'export_jsonl', '_selected_action': ContactMessage.objects.values_list('pk', flat=True),
+        })
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(lines[0])['email'], 'jane@example.com')
+
+    def test_export_command_writes_csv(self):
+        self.create_quotes(3)
+        out = StringIO()
+        call_command('export_leads', 'quote', '--status', 'pending', stdout=out, stderr=StringIO())
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['category_items'], 'Kitchen 0; Kitchen 1')
+
+    def test_csv_cells_cannot_become_formulas(self):
+        ContactMessage.objects.create(name='=HYPERLINK("http://evil.example","Jane")', email='jane@example.com',
+                                      phone='0772 000 000', subject='@SUM(A1)', message='-1+1')
+        out = StringIO()
+        call_command('export_leads', 'contact', stdout=out, stderr=StringIO())
+        row = next(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(row['name'], '\'=HYPERLINK("http://evil.example","Jane")')
+        self.assertEqual(row['subject'], "'@SUM(A1)")
+        self.assertEqual(row['message'], "'-1+1")
+        self.assertEqual(row['phone'], '0772 000 000')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class LeadRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.kitchens = ServiceCategory.objects.create(
+            name='Kitchens', icon='fa-utensils', description='-', featured_image='categories/k.jpg'
+        )
+
+    def create_quote(self, days_ago=0, location='Harare', budget='flexible'):
+        quote = QuoteRequest.objects.create(
+            name='Client', email='client@example.com', phone='-', service_category=self.kitchens,
+            location=location, budget=budget, project_description='-', timeline='-',
+        )
+        if days_ago:
+            QuoteRequest.objects.filter(pk=quote.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return quote
+
+    def test_signal_keeps_today_current(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_quote(location=' harare ')
+            self.create_quote(location='Harare')
+        rollup = LeadDailyRollup.objects.get()
+        self.assertEqual((rollup.kind, rollup.location, rollup.count), ('quote', 'Harare', 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            QuoteRequest.objects.first().delete()
+        self.assertEqual(LeadDailyRollup.objects.get().count, 1)
+
+    def test_backfill_in_chunks_matches_single_pass(self):
+        for days_ago in (0, 3, 3, 40, 100):
+            self.create_quote(days_ago=days_ago, budget='under_5k' if days_ago % 2 else 'flexible')
+        ContactMessage.objects.create(name='Jane', email='jane@example.com', phone='-', subject='Hi', message='-')
+
+        chunks = list(iter_backfill(chunk_days=7))
+        self.assertGreater(len(chunks), 1)
+        chunked = set(LeadDailyRollup.objects.values_list('date', 'kind', 'budget', 'status', 'count'))
+
+        backfill(chunk_days=365)
+        self.assertEqual(set(LeadDailyRollup.objects.values_list('date', 'kind', 'budget', 'status', 'count')), chunked)
+        self.assertEqual(LeadDailyRollup.objects.filter(kind='quote').aggregate(n=Sum('count'))['n'], 5)
+
+    def test_refresh_recent_picks_up_bulk_updates(self):
+        self.create_quote()
+        backfill()
+        QuoteRequest.objects.update(status='done')
+        refresh_recent()
+        self.assertEqual(LeadDailyRollup.objects.get().status, 'done')
+
+    def test_days_are_locked_before_they_are_counted(self):
+        self.create_quote()
+        today = timezone.localdate()
+        calls = []
+        aggregate = analytics.aggregate_leads
+        with mock.patch.object(analytics, 'lock_days', side_effect=lambda *days: calls.append(('lock', *days))), \
+                mock.patch.object(analytics, 'aggregate_leads',
+                                  side_effect=lambda *args: calls.append('count') or aggregate(*args)):
+            analytics.rollup_days(today - timedelta(days=1), today)
+        self.assertEqual(calls[0], ('lock', today - timedelta(days=1), today))
+        self.assertEqual(calls[1:], ['count', 'count'])
+        self.assertEqual(LeadDailyRollup.objects.get().count, 1)
+
+        cursor = mock.MagicMock()
+        with mock.patch.object(analytics, 'connection') as pg:
+            pg.vendor = 'postgresql'
+            pg.cursor.return_value.__enter__.return_value = cursor
+            analytics.lock_days(today - timedelta(days=1), today)
+        days = [call.args[1][1] for call in cursor.execute.call_args_list]
+        self.assertEqual(days, [today.toordinal() - 1, today.toordinal()])
+
+    def test_dashboard_reads_only_rollups(self):
+        self.create_quote()
+        backfill()
+        admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:contact_leaddailyrollup_changelist'), {'days': 30})
+        self.assertContains(response, 'Kitchens')
+        self.assertFalse(any('contact_quoterequest' in q['sql'] for q in queries.captured_queries))
+
+
+class LeadArchiveTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.kitchens = ServiceCategory.objects.create(
+            name='Kitchens', icon='fa-utensils', description='-', featured_image='categories/k.jpg'
+        )
+        cls.item = CategoryItem.objects.create(
+            category=cls.kitchens, name='Island', short_description='-',
+            full_description='-', featured_image='category_items/k.jpg',
+        )
+
+    def create_quote(self, status='replied', days_ago=400):
+        quote = QuoteRequest.objects.create(
+            name='Client', email='client@example.com', phone='-', service_category=self.kitchens,
+            location='Harare', budget='flexible', project_description='-', timeline='-', status=status,
+        )
+        quote.category_items.add(self.item)
+        QuoteRequest.objects.filter(pk=quote.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return quote
+
+    def test_moves_only_old_closed_rows_in_batches(self):
+        old = [self.create_quote() for _ in range(5)]
+        self.create_quote(status='pending')
+        self.create_quote(days_ago=10)
+
+        result = archive_leads('quote', older_than_days=365, batch_size=2)
+        self.assertEqual((result.moved, result.batches), (5, 3))
+        self.assertEqual(QuoteRequest.objects.count(), 2)
+        self.assertEqual(
+            set(ArchivedLead.objects.values_list('original_id', flat=True)), {quote.pk for quote in old}
+        )
+
+    def test_restore_single_record(self):
+        quote = self.create_quote()
+        created_at = QuoteRequest.objects.get(pk=quote.pk).created_at
+        archive_leads('quote', older_than_days=365)
+        restored = restore_lead('quote', quote.pk)
+
+        self.assertEqual(restored.pk, quote.pk)
+        restored = QuoteRequest.objects.get(pk=quote.pk)
+        self.assertEqual(list(restored.category_items.all()), [self.item])
+        self.assertEqual(restored.created_at, created_at)
+        self.assertFalse(ArchivedLead.objects.exists())
+
+    def test_archived_leads_stay_in_rollups(self):
+        self.create_quote()
+        backfill()
+        archive_leads('quote', older_than_days=365)
+        backfill()
+        self.assertEqual(LeadDailyRollup.objects.get().count, 1)
+
+    def test_command_reports_throughput(self):
+        self.create_quote()
+        ContactMessage.objects.create(name='Jane', email='jane@example.com', phone='-', subject='Hi', message='-')
+        out = StringIO()
+        call_command('archive_leads', '--days', '365', stdout=out)
+        self.assertIn('quote: archived 1 rows', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        self.assertEqual(ContactMessage.objects.count(), 1)
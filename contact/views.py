@@ -1,20 +1,27 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.http import JsonResponse
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import cache_control, never_cache
 from django.views.decorators.http import require_http_methods
 
 from .forms import ContactForm, QuoteRequestForm, NewsletterForm
-from .services import ContactService, QuoteService
-from .models import Newsletter
-from services.models import ServiceCategory
+from .services import ContactService, QuoteService, NewsletterService
+from .ratelimit import rate_limit, spam_guard_error
+from services.choices import get_category_choices, get_category_items
 
 
 @require_http_methods(["GET", "POST"])
+@rate_limit('contact')
 def contact(request):
     """Contact page with form validation"""
     if request.method == 'POST':
         form = ContactForm(request.POST)
         
-        if form.is_valid():
+        if spam_guard_error(request):
+            # Shown again with what was typed and a fresh timestamp
+            messages.error(request, spam_guard_error(request))
+        elif form.is_valid():
             # Create contact message using service
             contact_message = ContactService.create_contact_message(form.cleaned_data)
             
@@ -46,14 +53,18 @@ def contact(request):
 
 
 @require_http_methods(["GET", "POST"])
+@rate_limit('quote')
 def quote_request(request):
     """Quote request page with enhanced validation"""
-    categories = ServiceCategory.objects.all()
+    categories = get_category_choices()
     
     if request.method == 'POST':
         form = QuoteRequestForm(request.POST)
         
-        if form.is_valid():
+        if spam_guard_error(request):
+            # Shown again with what was typed and a fresh timestamp
+            messages.error(request, spam_guard_error(request))
+        elif form.is_valid():
             # Create quote request using service
             quote = QuoteService.create_quote_request(form.cleaned_data)
             
@@ -88,27 +99,58 @@ def quote_request(request):
     return render(request, 'core/quote_request.html', context)
 
 
+@require_http_methods(["GET"])
+@cache_control(public=True, max_age=300)
+def quote_category_items(request):
+    """Items of one service category, lazy-loaded by the quote form"""
+    try:
+        category_id = int(request.GET.get('category', ''))
+    except ValueError:
+        return JsonResponse({'items': []})
+    
+    return JsonResponse({'items': get_category_items(category_id)})
+
+
 @require_http_methods(["POST"])
+@rate_limit('newsletter', require_timestamp=False)
 def newsletter_subscribe(request):
-    """Newsletter subscription with duplicate check"""
-    email = request.POST.get('email', '').strip()
+    """Idempotent newsletter subscription"""
+    form = NewsletterForm(request.POST)
+    
+    if spam_guard_error(request):
+        messages.error(request, spam_guard_error(request))
+        return redirect(request.META.get('HTTP_REFERER', 'home'))
     
-    if not email:
-        messages.error(request, 'Please provide an email address.')
+    if not form.is_valid():
+        messages.error(request, 'Please provide a valid email address.')
         return redirect(request.META.get('HTTP_REFERER', 'home'))
     
-    # Check if already subscribed
-    if Newsletter.objects.filter(email=email).exists():
+    _, status = NewsletterService.subscribe(form.cleaned_data['email'])
+    
+    if status == 'existing':
         messages.info(request, 'You are already subscribed to our newsletter.')
+    elif status == 'reactivated':
+        messages.success(request, 'Welcome back! Your newsletter subscription is active again.')
     else:
-        # Create new subscription
-        Newsletter.objects.create(email=email)
         messages.success(request, 'Thank you for subscribing to our newsletter!')
     
     # Redirect back to previous page or home
     return redirect(request.META.get('HTTP_REFERER', 'home'))
 
 
+@never_cache
+@require_http_methods(["GET"])
+def form_token(request):
+    """
+    CSRF token for the forms of cacheable pages
+
+    The contact and quote forms carry no token in their HTML, which would
+    set the CSRF cookie and keep the pages out of the front-end cache;
+    base.html fetches one from here when a form is first used.
+    """
+    return JsonResponse({'token': get_token(request)})
+
+
 # ============= ERROR VIEWS =============
 
 def custom_404(request, exception):
@@ -1,7 +1,22 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
-from .models import SiteSettings, HeroSlide, Testimonial, TeamMember
+
+from .media import thumbnail_url
+from .models import SiteSettings, HeroSlide, Testimonial, TeamMember, EditorUpload, MediaAsset
+from .storage import upload_pending_files
+
+
+class ConcurrentUploadMixin:
+    """Upload inline images in parallel instead of one per form save."""
+    
+    def save_formset(self, request, form, formset, change):
+        deleted = getattr(formset, 'deleted_forms', [])
+        upload_pending_files(
+            inline_form.instance for inline_form in formset.forms
+            if inline_form.has_changed() and inline_form not in deleted
+        )
+        super().save_formset(request, form, formset, change)
 
 
 @admin.register(SiteSettings)
@@ -17,7 +32,7 @@ class SiteSettingsAdmin(admin.ModelAdmin):
     
     def logo_preview(self, obj):
         if obj.logo:
-            return format_html('<img src="{}" style="width: 80px; height: 80px; object-fit: contain; border-radius: 10px; border: 2px solid #ddd; padding: 5px;"/>', obj.logo.url)
+            return format_html('<img src="{}" style="width: 80px; height: 80px; object-fit: contain; border-radius: 10px; border: 2px solid #ddd; padding: 5px;"/>', thumbnail_url(obj.logo, 160, 160, resize='contain'))
         return format_html('<span style="color: #999;">No logo</span>')
     logo_preview.short_description = '🖼️ Logo'
 
@@ -27,6 +42,7 @@ class HeroSlideAdmin(admin.ModelAdmin):
     list_display = ['title', 'order', 'is_active', 'image_preview']
     list_filter = ['is_active']
     list_editable = ['order', 'is_active']
+    show_full_result_count = False
     fieldsets = (
         ('📝 Content', {'fields': ('title', 'subtitle', 'image')}),
         ('🔗 Call to Action', {'fields': ('cta_text', 'cta_link')}),
@@ -35,7 +51,7 @@ class HeroSlideAdmin(admin.ModelAdmin):
     
     def image_preview(self, obj):
         if obj.image:
-            return format_html('<img src="{}" style="width: 150px; height: 80px; object-fit: cover; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);"/>', obj.image.url)
+            return format_html('<img src="{}" style="width: 150px; height: 80px; object-fit: cover; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,0.1);"/>', thumbnail_url(obj.image, 300, 160))
         return '❌'
     image_preview.short_description = '🖼️ Preview'
 
@@ -45,6 +61,7 @@ class TestimonialAdmin(admin.ModelAdmin):
     list_display = ['client_name', 'rating_stars', 'is_featured', 'created_at']
     list_filter = ['rating', 'is_featured', 'created_at']
     list_editable = ['is_featured']
+    show_full_result_count = False
     search_fields = ['client_name', 'client_company', 'testimonial_text']
     date_hierarchy = 'created_at'
     
@@ -59,4 +76,34 @@ class TeamMemberAdmin(admin.ModelAdmin):
     list_display = ['name', 'position', 'specialization', 'years_experience', 'order', 'is_active']
     list_filter = ['is_active']
     list_editable = ['order', 'is_active']
-    search_fields = ['name', 'position', 'specialization']
\ No newline at end of file
+    show_full_result_count = False
+    search_fields = ['name', 'position', 'specialization']
+
+
+@admin.register(EditorUpload)
+class EditorUploadAdmin(admin.ModelAdmin):
+    """Read-only view of the CKEditor upload registry (kept up to date by the upload view)"""
+    list_display = ['name', 'size', 'width', 'height', 'uploaded_by', 'uploaded_at']
+    list_filter = ['is_image']
+    search_fields = ['name']
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MediaAsset)
+class MediaAssetAdmin(admin.ModelAdmin):
+    """Read-only view of the content-addressed media registry (written by the storage)"""
+    list_display = ['name', 'size', 'width', 'height', 'phash', 'created_at']
+    search_fields = ['name', 'sha256']
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,62 @@
+"""
+PostgreSQL backend that borrows connections from an in-process pool.
+
+Use with ``CONN_MAX_AGE = 0``: Django then "closes" the connection of a
+thread at the end of each request, which here returns it to the pool, and
+the next request on any thread picks it up warm. Pool options come from
+``DATABASES[alias]['POOL']`` (see ``core.dbpool.ConnectionPool``); the
+pool's own health checks replace ``CONN_HEALTH_CHECKS``.
+"""
+from django.db.backends.postgresql import base
+
+from core.dbpool import get_pool
+
+# Transaction status codes, the same in psycopg2 and psycopg 3
+TRANSACTION_IDLE = 0
+TRANSACTION_UNKNOWN = 4
+
+
+def _ping(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+def _reset(connection):
+    """Roll back whatever the last user left open; False if the connection is unusable"""
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status == TRANSACTION_UNKNOWN:
+        return False
+    if status != TRANSACTION_IDLE:
+        connection.rollback()
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        # One pool per set of connection parameters: the test runner points
+        # the alias at another database, and those connections must not mix
+        self.pool = get_pool(
+            self.alias,
+            key=tuple(sorted((name, repr(value)) for name, value in conn_params.items())),
+            ping=_ping,
+            reset=_reset,
+            **self.settings_dict.get('POOL', {}),
+        )
+        connection = self.pool.acquire(connect=lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+        # The parent sets this when it connects; a reused connection needs it too
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        self.isolation_level = (
+            base.IsolationLevel(isolation_level) if isolation_level is not None
+            else base.IsolationLevel.READ_COMMITTED
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection, discard=self.errors_occurred)
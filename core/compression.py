@@ -0,0 +1,161 @@
+"""
+HTML minification and dynamic response compression.
+
+``minify_html`` collapses the indentation of rendered templates: every run
+of whitespace containing a line break becomes a single newline and HTML
+comments are dropped (conditional comments are kept). Runs of spaces on
+one line are left alone, so text and attribute values render the same.
+Indentation inside ``<style>`` is insignificant and collapsed too;
+``<pre>``, ``<textarea>`` and ``<script>`` blocks (template literals can
+span lines) are copied verbatim.
+
+``CompressionMiddleware`` (core/middleware.py) picks Brotli or gzip from
+Accept-Encoding. Brotli needs the optional ``brotli`` package; without it
+only gzip is offered. Streaming responses are compressed chunk by chunk
+but not minified, since a chunk can end inside a block that must be kept.
+"""
+import re
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+from django.conf import settings
+
+PRESERVED_BLOCK_RE = re.compile(r'<(pre|textarea|script)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+COMMENT_RE = re.compile(r'<!--(?!\[if|<!|>).*?-->', re.DOTALL)
+LINE_BREAK_RE = re.compile(r'[ \t\r\f\v]*\n\s*')
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/rss+xml',
+    'image/svg+xml',
+)
+
+
+def _collapse(text):
+    return LINE_BREAK_RE.sub('\n', COMMENT_RE.sub('', text))
+
+
+def minify_html(html):
+    """Collapse the whitespace between lines of an HTML document"""
+    parts = []
+    position = 0
+    for match in PRESERVED_BLOCK_RE.finditer(html):
+        parts.append(_collapse(html[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(_collapse(html[position:]))
+    return ''.join(parts).strip()
+
+
+def available_encodings():
+    """Encodings this process can produce, in order of preference"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Pick the response encoding for an Accept-Encoding header
+
+    Args:
+        accept_encoding: Raw header value, e.g. ``gzip, deflate, br;q=0.9``
+
+    Returns:
+        'br', 'gzip' or None
+    """
+    weights = {}
+    for entry in accept_encoding.lower().split(','):
+        name, _, params = entry.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if name:
+            weights[name.strip()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in available_encodings():
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        # Ties go to the earlier, stronger encoding
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def is_compressible(content_type):
+    content_type = content_type.split(';', 1)[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compressor(encoding):
+    """
+    Incremental compressor for ``encoding``
+
+    Returns:
+        Tuple of (compress(chunk) -> bytes, finish() -> bytes)
+    """
+    if encoding == 'br':
+        engine = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        # flush() after each chunk so streamed output reaches the client
+        return (lambda chunk: engine.process(chunk) + engine.flush()), engine.finish
+    # wbits 31: zlib stream with a gzip header and trailer
+    engine = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return (lambda chunk: engine.compress(chunk) + engine.flush(zlib.Z_SYNC_FLUSH)), engine.flush
+
+
+def compress_bytes(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    engine = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return engine.compress(data) + engine.flush()
+
+
+def compress_stream(chunks, encoding, counter=None):
+    """
+    Compress an iterator of byte chunks
+
+    Args:
+        chunks: Iterable of bytes
+        encoding: 'br' or 'gzip'
+        counter: Optional callable(original_bytes, sent_bytes) called once
+            the stream is exhausted
+    """
+    compress, finish = compressor(encoding)
+    original = sent = 0
+    for chunk in chunks:
+        original += len(chunk)
+        data = compress(chunk)
+        if data:
+            sent += len(data)
+            yield data
+    data = finish()
+    sent += len(data)
+    yield data
+    if counter:
+        counter(original, sent)
+
+
+async def compress_async_stream(chunks, encoding, counter=None):
+    """``compress_stream`` for async streaming responses"""
+    compress, finish = compressor(encoding)
+    original = sent = 0
+    async for chunk in chunks:
+        original += len(chunk)
+        data = compress(chunk)
+        if data:
+            sent += len(data)
+            yield data
+    data = finish()
+    sent += len(data)
+    yield data
+    if counter:
+        counter(original, sent)
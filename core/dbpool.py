@@ -0,0 +1,283 @@
+"""
+In-process database connection pool.
+
+Django 5.0 keeps one persistent connection per thread (CONN_MAX_AGE), so a
+burst that wakes idle gunicorn threads opens new connections, each paying
+a TCP, TLS and auth handshake to the hosted Postgres. ``ConnectionPool``
+shares warm connections between the threads of a worker instead:
+
+* at most ``max_size`` connections are open; a thread that finds none
+  free waits up to ``timeout`` seconds (``PoolTimeout`` after that)
+* idle connections are reused newest first, so the oldest go idle long
+  enough to be reaped after ``max_idle`` seconds, down to ``min_size``
+* a connection idle for more than ``check_after`` seconds is pinged
+  before it is handed out, instead of ``CONN_HEALTH_CHECKS`` pinging on
+  every request; connections older than ``max_lifetime`` are replaced
+* acquisition waits go to the ``db_pool_wait_seconds`` histogram
+* a connection whose thread exits without returning it (a worker thread
+  that used the ORM outside the request cycle) is closed and its slot
+  freed, so leaks cannot exhaust the pool
+
+The pool knows nothing about Django or the driver: it is given callables
+to connect, ping, reset and close. The Postgres backend built on it is
+``core.backends.postgresql_pool``.
+"""
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool timeout"""
+
+
+class ConnectionPool:
+
+    def __init__(self, name, connect=None, ping=None, reset=None, close=None, min_size=0, max_size=10,
+                 timeout=10.0, max_idle=300.0, max_lifetime=3600.0, check_after=30.0):
+        """
+        Args:
+            name: Label of the pool in metrics and logs (the database alias)
+            connect: Opens a new connection, unless ``acquire`` is given one
+            ping: ping(conn) raises if the connection is dead
+            reset: reset(conn) -> bool, readies a returned connection for
+                reuse (rolls back); False discards it
+            close: close(conn)
+        """
+        self.name = name
+        self.connect = connect
+        self.ping = ping or (lambda conn: None)
+        self.reset = reset or (lambda conn: True)
+        self.close_connection = close or (lambda conn: conn.close())
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+
+        # (connection, opened_at, returned_at), most recently returned last
+        self._idle = deque()
+        self._opened = {}
+        # id(connection): (connection, weak reference to the thread using it)
+        self._owners = {}
+        self._size = 0
+        self._condition = threading.Condition()
+        self._reaper = None
+        self.stats = {'opened': 0, 'closed': 0, 'timeouts': 0}
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    def acquire(self, connect=None):
+        """
+        A connection for the calling thread, opened if none is idle
+
+        Args:
+            connect: Overrides the pool's ``connect`` for this call
+
+        Raises:
+            PoolTimeout: ``max_size`` connections are in use for longer than
+                ``timeout``
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            entry = None
+            with self._condition:
+                while not self._idle and self._size >= self.max_size:
+                    if self.reclaim():
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f"No free connection in the {self.name!r} pool after {self.timeout}s "
+                            f"({self.max_size} in use)"
+                        )
+                    self._condition.wait(remaining)
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    # Reserve the slot; the connect happens outside the lock
+                    self._size += 1
+
+            if entry is None:
+                conn = self._open(connect or self.connect)
+                break
+
+            conn, opened_at, returned_at = entry
+            now = time.monotonic()
+            if now - opened_at > self.max_lifetime:
+                self._discard(conn, 'lifetime')
+                continue
+            if now - returned_at > self.check_after and not self._alive(conn):
+                self._discard(conn, 'health')
+                continue
+            break
+
+        self._owners[id(conn)] = (conn, weakref.ref(threading.current_thread()))
+        registry.observe('db_pool_wait_seconds', (('alias', self.name),), time.monotonic() - started)
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection; ``discard`` (e.g. after an error) closes it instead"""
+        self._owners.pop(id(conn), None)
+        opened_at = self._opened.get(id(conn))
+        if opened_at is None:
+            # Not one of ours (the pool was reset); just close it
+            self.close_connection(conn)
+            return
+        if discard or not self._reset(conn):
+            self._discard(conn, 'broken')
+            return
+        if time.monotonic() - opened_at > self.max_lifetime:
+            self._discard(conn, 'lifetime')
+            return
+        with self._condition:
+            self._idle.append((conn, opened_at, time.monotonic()))
+            self._condition.notify()
+        self._start_reaper()
+
+    def reap(self):
+        """Close connections idle for longer than ``max_idle``, keeping ``min_size`` open"""
+        expired = []
+        now = time.monotonic()
+        with self._condition:
+            while self._idle and self._size - len(expired) > self.min_size:
+                conn, _, returned_at = self._idle[0]
+                if now - returned_at <= self.max_idle:
+                    break
+                self._idle.popleft()
+                expired.append(conn)
+        for conn in expired:
+            self._discard(conn, 'idle')
+        self.reclaim()
+        return len(expired)
+
+    def reclaim(self):
+        """Close connections held by threads that exited without returning them"""
+        orphans = []
+        for conn, owner in list(self._owners.values()):
+            thread = owner()
+            if thread is None or not thread.is_alive():
+                orphans.append(conn)
+        reclaimed = 0
+        for conn in orphans:
+            if self._owners.pop(id(conn), None) is not None:
+                logger.warning(f"Reclaimed a {self.name!r} pool connection its thread never returned")
+                self._discard(conn, 'orphaned')
+                reclaimed += 1
+        return reclaimed
+
+    def close_all(self):
+        """Close every idle connection; connections in use are closed when returned"""
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _, _ in idle:
+            self._discard(conn, 'shutdown')
+
+    # ============= INTERNALS =============
+
+    def _open(self, connect):
+        try:
+            conn = connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        self._opened[id(conn)] = time.monotonic()
+        with self._condition:
+            self.stats['opened'] += 1
+        return conn
+
+    def _discard(self, conn, reason):
+        self._owners.pop(id(conn), None)
+        self._opened.pop(id(conn), None)
+        try:
+            self.close_connection(conn)
+        except Exception as e:
+            logger.debug(f"Closing a pooled connection failed: {e}")
+        with self._condition:
+            self._size -= 1
+            self.stats['closed'] += 1
+            self._condition.notify()
+        logger.debug(f"Closed a {self.name!r} pool connection ({reason})")
+
+    def _alive(self, conn):
+        try:
+            self.ping(conn)
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, conn):
+        try:
+            return self.reset(conn)
+        except Exception:
+            return False
+
+    def _start_reaper(self):
+        if self._reaper is not None or not self.max_idle:
+            return
+        with self._condition:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap_forever, name=f'db-pool-{self.name}', daemon=True)
+        self._reaper.start()
+
+    def _reap_forever(self):
+        # Without traffic nothing else would close idle connections
+        while True:
+            time.sleep(max(self.max_idle / 2, 1))
+            try:
+                self.reap()
+            except Exception as e:
+                logger.warning(f"Reaping the {self.name!r} pool failed: {e}")
+
+
+def pools():
+    return list(_pools.values())
+
+
+def get_pool(name, key=None, **options):
+    """
+    The process-wide pool for ``(name, key)``, created on first use
+
+    Args:
+        name: Pool name, e.g. the database alias
+        key: Anything hashable that must also match, e.g. connection parameters
+        **options: ``ConnectionPool`` arguments, used when creating it
+    """
+    pool = _pools.get((name, key))
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get((name, key))
+            if pool is None:
+                pool = _pools[name, key] = ConnectionPool(name, **options)
+    return pool
+
+
+def close_pools():
+    """Close the idle connections of every pool (e.g. before forking)"""
+    with _pools_lock:
+        closing = list(_pools.values())
+        _pools.clear()
+    for pool in closing:
+        pool.close_all()
+
@@ -0,0 +1,176 @@
+"""
+Content-addressed media.
+
+Editors upload the same photos again and again: as a project's featured
+image, in its gallery, for a catalogue item. Every upload gets a new
+suffixed name, so each one was another object in the bucket. Now every
+file ``MediaStorage`` saves is recorded in ``MediaAsset`` with the SHA-256
+of its bytes and, for images, a 64-bit difference hash (dHash) of what it
+looks like. Saving bytes that are already stored returns the existing
+name instead of uploading a copy. The site never deletes media, so rows
+can safely share one object.
+
+Re-encoded, resized or lightly edited copies have different bytes but
+nearly the same dHash. ``find_duplicate_media`` puts the hashes in a
+``BKTree``, reports the groups within a Hamming distance and can point
+the rows that use them at a single copy.
+"""
+import hashlib
+import logging
+import posixpath
+
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff'}
+HASH_SIZE = 8
+
+
+def is_image_name(name):
+    return posixpath.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def perceptual_hash(fh):
+    """
+    Difference hash of an image
+
+    Args:
+        fh: Open binary file, left at position 0
+
+    Returns:
+        (hex hash, width, height), or ('', None, None) if it is not a readable image
+    """
+    from PIL import Image, ImageOps
+
+    fh.seek(0)
+    try:
+        with Image.open(fh) as image:
+            width, height = image.size
+            # JPEGs decode straight at a fraction of their size
+            image.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+            image = ImageOps.exif_transpose(image)
+            small = image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+    except Exception:
+        return '', None, None
+    finally:
+        fh.seek(0)
+
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (HASH_SIZE + 1) + col + 1])
+    return f'{bits:016x}', width, height
+
+
+def describe(name, content):
+    """
+    Registry fields of a file about to be stored
+
+    Args:
+        name: Storage name (only its extension is used)
+        content: Django File, left at position 0
+
+    Returns:
+        Dict of MediaAsset fields except name
+    """
+    digest = hashlib.sha256()
+    size = 0
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    content.seek(0)
+
+    phash, width, height = perceptual_hash(content) if is_image_name(name) else ('', None, None)
+    return {'sha256': digest.hexdigest(), 'size': size, 'phash': phash, 'width': width, 'height': height}
+
+
+def stored_names(digests):
+    """{sha256: name of the first stored file with those bytes} for the known ``digests``"""
+    from .models import MediaAsset
+    names = {}
+    try:
+        rows = MediaAsset.objects.filter(sha256__in=list(digests)).order_by('-pk').values_list('sha256', 'name')
+        # Descending, so the first stored copy of each overwrites the rest
+        for digest, name in rows:
+            names[digest] = name
+    except DatabaseError as e:
+        # Before migrations, or the database is away: upload as before
+        logger.warning(f"Media registry lookup failed: {e}")
+    return names
+
+
+def find_asset(sha256):
+    """Name of the first stored file with these bytes, or None"""
+    return stored_names([sha256]).get(sha256)
+
+
+def register_assets(entries):
+    """Record ``(name, describe() result)`` pairs of newly stored files"""
+    from .models import MediaAsset
+    if not entries:
+        return
+    try:
+        MediaAsset.objects.bulk_create([MediaAsset(name=name, **fields) for name, fields in entries],
+                                       ignore_conflicts=True)
+    except DatabaseError as e:
+        logger.warning(f"Could not record {len(entries)} files in the media registry: {e}")
+
+
+def register_asset(name, **fields):
+    register_assets([(name, fields)])
+
+
+def hamming(a, b):
+    """Number of differing bits of two hex hashes"""
+    return (int(a, 16) ^ int(b, 16)).bit_count()
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree of hashes under the Hamming distance
+
+    A search within ``radius`` only descends into children whose edge
+    distance is within ``radius`` of the query's distance to the node
+    (triangle inequality), instead of comparing against every hash.
+    """
+
+    def __init__(self, distance=hamming):
+        self.distance = distance
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, key, item):
+        self.size += 1
+        if self.root is None:
+            self.root = (key, item, {})
+            return
+        node = self.root
+        while True:
+            d = self.distance(key, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = (key, item, {})
+                return
+            node = child
+
+    def search(self, key, radius):
+        """(distance, item) of every entry within ``radius`` of ``key``, nearest first"""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node_key, item, children = stack.pop()
+            d = self.distance(key, node_key)
+            if d <= radius:
+                found.append((d, item))
+            for edge, child in children.items():
+                if d - radius <= edge <= d + radius:
+                    stack.append(child)
+        found.sort(key=lambda entry: entry[0])
+        return found
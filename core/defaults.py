@@ -0,0 +1,86 @@
+"""
+Default content seeded on a fresh database.
+
+Shared by ``init_site_settings``, ``init_hero_slides`` and ``bootstrap``.
+"""
+from django.db import transaction
+
+from .models import SiteSettings, HeroSlide
+
+DEFAULT_SITE_SETTINGS = {
+    'site_name': "Tilojnet Exclusive",
+    'tagline': "Premium Interior Design Services",
+    'phone': "+263 771 234 567",
+    'email': "info@tilojnet.com",
+    'address': "123 Design Street, Harare, Zimbabwe",
+    'whatsapp_number': "263771234567",
+    'about_short': "We are a premium interior design company dedicated to transforming spaces into stunning, functional environments.",
+    'about_full': """
+                <p>At Tilojnet Exclusive, we believe every space tells a story. Our expert team combines creativity,
+                functionality, and your vision to create stunning environments that reflect your unique style and personality.</p>
+                <p>With over 10 years of experience and 100+ completed projects, we're committed to delivering excellence in every detail.</p>
+                """,
+    'meta_description': "Tilojnet Exclusive offers premium interior design services for residential and commercial spaces in Zimbabwe. Transform your space with our expert designers.",
+    'mission': "To transform ordinary spaces into extraordinary experiences through innovative design and exceptional craftsmanship.",
+    'vision': "To be Zimbabwe's leading interior design company, known for creativity, quality, and client satisfaction.",
+}
+
+DEFAULT_HERO_SLIDES = [
+    {
+        'title': 'Transform Your Space',
+        'subtitle': 'Premium Interior Design Solutions for Modern Living',
+        'image': 'hero/default-1.jpg',
+        'cta_text': 'Get Started',
+        'cta_link': '/quote/',
+        'order': 1,
+        'is_active': True
+    },
+    {
+        'title': 'Exceptional Design Excellence',
+        'subtitle': 'Creating Beautiful, Functional Spaces That Inspire',
+        'image': 'hero/default-2.jpg',
+        'cta_text': 'View Portfolio',
+        'cta_link': '/projects/',
+        'order': 2,
+        'is_active': True
+    },
+    {
+        'title': 'Your Dream Space Awaits',
+        'subtitle': 'Expert Designers Ready to Bring Your Vision to Life',
+        'image': 'hero/default-3.jpg',
+        'cta_text': 'Contact Us',
+        'cta_link': '/contact/',
+        'order': 3,
+        'is_active': True
+    },
+]
+
+
+def seed_site_settings():
+    """Create the default SiteSettings row unless one exists; returns rows created"""
+    if SiteSettings.objects.exists():
+        return 0
+    SiteSettings.objects.create(**DEFAULT_SITE_SETTINGS)
+    return 1
+
+
+def seed_hero_slides():
+    """Create the default hero slides unless any exist; returns rows created"""
+    if HeroSlide.objects.exists():
+        return 0
+    HeroSlide.objects.bulk_create(HeroSlide(**slide) for slide in DEFAULT_HERO_SLIDES)
+    return len(DEFAULT_HERO_SLIDES)
+
+
+def seed_defaults():
+    """
+    Seed every default in one transaction
+
+    Returns:
+        Dict of rows created per model
+    """
+    with transaction.atomic():
+        return {
+            'site_settings': seed_site_settings(),
+            'hero_slides': seed_hero_slides(),
+        }
@@ -0,0 +1,56 @@
+"""
+Resource hints for the critical resources of a page.
+
+Views declare the resources the first paint depends on, usually the LCP
+image already in their context, with ``preload(request, url, 'image')``.
+``PreloadMiddleware`` (core/middleware.py) sends them, after the site-wide
+settings.CRITICAL_RESOURCES (font and icon CSS, their origins), as one
+``Link`` header, so the browser fetches them before it has parsed the
+inline CSS of base.html.
+
+Gunicorn's WSGI workers cannot send a 103 Early Hints interim response.
+The header is cached with the page by the front-end cache, which replays
+it as 103 Early Hints while it fetches the next copy from the origin.
+"""
+
+
+def link_value(url, rel='preload', **params):
+    """
+    One entry of a Link header
+
+    Args:
+        url: Resource URL
+        rel: 'preload', 'preconnect', ...
+        **params: Extra parameters; ``as_`` is sent as ``as``, True values
+            as bare flags (``crossorigin``) and falsy ones are dropped
+
+    Returns:
+        e.g. ``<https://cdn/a.css>; rel=preload; as=style``
+    """
+    parts = [f'<{url}>', f'rel={rel}']
+    for name, value in params.items():
+        name = name.rstrip('_')
+        if value is True:
+            parts.append(name)
+        elif value:
+            parts.append(f'{name}={value}')
+    return '; '.join(parts)
+
+
+def preload(request, url, as_, **params):
+    """Declare a resource ``request``'s page needs early, e.g. its LCP image"""
+    if not url:
+        return
+    if not hasattr(request, 'preload_links'):
+        request.preload_links = []
+    request.preload_links.append(link_value(url, as_=as_, **params))
+
+
+def preload_image(request, url):
+    """``preload`` for the largest contentful paint image"""
+    preload(request, url, 'image', fetchpriority='high')
+
+
+def site_links(resources):
+    """Link entries for settings.CRITICAL_RESOURCES: (url, rel, params) tuples"""
+    return [link_value(url, rel, **params) for url, rel, params in resources]
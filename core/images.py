@@ -0,0 +1,139 @@
+"""
+Image metadata captured once, when an image is uploaded.
+
+Models with one main image inherit ``ImageMetadataModel`` and name the
+field in ``image_metadata_field``. When that image changes, its size on
+screen (EXIF rotation applied), byte size, dominant colour and a tiny
+base64 JPEG preview are stored next to it. New uploads are read from the
+uploaded file before it goes to storage, so nothing is fetched back over
+the network.
+
+Templates use them through ``{% image_dimensions obj %}`` (width/height
+attributes, so the browser reserves the box before the image arrives) and
+``{{ obj|placeholder_style }}`` (the colour and blurred preview as a
+background until it loads). ``backfill_image_metadata`` covers images
+uploaded before this existed.
+"""
+import base64
+import logging
+from io import BytesIO
+
+from django.db import models
+
+logger = logging.getLogger(__name__)
+
+IMAGE_METADATA_FIELDS = ('image_width', 'image_height', 'image_bytes', 'image_color', 'image_placeholder')
+# EXIF orientations that turn the image by 90 degrees
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+COLOR_SAMPLE_SIZE = 64
+PLACEHOLDER_SIZE = 16
+
+
+def read_image_metadata(fh):
+    """
+    Metadata of an image file
+
+    Args:
+        fh: Open binary file, left at position 0
+
+    Returns:
+        Dict of the IMAGE_METADATA_FIELDS values except image_bytes
+    """
+    from PIL import Image, ImageOps
+
+    fh.seek(0)
+    try:
+        with Image.open(fh) as image:
+            width, height = image.size
+            if image.getexif().get(0x0112) in ROTATED_ORIENTATIONS:
+                width, height = height, width
+            # JPEGs decode straight at a fraction of their size
+            image.draft('RGB', (COLOR_SAMPLE_SIZE, COLOR_SAMPLE_SIZE))
+            sample = ImageOps.exif_transpose(image).convert('RGB')
+    finally:
+        fh.seek(0)
+    sample.thumbnail((COLOR_SAMPLE_SIZE, COLOR_SAMPLE_SIZE))
+
+    quantized = sample.quantize(colors=5, method=Image.Quantize.MEDIANCUT)
+    _, index = max(quantized.getcolors())
+    red, green, blue = quantized.getpalette()[index * 3:index * 3 + 3]
+
+    sample.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = BytesIO()
+    sample.save(buffer, format='JPEG', quality=50)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_color': f'#{red:02x}{green:02x}{blue:02x}',
+        'image_placeholder': 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode(),
+    }
+
+
+class ImageMetadataModel(models.Model):
+    """Store the metadata of ``image_metadata_field`` whenever that image changes"""
+
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_bytes = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, editable=False)
+
+    image_metadata_field = 'image'
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Still the raw name here; None if the field was deferred
+        instance._image_metadata_name = instance.__dict__.get(cls.image_metadata_field)
+        return instance
+
+    def image_changed(self):
+        if self.image_metadata_field not in self.__dict__:
+            # Deferred, so not assigned either
+            return False
+        field_file = getattr(self, self.image_metadata_field)
+        if not field_file:
+            return False
+        if not field_file._committed:
+            return True
+        loaded = getattr(self, '_image_metadata_name', None)
+        return loaded is not None and loaded != field_file.name
+
+    def update_image_metadata(self):
+        """
+        Read the metadata of the current image
+
+        An upload not yet saved is read from the uploaded file, anything
+        else from storage. Returns False if the image could not be read.
+        """
+        field_file = getattr(self, self.image_metadata_field)
+        values = dict.fromkeys(IMAGE_METADATA_FIELDS)
+        values.update(image_color='', image_placeholder='')
+        readable = False
+        if field_file:
+            try:
+                if field_file._committed:
+                    with field_file.storage.open(field_file.name) as fh:
+                        data = BytesIO(fh.read())
+                    values.update(read_image_metadata(data), image_bytes=len(data.getvalue()))
+                else:
+                    values.update(read_image_metadata(field_file.file), image_bytes=field_file.file.size)
+                readable = True
+            except Exception as e:
+                logger.warning(f"Could not read image metadata of {field_file.name}: {e}")
+        for name, value in values.items():
+            setattr(self, name, value)
+        return readable
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if (update_fields is None or self.image_metadata_field in update_fields) and self.image_changed():
+            self.update_image_metadata()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *IMAGE_METADATA_FIELDS}
+        super().save(*args, **kwargs)
+        if self.image_metadata_field in self.__dict__:
+            self._image_metadata_name = getattr(self, self.image_metadata_field).name
@@ -0,0 +1,82 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from core.images import IMAGE_METADATA_FIELDS, ImageMetadataModel
+from core.purge import purge_dispatcher
+from core.surrogate import SURROGATE_KEY_MODELS
+
+
+class Command(BaseCommand):
+    help = 'Store dimensions, colour and placeholder of images uploaded before they were measured'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models', metavar='APP.MODEL',
+                            help='Only this model; repeatable (default: all)')
+        parser.add_argument('--workers', type=int, default=8, help='Images downloaded and read in parallel')
+        parser.add_argument('--chunk-size', type=int, default=100)
+        parser.add_argument('--force', action='store_true', help='Also re-read images already measured')
+        parser.add_argument('--dry-run', action='store_true', help='Read and count, but do not write')
+
+    def handle(self, *args, **options):
+        models = [model for model in apps.get_models() if issubclass(model, ImageMetadataModel)]
+        if options['models']:
+            wanted = {label.lower() for label in options['models']}
+            unknown = wanted - {model._meta.label_lower for model in models}
+            if unknown:
+                raise CommandError(f"No image metadata models named: {', '.join(sorted(unknown))}")
+            models = [model for model in models if model._meta.label_lower in wanted]
+
+        purge_keys = set()
+        failed_total = 0
+        for model in models:
+            started = time.monotonic()
+            measured, failed = self.backfill_model(model, options)
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"{model._meta.label}: {measured} images measured, {failed} unreadable in {elapsed:.1f}s")
+            failed_total += failed
+            if measured:
+                prefix, collection, _ = SURROGATE_KEY_MODELS.get(model._meta.label, (None, None, None))
+                purge_keys.add(collection or prefix)
+
+        purge_keys.discard(None)
+        if purge_keys and purge_dispatcher.enabled and not options['dry_run']:
+            # Bulk updates skip the signals that purge the front-end cache
+            sent, failed = purge_dispatcher.purge(purge_keys)
+            if failed:
+                self.stdout.write(self.style.WARNING(f"⚠️ Could not purge: {' '.join(failed)}"))
+
+        if failed_total:
+            self.stdout.write(self.style.WARNING(f'⚠️ {failed_total} images could not be read (see the log)'))
+        verb = 'Would backfill' if options['dry_run'] else 'Backfilled'
+        self.stdout.write(self.style.SUCCESS(f'✅ {verb} image metadata of {len(models)} models'))
+
+    def backfill_model(self, model, options):
+        field = model.image_metadata_field
+        queryset = (
+            model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                         .order_by('pk').only('pk', field, *IMAGE_METADATA_FIELDS)
+        )
+        if not options['force']:
+            queryset = queryset.filter(image_width__isnull=True)
+
+        measured = failed = 0
+        last_pk = None
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+                chunk = list(chunk[:options['chunk_size']])
+                if not chunk:
+                    break
+                last_pk = chunk[-1].pk
+
+                # Mostly waiting on storage downloads, so threads overlap them
+                readable = list(pool.map(lambda obj: obj.update_image_metadata(), chunk))
+                updated = [obj for obj, ok in zip(chunk, readable) if ok]
+                if updated and not options['dry_run']:
+                    model.objects.bulk_update(updated, IMAGE_METADATA_FIELDS)
+                measured += len(updated)
+                failed += len(chunk) - len(updated)
+        return measured, failed
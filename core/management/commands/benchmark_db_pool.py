@@ -0,0 +1,97 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.dbpool import ConnectionPool
+
+
+class Command(BaseCommand):
+    help = 'Compare connection acquisition latency with and without the pool under concurrent load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=25, help='Acquisitions per thread')
+        parser.add_argument('--pool-size', type=int, default=8)
+        parser.add_argument('--hold-ms', type=float, default=2.0,
+                            help='How long each "request" keeps its connection')
+
+    def handle(self, *args, **options):
+        wrapper = connections[options['database']]
+        params = wrapper.get_connection_params()
+
+        def connect():
+            # The driver directly: a new connection with its full handshake
+            return wrapper.Database.connect(**params)
+
+        self.stdout.write(
+            f"{wrapper.vendor} ({wrapper.settings_dict['NAME']}), {options['threads']} threads "
+            f"x {options['requests']} requests, pool of {options['pool_size']}"
+        )
+
+        opened = []
+
+        def direct():
+            started = time.perf_counter()
+            conn = connect()
+            opened.append(1)
+            return conn, time.perf_counter() - started, conn.close
+
+        pool = ConnectionPool(
+            'benchmark', connect=connect, min_size=0, max_size=options['pool_size'],
+            timeout=60, max_idle=0, ping=self.ping,
+        )
+
+        def pooled():
+            started = time.perf_counter()
+            conn = pool.acquire()
+            return conn, time.perf_counter() - started, lambda: pool.release(conn)
+
+        results = {}
+        for label, acquire in (('new connection', direct), ('pooled', pooled)):
+            results[label] = self.run(acquire, options)
+        pool.close_all()
+
+        for label, latencies in results.items():
+            latencies.sort()
+            self.stdout.write(
+                f"{label:>15}: p50 {statistics.median(latencies) * 1000:.3f} ms, "
+                f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.3f} ms, "
+                f"max {latencies[-1] * 1000:.3f} ms"
+            )
+        self.stdout.write(f"Connections opened: {len(opened)} without the pool, {pool.stats['opened']} with it")
+
+        baseline = statistics.median(results['new connection'])
+        pooled_median = statistics.median(results['pooled'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Median acquisition {(baseline - pooled_median) * 1000:.3f} ms faster with the pool"
+        ))
+
+    def ping(self, conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    def run(self, acquire, options):
+        latencies = []
+        lock = threading.Lock()
+        hold = options['hold_ms'] / 1000
+
+        def worker(_):
+            for _ in range(options['requests']):
+                conn, waited, release = acquire()
+                self.ping(conn)
+                time.sleep(hold)
+                release()
+                with lock:
+                    latencies.append(waited)
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            list(executor.map(worker, range(options['threads'])))
+        return latencies
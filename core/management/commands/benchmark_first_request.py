@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter so nothing is warm except what the WSGI
+# module does on import
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from tilojnet.wsgi import application
+boot = (time.perf_counter() - started) * 1000
+from django.urls import reverse
+from core.warmup import default_host, wsgi_get
+timings = []
+for name in sys.argv[1].split(','):
+    started = time.perf_counter()
+    status = wsgi_get(application, reverse(name), default_host())
+    timings.append([name, status, (time.perf_counter() - started) * 1000])
+print(json.dumps({'boot': boot, 'requests': timings}))
+"""
+
+
+class Command(BaseCommand):
+    help = 'Measure boot time and first-request latency of a fresh worker, with and without warm-up'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Fresh processes per mode')
+        parser.add_argument(
+            '--url', dest='urls', action='append',
+            help='URL name to request; repeatable, default settings.WARMUP_URLS',
+        )
+
+    def probe(self, warm, urls):
+        env = {**os.environ, 'WARMUP_ON_BOOT': str(warm), 'WARMUP_SELF_REQUESTS': 'False'}
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE, ','.join(urls)],
+            env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or settings.WARMUP_URLS
+        results = {}
+        for label, warm in (('cold', False), ('warm', True)):
+            runs = [self.probe(warm, urls) for _ in range(options['runs'])]
+            boot = sum(run['boot'] for run in runs) / len(runs)
+            first = sum(run['requests'][0][2] for run in runs) / len(runs)
+            results[label] = first
+            self.stdout.write(f'{label}: boot {boot:.0f}ms, first request {first:.1f}ms')
+            for index, name in enumerate(urls):
+                avg = sum(run['requests'][index][2] for run in runs) / len(runs)
+                self.stdout.write(f'    {name:>16}: {avg:.1f}ms')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ First request {results['cold']:.1f}ms cold vs {results['warm']:.1f}ms after warm-up"
+        ))
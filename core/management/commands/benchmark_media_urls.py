@@ -0,0 +1,53 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.db.models.fields.files import ImageFieldFile
+from django.template import Context, Template
+
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Compare storage.url() with the memoized media URL resolver for a listing render'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=48, help='Images per render')
+        parser.add_argument('--renders', type=int, default=200)
+
+    def handle(self, *args, **options):
+        field = Project._meta.get_field('featured_image')
+        images = [
+            ImageFieldFile(None, field, f'projects/benchmark-{i}.jpg')
+            for i in range(options['images'])
+        ]
+        context = Context({'images': images})
+
+        # Gallery markup references each image twice (onclick + src)
+        templates = {
+            'storage.url()': Template(
+                '{% for img in images %}'
+                '<div onclick="show(\'{{ img.url }}\')"><img src="{{ img.url }}"></div>'
+                '{% endfor %}'
+            ),
+            'media_url': Template(
+                '{% load site_extras %}{% for img in images %}'
+                '<div onclick="show(\'{{ img|media_url }}\')"><img src="{{ img|media_url }}"></div>'
+                '{% endfor %}'
+            ),
+        }
+
+        outputs = {label: template.render(context) for label, template in templates.items()}
+        if len(set(outputs.values())) != 1:
+            self.stdout.write(self.style.WARNING('⚠️ Resolver output differs from storage.url()'))
+
+        timings = {}
+        for label, template in templates.items():
+            total = timeit.timeit(lambda: template.render(context), number=options['renders'])
+            timings[label] = total / options['renders'] * 1000
+            self.stdout.write(f"{label:>15}: {timings[label]:.3f} ms/render")
+
+        baseline, cached = timings['storage.url()'], timings['media_url']
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Saved {baseline - cached:.3f} ms per render "
+            f"({options['images'] * 2} URLs, {baseline / cached:.1f}x faster)"
+        ))
@@ -0,0 +1,78 @@
+import time
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+from core.defaults import seed_defaults
+from core.warmup import prime_caches
+
+
+class Command(BaseCommand):
+    help = 'Deploy in one boot: apply pending migrations, seed defaults, warm caches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--collectstatic', action='store_true', help='Also collect static files')
+        parser.add_argument('--skip-seed', action='store_true', help='Do not create default content')
+
+    @contextmanager
+    def step(self, name):
+        started = time.perf_counter()
+        yield
+        self.timings.append((name, time.perf_counter() - started))
+
+    def handle(self, *args, **options):
+        self.timings = []
+        started = time.perf_counter()
+        connection = connections[options['database']]
+
+        with self.step('migrations'):
+            self.migrate(connection, options)
+
+        if options['collectstatic']:
+            with self.step('collectstatic'):
+                call_command('collectstatic', interactive=False, verbosity=0)
+                self.stdout.write('✅ Static files collected')
+
+        if not options['skip_seed']:
+            with self.step('seed'):
+                created = seed_defaults()
+                summary = ', '.join(f'{count} {name}' for name, count in created.items() if count)
+                self.stdout.write(f"✅ Defaults {'created: ' + summary if summary else 'already present'}")
+
+        with self.step('caches'):
+            cache.delete_many(['site_settings', 'nav_categories'])
+            prime_caches()
+            self.stdout.write('✅ Caches primed')
+
+        total = time.perf_counter() - started
+        self.stdout.write('\nTiming:')
+        for name, seconds in self.timings:
+            self.stdout.write(f'  {name:<14} {seconds * 1000:>8.0f}ms')
+        self.stdout.write(self.style.SUCCESS(f'✅ Bootstrap finished in {total:.2f}s'))
+
+    def migrate(self, connection, options):
+        # Loading the executor reads django_migrations once
+        executor = MigrationExecutor(connection)
+        plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        needs_syncdb = [
+            app_label for app_label in executor.loader.unmigrated_apps
+            if any(apps.get_app_config(app_label).get_models())
+        ]
+
+        if not plan and not needs_syncdb:
+            self.stdout.write('✅ No pending migrations')
+            return
+
+        for migration, backwards in plan:
+            self.stdout.write(f"  {'unapply' if backwards else 'apply'} {migration.app_label}.{migration.name}")
+        call_command(
+            'migrate', database=options['database'], interactive=False,
+            run_syncdb=bool(needs_syncdb), verbosity=0,
+        )
+        self.stdout.write(f'✅ Applied {len(plan)} migrations')
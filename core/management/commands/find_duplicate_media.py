@@ -0,0 +1,234 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand
+from django.db import models
+
+from core.dedup import BKTree, describe
+from core.images import IMAGE_METADATA_FIELDS, ImageMetadataModel
+from core.models import EditorUpload, MediaAsset
+from core.purge import purge_dispatcher
+from core.surrogate import SURROGATE_KEY_MODELS, instance_keys
+
+
+class Command(BaseCommand):
+    help = 'Find exact and near-duplicate media files, and optionally merge them into one copy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--register', action='store_true',
+                            help='First hash the files models use that are not in the registry yet')
+        parser.add_argument('--workers', type=int, default=8, help='Files downloaded and hashed in parallel')
+        parser.add_argument('--distance', type=int, default=6,
+                            help='Largest perceptual hash difference (bits of 64) reported as a near duplicate')
+        parser.add_argument('--merge', action='store_true',
+                            help='Point rows using an exact duplicate at the first stored copy')
+        parser.add_argument('--merge-near', action='store_true',
+                            help='Also point rows using a near duplicate at the largest image of its group')
+        parser.add_argument('--delete-files', action='store_true',
+                            help='Delete merged exact copies no row uses any more from storage')
+        parser.add_argument('--confirm-near-delete', action='store_true',
+                            help='With --delete-files, also delete merged near duplicates: '
+                                 'different images, which cannot be restored')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change, but do not write')
+
+    def handle(self, *args, **options):
+        storage = storages['default']
+        references = self.collect_references(options['chunk_size'])
+
+        if options['register']:
+            self.register_missing(storage, references, options)
+
+        assets = list(MediaAsset.objects.order_by('pk').values('name', 'sha256', 'phash', 'size', 'width', 'height'))
+        exact = self.exact_groups(assets)
+        near = self.near_groups(exact, options['distance']) if options['distance'] else []
+
+        reclaimable = 0
+        for label, groups in (('Exact', exact.values()), ('Near', near)):
+            for group in groups:
+                if len(group) < 2:
+                    continue
+                keep, *copies = group
+                reclaimable += sum(asset['size'] or 0 for asset in copies)
+                self.stdout.write(f"{label}: {keep['name']} ({self.uses(references, keep)} uses)")
+                for asset in copies:
+                    self.stdout.write(f"    {asset['name']} ({self.uses(references, asset)} uses)")
+
+        duplicate_groups = sum(1 for group in exact.values() if len(group) > 1)
+        self.stdout.write(
+            f"{len(assets)} files: {duplicate_groups} exact duplicate groups, {len(near)} near-duplicate groups, "
+            f"{reclaimable / 1024 / 1024:.1f} MB in copies"
+        )
+
+        merges = {}
+        if options['merge'] or options['merge_near']:
+            for group in exact.values():
+                merges.update((asset['name'], (group[0]['name'], False)) for asset in group[1:])
+        if options['merge_near']:
+            for keep, *copies in near:
+                for copy in copies:
+                    # The copy may have exact duplicates of its own
+                    for asset in exact[copy['sha256']]:
+                        merges[asset['name']] = (keep['name'], True)
+        if not merges:
+            return
+
+        changed, purge_keys = self.merge(references, merges, options['dry_run'])
+        if purge_keys and purge_dispatcher.enabled and not options['dry_run']:
+            # Bulk updates skip the signals that purge the front-end cache
+            sent, failed = purge_dispatcher.purge(purge_keys)
+            if failed:
+                self.stdout.write(self.style.WARNING(f"⚠️ Could not purge: {' '.join(failed)}"))
+        if changed and not options['dry_run']:
+            from api.cache import bump_api_version
+            bump_api_version()
+
+        deleted = 0
+        if options['delete_files']:
+            deletable = merges
+            if not options['confirm_near_delete']:
+                deletable = {name: merge for name, merge in merges.items() if not merge[1]}
+                kept = len(merges) - len(deletable)
+                if kept:
+                    self.stdout.write(self.style.WARNING(
+                        f'⚠️ Kept {kept} near-duplicate files; add --confirm-near-delete to delete them'
+                    ))
+            deleted = self.delete_unused(storage, deletable, options['chunk_size'], options['dry_run'])
+
+        verb = 'Would merge' if options['dry_run'] else 'Merged'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {verb} {len(merges)} copies: {changed} rows repointed, {deleted} files deleted'
+        ))
+
+    # ============= REFERENCES =============
+
+    def file_fields(self):
+        for model in apps.get_models():
+            for field in model._meta.fields:
+                if isinstance(field, models.FileField):
+                    yield model, field.name
+
+    def collect_references(self, chunk_size):
+        """{storage name: [(model, field name), ...]} of every file a row uses"""
+        references = defaultdict(list)
+        for model, field in self.file_fields():
+            names = model.objects.exclude(**{field: ''}).values_list(field, flat=True).distinct()
+            for name in names.iterator(chunk_size=chunk_size):
+                references[name].append((model, field))
+        return references
+
+    def uses(self, references, asset):
+        return len(references.get(asset['name'], ()))
+
+    def register_missing(self, storage, references, options):
+        names = list(references)
+        missing = []
+        for start in range(0, len(names), options['chunk_size']):
+            chunk = names[start:start + options['chunk_size']]
+            known = set(MediaAsset.objects.filter(name__in=chunk).values_list('name', flat=True))
+            missing.extend(name for name in chunk if name not in known)
+
+        def read(name):
+            try:
+                with storage.open(name) as fh:
+                    return MediaAsset(name=name, **describe(name, fh))
+            except OSError as e:
+                self.stdout.write(self.style.WARNING(f'⚠️ Could not read {name}: {e}'))
+                return None
+
+        # Mostly waiting on storage downloads, so threads overlap them
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            read_assets = [asset for asset in pool.map(read, missing) if asset is not None]
+        if read_assets and not options['dry_run']:
+            MediaAsset.objects.bulk_create(read_assets, ignore_conflicts=True, batch_size=options['chunk_size'])
+        self.stdout.write(f"Registered {len(read_assets)} of {len(missing)} unregistered files")
+
+    # ============= GROUPING =============
+
+    def exact_groups(self, assets):
+        """{sha256: [asset, ...]}, first stored copy first"""
+        groups = defaultdict(list)
+        for asset in assets:
+            groups[asset['sha256']].append(asset)
+        return groups
+
+    def near_groups(self, exact, distance):
+        """
+        Groups of distinct files within ``distance`` bits of each other
+
+        Each group is led by its largest image, the one merged copies are
+        pointed at.
+        """
+        tree = BKTree()
+        for group in exact.values():
+            if group[0]['phash']:
+                tree.add(group[0]['phash'], group[0])
+
+        grouped = set()
+        groups = []
+        for group in exact.values():
+            asset = group[0]
+            if not asset['phash'] or asset['sha256'] in grouped:
+                continue
+            members = [match for _, match in tree.search(asset['phash'], distance) if match['sha256'] not in grouped]
+            if len(members) < 2:
+                continue
+            grouped.update(member['sha256'] for member in members)
+            members.sort(key=lambda member: ((member['width'] or 0) * (member['height'] or 0), member['size'] or 0),
+                         reverse=True)
+            groups.append(members)
+        return groups
+
+    # ============= MERGING =============
+
+    def merge(self, references, merges, dry_run):
+        """Point every row using a merged copy at the kept file"""
+        by_field = defaultdict(list)
+        for name, (keep, near) in merges.items():
+            for model, field in references.get(name, ()):
+                by_field[model, field].append(name)
+
+        changed = 0
+        purge_keys = set()
+        for (model, field), names in by_field.items():
+            rows = list(model.objects.filter(**{f'{field}__in': names}))
+            near_rows = False
+            for row in rows:
+                keep, near = merges[getattr(row, field).name]
+                setattr(row, field, keep)
+                if near and isinstance(row, ImageMetadataModel) and field == row.image_metadata_field:
+                    # A different image: cleared for backfill_image_metadata
+                    near_rows = True
+                    for name in IMAGE_METADATA_FIELDS:
+                        setattr(row, name, '' if name in ('image_color', 'image_placeholder') else None)
+                if model._meta.label in SURROGATE_KEY_MODELS:
+                    purge_keys |= instance_keys(row)
+            if rows and not dry_run:
+                fields = [field, *IMAGE_METADATA_FIELDS] if near_rows else [field]
+                model.objects.bulk_update(rows, fields)
+            changed += len(rows)
+            self.stdout.write(f"{model._meta.label}.{field}: {len(rows)} rows repointed")
+        return changed, purge_keys
+
+    def delete_unused(self, storage, merges, chunk_size, dry_run):
+        """Delete merged copies that no row and no rich text upload still uses"""
+        if dry_run:
+            # Nothing was repointed: what would be left is everything but the copies
+            still_used = set()
+        else:
+            still_used = set(self.collect_references(chunk_size))
+        names = [name for name in merges if name not in still_used]
+        editor = set(EditorUpload.objects.filter(name__in=names).values_list('name', flat=True))
+        editor |= set(EditorUpload.objects.filter(thumbnail__in=names).values_list('thumbnail', flat=True))
+
+        deleted = 0
+        for name in names:
+            if name in editor:
+                continue
+            if not dry_run:
+                storage.delete(name)
+                MediaAsset.objects.filter(name=name).delete()
+            deleted += 1
+        return deleted
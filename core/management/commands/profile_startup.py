@@ -0,0 +1,105 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+TARGETS = {
+    'setup': 'import django; django.setup()',
+    'wsgi': 'import tilojnet.wsgi',
+}
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(output):
+    """
+    Turn ``-X importtime`` output into a tree of
+    ``{'name', 'self', 'cumulative', 'children'}`` dicts (times in µs)
+
+    The interpreter prints each module after its children, indented two
+    spaces per nesting level.
+    """
+    pending = {}
+    for line in output.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        own, cumulative, indent, name = match.groups()
+        level = (len(indent) - 1) // 2
+        node = {
+            'name': name,
+            'self': int(own),
+            'cumulative': int(cumulative),
+            'children': pending.pop(level + 1, []),
+        }
+        pending.setdefault(level, []).append(node)
+    return pending.get(0, [])
+
+
+def iter_nodes(nodes):
+    for node in nodes:
+        yield node
+        yield from iter_nodes(node['children'])
+
+
+class Command(BaseCommand):
+    help = 'Report the import-time tree of a cold manage.py/WSGI boot, grouped per app'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=list(TARGETS), default='setup',
+                            help='setup: django.setup() as manage.py does; wsgi: import the WSGI module')
+        parser.add_argument('--threshold', type=float, default=5.0,
+                            help='Only show modules whose cumulative import took at least this many ms')
+        parser.add_argument('--depth', type=int, default=4, help='Tree depth to print')
+        parser.add_argument('--top', type=int, default=20, help='Packages to list in the summary')
+
+    def handle(self, *args, **options):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+            'WARMUP_ON_BOOT': 'False',
+        }
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', TARGETS[options['target']]],
+            env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+        wall = (time.perf_counter() - started) * 1000
+        roots = parse_importtime(result.stderr)
+
+        per_package = Counter()
+        for node in iter_nodes(roots):
+            per_package[node['name'].split('.')[0]] += node['self']
+        total = sum(per_package.values())
+        app_packages = {config.name.split('.')[0] for config in apps.get_app_configs()}
+
+        self.stdout.write(f"{options['target']}: {wall:.0f}ms wall, {total / 1000:.0f}ms importing\n")
+        self.stdout.write(f"{'package':<28} {'self ms':>9} {'share':>6}")
+        for package, own in per_package.most_common(options['top']):
+            marker = ' (app)' if package in app_packages else ''
+            self.stdout.write(f"{package + marker:<28} {own / 1000:>9.1f} {own / total:>6.0%}")
+
+        self.stdout.write(f"\nImport tree (cumulative ≥ {options['threshold']}ms):")
+        threshold = options['threshold'] * 1000
+
+        def show(nodes, depth):
+            for node in sorted(nodes, key=lambda n: n['cumulative'], reverse=True):
+                if node['cumulative'] < threshold:
+                    continue
+                self.stdout.write(
+                    f"{node['cumulative'] / 1000:>8.1f}ms {node['self'] / 1000:>7.1f}ms  {'  ' * depth}{node['name']}"
+                )
+                if depth + 1 < options['depth']:
+                    show(node['children'], depth + 1)
+
+        show(roots, 0)
+
+        heavy = [name for name in ('boto3', 'botocore') if any(n['name'] == name for n in iter_nodes(roots))]
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"\n⚠️ Boot imports {', '.join(heavy)}"))
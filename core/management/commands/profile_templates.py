@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.template import engines
+from django.urls import NoReverseMatch, reverse
+
+from core.template_profiler import profile_templates
+from core.warmup import default_host, iter_template_names, wsgi_get
+
+
+class Command(BaseCommand):
+    help = 'Break down where the render time of a page goes, per template, include and tag'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', nargs='?', default='home', help='URL name or path (default: home)')
+        parser.add_argument('--renders', type=int, default=20, help='Profiled requests after one warm-up request')
+        parser.add_argument('--limit', type=int, default=30, help='Rows in the report')
+        parser.add_argument('--compile', action='store_true', help='Also time compiling each project template')
+
+    def resolve(self, url):
+        if url.startswith('/'):
+            return url
+        try:
+            return reverse(url)
+        except NoReverseMatch:
+            raise CommandError(f'Unknown URL name "{url}"')
+
+    def handle(self, *args, **options):
+        path = self.resolve(options['url'])
+        application = get_wsgi_application()
+        host = default_host()
+
+        # First request fills the loader cache and app caches
+        status = wsgi_get(application, path, host)
+        if status != 200:
+            self.stdout.write(self.style.WARNING(f'⚠️ GET {path} returned {status}'))
+
+        with profile_templates() as profile:
+            for _ in range(options['renders']):
+                wsgi_get(application, path, host)
+
+        self.stdout.write(
+            f'GET {path}: {profile.total / options["renders"] * 1000:.2f}ms template time per render '
+            f'over {options["renders"]} renders (totals below are summed)\n'
+        )
+        self.stdout.write(profile.report(limit=options['limit']))
+
+        if options['compile']:
+            self.stdout.write('\nCompile cost per template (uncached):')
+            engine = engines['django']
+            costs = []
+            for name in iter_template_names(engine):
+                source, _ = self.load_source(engine.engine, name)
+                started = time.perf_counter()
+                engine.engine.from_string(source)
+                costs.append(((time.perf_counter() - started) * 1000, name))
+            for ms, name in sorted(costs, reverse=True)[:options['limit']]:
+                self.stdout.write(f'  {name:<48} {ms:>8.2f}ms')
+            self.stdout.write(f'  {"total":<48} {sum(ms for ms, _ in costs):>8.2f}ms')
+
+    def load_source(self, engine, name):
+        for loader in engine.template_loaders:
+            for origin in loader.get_template_sources(name):
+                try:
+                    return loader.get_contents(origin), origin
+                except Exception:
+                    continue
+        raise CommandError(f'Template {name} not found')
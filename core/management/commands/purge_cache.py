@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.purge import purge_dispatcher
+from core.surrogate import SURROGATE_KEY_MODELS
+
+
+class Command(BaseCommand):
+    help = 'Purge pages from the front-end cache by surrogate key'
+
+    def add_arguments(self, parser):
+        parser.add_argument('keys', nargs='*', help='Surrogate keys, e.g. project:42 or projects')
+        parser.add_argument('--all', action='store_true', help='Purge every collection key')
+
+    def handle(self, *args, **options):
+        if not purge_dispatcher.enabled:
+            raise CommandError('SURROGATE_PURGE_URL is not set')
+
+        keys = set(options['keys'])
+        if options['all']:
+            keys.update(
+                collection or prefix
+                for prefix, collection, _ in SURROGATE_KEY_MODELS.values()
+                if collection or prefix
+            )
+        if not keys:
+            raise CommandError('Give surrogate keys to purge or --all')
+
+        sent, failed = purge_dispatcher.purge(keys)
+        if failed:
+            raise CommandError(f'❌ Purged {sent} of {len(keys)} surrogate keys, failed: {" ".join(failed)}')
+        self.stdout.write(self.style.SUCCESS(f'✅ Purged {sent} surrogate keys: {" ".join(sorted(keys))}'))
@@ -0,0 +1,75 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from core.purge import purge_dispatcher
+from core.richtext import PrerenderedRichTextMixin
+from core.surrogate import SURROGATE_KEY_MODELS
+
+
+class Command(BaseCommand):
+    help = 'Render the stored HTML of every rich text field (backfill after changing the renderer)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models', metavar='APP.MODEL',
+                            help='Only this model; repeatable (default: all)')
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument('--dry-run', action='store_true', help='Render and count, but do not write')
+
+    def handle(self, *args, **options):
+        models = [model for model in apps.get_models() if issubclass(model, PrerenderedRichTextMixin)]
+        if options['models']:
+            wanted = {label.lower() for label in options['models']}
+            unknown = wanted - {model._meta.label_lower for model in models}
+            if unknown:
+                raise CommandError(f"No rich text models named: {', '.join(sorted(unknown))}")
+            models = [model for model in models if model._meta.label_lower in wanted]
+
+        purge_keys = set()
+        for model in models:
+            started = time.monotonic()
+            checked, changed = self.render_model(model, options['chunk_size'], options['dry_run'])
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"{model._meta.label}: {changed} of {checked} rows re-rendered in {elapsed:.1f}s"
+            )
+            if changed:
+                prefix, collection, _ = SURROGATE_KEY_MODELS.get(model._meta.label, (None, None, None))
+                purge_keys.add(collection or prefix)
+
+        purge_keys.discard(None)
+        if purge_keys and purge_dispatcher.enabled and not options['dry_run']:
+            # Bulk updates skip the signals that purge the front-end cache
+            sent, failed = purge_dispatcher.purge(purge_keys)
+            if failed:
+                self.stdout.write(self.style.WARNING(f"⚠️ Could not purge: {' '.join(failed)}"))
+
+        verb = 'Would re-render' if options['dry_run'] else 'Re-rendered'
+        self.stdout.write(self.style.SUCCESS(f'✅ {verb} rich text of {len(models)} models'))
+
+    def render_model(self, model, chunk_size, dry_run):
+        fields = list(model.rich_text_fields)
+        html_fields = [f'{field}_html' for field in fields]
+        queryset = model.objects.order_by('pk').only('pk', *fields, *html_fields)
+
+        checked = changed = 0
+        last_pk = None
+        while True:
+            chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            chunk = list(chunk[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+
+            updated = []
+            for obj in chunk:
+                before = [getattr(obj, name) for name in html_fields]
+                obj.render_rich_text()
+                if [getattr(obj, name) for name in html_fields] != before:
+                    updated.append(obj)
+            if updated and not dry_run:
+                model.objects.bulk_update(updated, html_fields)
+            checked += len(chunk)
+            changed += len(updated)
+        return checked, changed
@@ -0,0 +1,124 @@
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand
+
+from ckeditor_uploader.utils import is_valid_image_extension
+
+from core.models import EditorUpload
+from core.uploads import read_dimensions
+
+# PillowBackend thumbnails: '<name>_thumb<ext>', plus the token MediaStorage adds
+THUMBNAIL_RE = re.compile(r'^(?P<root>.*)_thumb(?:_[0-9a-f]{8})?(?P<ext>\.[^./]*)?$')
+
+
+class Command(BaseCommand):
+    help = 'Reconcile the CKEditor upload registry with the files in storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--prune', action='store_true',
+                            help='Also delete registry rows whose file is gone')
+        parser.add_argument('--dry-run', action='store_true', help='Count, but do not write')
+
+    def handle(self, *args, **options):
+        storage = storages['default']
+        chunk_size, dry_run = options['chunk_size'], options['dry_run']
+
+        # Names only: the listing itself is streamed, never held in memory
+        seen = set()
+        thumbnails = {}
+        created = 0
+        chunk = []
+        for name, size in self.list_files(storage, settings.CKEDITOR_UPLOAD_PATH):
+            if posixpath.basename(name).startswith('.'):
+                continue
+            match = THUMBNAIL_RE.match(name)
+            if match:
+                thumbnails[match['root'] + (match['ext'] or '')] = name
+                continue
+            seen.add(name)
+            chunk.append((name, size))
+            if len(chunk) >= chunk_size:
+                created += self.create_missing(storage, chunk, dry_run)
+                chunk = []
+        if chunk:
+            created += self.create_missing(storage, chunk, dry_run)
+
+        linked = self.link_thumbnails(thumbnails, chunk_size, dry_run)
+        pruned = self.prune(seen, chunk_size, dry_run) if options['prune'] else 0
+
+        verb = 'Would sync' if dry_run else 'Synced'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {verb} {len(seen)} files: {created} added, {linked} thumbnails linked, {pruned} pruned'
+        ))
+
+    def list_files(self, storage, prefix):
+        """Yield (name, size) of every file under ``prefix``"""
+        bucket = getattr(storage, 'bucket', None)
+        if bucket is not None:
+            # One paginated listing, sizes included, instead of listdir + HEAD per file
+            location = storage.location.strip('/')
+            key_prefix = posixpath.join(location, prefix) if location else prefix
+            for obj in bucket.objects.filter(Prefix=key_prefix):
+                yield (obj.key[len(location) + 1:] if location else obj.key), obj.size
+            return
+
+        directories = [prefix.rstrip('/')]
+        while directories:
+            path = directories.pop()
+            if not storage.exists(path):
+                continue
+            dir_names, file_names = storage.listdir(path)
+            directories.extend(posixpath.join(path, d) for d in dir_names if not d.startswith('.'))
+            for file_name in file_names:
+                name = posixpath.join(path, file_name)
+                yield name, storage.size(name)
+
+    def create_missing(self, storage, chunk, dry_run):
+        known = set(EditorUpload.objects.filter(
+            name__in=[name for name, _ in chunk]
+        ).values_list('name', flat=True))
+        missing = [(name, size) for name, size in chunk if name not in known]
+        if dry_run or not missing:
+            return len(missing)
+
+        uploads = []
+        for name, size in missing:
+            width = height = None
+            is_image = is_valid_image_extension(name)
+            if is_image:
+                try:
+                    with storage.open(name) as fh:
+                        width, height = read_dimensions(fh)
+                except OSError as e:
+                    self.stdout.write(self.style.WARNING(f'⚠️ Could not read {name}: {e}'))
+            uploads.append(EditorUpload(name=name, size=size, width=width, height=height, is_image=is_image))
+        EditorUpload.objects.bulk_create(uploads, ignore_conflicts=True)
+        return len(uploads)
+
+    def link_thumbnails(self, thumbnails, chunk_size, dry_run):
+        linked = 0
+        names = list(thumbnails)
+        for start in range(0, len(names), chunk_size):
+            uploads = list(EditorUpload.objects.filter(
+                name__in=names[start:start + chunk_size], thumbnail=''
+            ).only('pk', 'name', 'thumbnail'))
+            for upload in uploads:
+                upload.thumbnail = thumbnails[upload.name]
+            if uploads and not dry_run:
+                EditorUpload.objects.bulk_update(uploads, ['thumbnail'])
+            linked += len(uploads)
+        return linked
+
+    def prune(self, seen, chunk_size, dry_run):
+        registered = EditorUpload.objects.filter(
+            name__startswith=settings.CKEDITOR_UPLOAD_PATH
+        ).values_list('pk', 'name')
+        stale = [pk for pk, name in registered.iterator(chunk_size=chunk_size) if name not in seen]
+        if not dry_run:
+            for start in range(0, len(stale), chunk_size):
+                EditorUpload.objects.filter(pk__in=stale[start:start + chunk_size]).delete()
+        return len(stale)
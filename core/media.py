@@ -0,0 +1,59 @@
+from functools import lru_cache
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.utils.encoding import filepath_to_uri
+
+
+@lru_cache(maxsize=4096)
+def _public_url(base_url, name):
+    return f"{base_url}{filepath_to_uri(name)}"
+
+
+def media_url(image):
+    """
+    Return the public URL of an image field without calling storage.url().
+
+    With AWS_QUERYSTRING_AUTH=False the storage URL is just MEDIA_URL plus
+    the stored name, so it is built once per name and memoized per process.
+    Signed URLs (MEDIA_URL_PRECOMPUTE=False) still go through the backend.
+    """
+    if not image:
+        return ''
+    if not getattr(settings, 'MEDIA_URL_PRECOMPUTE', False):
+        return image.url
+    return _public_url(settings.MEDIA_URL, image.name)
+
+
+def name_url(name):
+    """``media_url`` for a bare storage name"""
+    if not name:
+        return ''
+    if not getattr(settings, 'MEDIA_URL_PRECOMPUTE', False):
+        from django.core.files.storage import default_storage
+        return default_storage.url(name)
+    return _public_url(settings.MEDIA_URL, name)
+
+
+def thumbnail_url(image, width, height=None, resize='cover'):
+    """
+    Build a resized derivative URL for an image field.
+
+    Uses the Supabase image transformation endpoint so thumbnails are
+    generated (and cached) by the storage provider instead of shipping
+    the full-size original. Falls back to the original URL when no
+    transformation endpoint is configured.
+    """
+    if not image:
+        return ''
+    if not getattr(settings, 'MEDIA_THUMBNAIL_URL', ''):
+        return image.url
+    return thumbnail_name_url(image.name, width, height, resize)
+
+
+def thumbnail_name_url(name, width, height=None, resize='cover'):
+    """``thumbnail_url`` for a storage name; requires MEDIA_THUMBNAIL_URL"""
+    params = {'width': width, 'resize': resize}
+    if height:
+        params['height'] = height
+    return f"{settings.MEDIA_THUMBNAIL_URL}{quote(name)}?{urlencode(params)}"
@@ -0,0 +1,338 @@
+"""
+Process metrics in the Prometheus text format.
+
+Counters and histograms are recorded into a per-thread shard, so the
+request path never takes a lock; a scrape merges the shards. Every value
+is the running total of this worker process.
+
+Gunicorn runs several workers, each with its own memory. When
+settings.METRICS_DIR is set, each worker writes its snapshot there at most
+every METRICS_FLUSH_SECONDS (atomically, one file per worker, named by pid
+plus a random id so a new worker that reuses a pid starts its own file)
+and ``/metrics`` sums the files of every worker. A scrape folds the
+counters of workers that have exited into ``base.json`` and removes their
+files, so totals stay monotonic however often workers are recycled;
+gauges only count live workers.
+"""
+import fcntl
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of each histogram; others use LATENCY_BUCKETS
+HISTOGRAM_BUCKETS = {
+    'db_pool_wait_seconds': (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+}
+
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP responses by URL name, method and status'),
+    'http_request_duration_seconds': ('histogram', 'Request latency by URL name'),
+    'http_response_bytes_total': ('counter', 'Response body bytes by URL name, before minify/compression and as sent'),
+    'db_queries_total': ('counter', 'Database queries by URL name'),
+    'site_cache_lookups_total': ('counter', 'site_extras cache lookups by cache and result'),
+    'media_uploads_total': ('counter', 'Media uploads by result'),
+    'media_upload_bytes_total': ('counter', 'Bytes uploaded to media storage'),
+    'media_upload_bytes_saved_total': ('counter', 'Bytes not uploaded because the same file was already stored'),
+    'media_deferred_uploads_pending': ('gauge', 'Staged media files waiting for the deferred upload worker'),
+    'ratelimit_rejections_total': ('counter', 'Rejected form POSTs by endpoint and reason'),
+    'db_pool_wait_seconds': ('histogram', 'Time to get a connection from the database pool, by alias'),
+    'db_pool_connections': ('gauge', 'Pooled database connections by alias and state'),
+    'db_pool_connections_opened_total': ('counter', 'Database connections opened by the pool, by alias'),
+    'db_pool_timeouts_total': ('counter', 'Pool acquisitions that timed out, by alias'),
+}
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        self._collectors = []
+        self._last_flush = 0.0
+        self._worker = None
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = defaultdict(float)
+            # Only taken once per thread
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name, labels=(), value=1):
+        self._shard()[(name, labels)] += value
+
+    def observe(self, name, labels, value):
+        shard = self._shard()
+        for bound in HISTOGRAM_BUCKETS.get(name, LATENCY_BUCKETS):
+            if value <= bound:
+                shard[(f'{name}_bucket', labels + (('le', str(bound)),))] += 1
+                break
+        else:
+            shard[(f'{name}_bucket', labels + (('le', '+Inf'),))] += 1
+        shard[(f'{name}_sum', labels)] += value
+        shard[(f'{name}_count', labels)] += 1
+
+    def register_collector(self, collector):
+        """``collector()`` returns (name, labels, value) tuples, evaluated at snapshot time"""
+        self._collectors.append(collector)
+        return collector
+
+    def snapshot(self):
+        """Merged totals of this process: {(name, labels): value}"""
+        merged = defaultdict(float)
+        for shard in list(self._shards):
+            for key, value in shard.copy().items():
+                merged[key] += value
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                merged[(name, labels)] += value
+        return merged
+
+    def reset(self):
+        for shard in list(self._shards):
+            shard.clear()
+
+    # ============= CROSS-WORKER AGGREGATION =============
+
+    def worker_id(self):
+        pid = os.getpid()
+        # Regenerated after a fork, so preloaded workers do not share a file
+        if self._worker is None or self._worker[0] != pid:
+            self._worker = (pid, f'{pid}-{uuid.uuid4().hex[:12]}')
+        return self._worker[1]
+
+    def worker_path(self):
+        return os.path.join(settings.METRICS_DIR, f'worker-{self.worker_id()}.json')
+
+    def flush(self, force=False):
+        """Write this worker's snapshot for the other workers to aggregate"""
+        if not settings.METRICS_DIR:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < settings.METRICS_FLUSH_SECONDS:
+            return
+        self._last_flush = now
+
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        payload = [[name, list(labels), value] for (name, labels), value in self.snapshot().items()]
+        _write_json(self.worker_path(), {'pid': os.getpid(), 'metrics': payload})
+
+    def collect(self):
+        """Totals across every worker that has flushed, plus this process live"""
+        totals = self.snapshot()
+        if not settings.METRICS_DIR or not os.path.isdir(settings.METRICS_DIR):
+            return totals
+
+        self.fold_exited_workers()
+        # Shared with other scrapes, exclusive of a fold, so no worker file is
+        # read both in base.json and on its own, or in neither
+        with self._base_lock(fcntl.LOCK_SH):
+            base = _read_json(os.path.join(settings.METRICS_DIR, 'base.json'))
+            if base:
+                _add_metrics(totals, base['metrics'])
+
+            own_path = self.worker_path()
+            for path in self._worker_files():
+                if path == own_path:
+                    continue
+                data = _read_json(path)
+                if data:
+                    # Exited since the fold: counters still count, gauges do not
+                    _add_metrics(totals, data['metrics'], gauges=_pid_alive(data['pid']))
+        return totals
+
+    def fold_exited_workers(self):
+        """Add the counters of exited workers to base.json and remove their files"""
+        exited = []
+        for path in self._worker_files():
+            data = _read_json(path)
+            if data and not _pid_alive(data['pid']):
+                exited.append(path)
+        if not exited:
+            return
+
+        # Several workers may be scraped at once; only one folds each file
+        with self._base_lock(fcntl.LOCK_EX):
+            base_path = os.path.join(settings.METRICS_DIR, 'base.json')
+            totals = defaultdict(float)
+            _add_metrics(totals, (_read_json(base_path) or {'metrics': []})['metrics'])
+            folded = []
+            for path in exited:
+                data = _read_json(path)
+                if data:
+                    _add_metrics(totals, data['metrics'], gauges=False)
+                    folded.append(path)
+            if not folded:
+                return
+            _write_json(base_path, {'metrics': [[name, list(labels), value] for (name, labels), value in totals.items()]})
+            for path in folded:
+                os.remove(path)
+
+    @contextmanager
+    def _base_lock(self, mode):
+        with open(os.path.join(settings.METRICS_DIR, 'base.lock'), 'a') as lock:
+            fcntl.flock(lock, mode)
+            yield
+
+    def _worker_files(self):
+        for file_name in os.listdir(settings.METRICS_DIR):
+            if file_name.startswith('worker-') and file_name.endswith('.json'):
+                yield os.path.join(settings.METRICS_DIR, file_name)
+
+
+def _read_json(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as fh:
+        json.dump(data, fh)
+    os.replace(tmp_path, path)
+
+
+def _add_metrics(totals, metrics, gauges=True):
+    for name, labels, value in metrics:
+        if not gauges and METRICS.get(name, ('counter',))[0] == 'gauge':
+            continue
+        totals[(name, tuple(tuple(label) for label in labels))] += value
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+registry = MetricsRegistry()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = (
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _base_name(name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+            return name[:-len(suffix)]
+    return name
+
+
+def render_prometheus(totals):
+    """Prometheus text exposition of collected totals"""
+    families = defaultdict(list)
+    for (name, labels), value in totals.items():
+        families[_base_name(name)].append((name, labels, value))
+
+    lines = []
+    for family in sorted(families):
+        kind, help_text = METRICS.get(family, ('untyped', ''))
+        lines.append(f'# HELP {family} {help_text}')
+        lines.append(f'# TYPE {family} {kind}')
+        samples = families[family]
+        if kind == 'histogram':
+            samples = _cumulative_buckets(samples, HISTOGRAM_BUCKETS.get(family, LATENCY_BUCKETS))
+        for name, labels, value in sorted(samples, key=_sample_order):
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def _sample_order(sample):
+    name, labels, _ = sample
+    le = dict(labels).get('le')
+    bound = float('inf') if le == '+Inf' else float(le) if le else 0.0
+    return (name, tuple(item for item in labels if item[0] != 'le'), bound)
+
+
+def _cumulative_buckets(samples, bounds):
+    """
+    Buckets are recorded per range; Prometheus wants them cumulative, ending at +Inf
+
+    Every series gets each of ``bounds``, plus any other bound a worker
+    recorded (e.g. one still running with older buckets), so no
+    observation is left out of the running total.
+    """
+    buckets = defaultdict(dict)
+    others = []
+    for name, labels, value in samples:
+        if name.endswith('_bucket'):
+            series = tuple(item for item in labels if item[0] != 'le')
+            buckets[(name, series)][dict(labels)['le']] = value
+        else:
+            others.append((name, labels, value))
+
+    for (name, series), counts in buckets.items():
+        finite = {str(b) for b in bounds} | (counts.keys() - {'+Inf'})
+        running = 0
+        for bound in sorted(finite, key=float) + ['+Inf']:
+            running += counts.get(bound, 0)
+            others.append((name, series + (('le', bound),), running))
+    return others
+
+
+# ============= BUILT-IN COLLECTORS =============
+
+@registry.register_collector
+def media_upload_metrics():
+    from .storage import deferred_uploads, upload_metrics
+    stats = upload_metrics.snapshot()
+    return [
+        ('media_uploads_total', (('result', 'ok'),), stats['uploads']),
+        ('media_uploads_total', (('result', 'failed'),), stats['failures']),
+        ('media_uploads_total', (('result', 'deduplicated'),), stats['deduplicated']),
+        ('media_upload_bytes_total', (), stats['bytes']),
+        ('media_upload_bytes_saved_total', (), stats['bytes_saved']),
+        ('media_deferred_uploads_pending', (), deferred_uploads.pending()),
+    ]
+
+
+@registry.register_collector
+def ratelimit_metrics():
+    from contact.ratelimit import rejections
+    return [
+        ('ratelimit_rejections_total', (('endpoint', policy), ('reason', reason)), count)
+        for (policy, reason), count in rejections.snapshot().items()
+    ]
+
+
+@registry.register_collector
+def db_pool_metrics():
+    from .dbpool import pools
+    # An alias can have several pools (one per set of connection parameters)
+    totals = defaultdict(float)
+    for pool in pools():
+        labels = (('alias', pool.name),)
+        totals[('db_pool_connections', labels + (('state', 'idle'),))] += pool.idle
+        totals[('db_pool_connections', labels + (('state', 'in_use'),))] += pool.size - pool.idle
+        totals[('db_pool_connections_opened_total', labels)] += pool.stats['opened']
+        totals[('db_pool_timeouts_total', labels)] += pool.stats['timeouts']
+    return [(name, labels, value) for (name, labels), value in totals.items()]
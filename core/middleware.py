@@ -0,0 +1,323 @@
+import logging
+import time
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.crypto import constant_time_compare
+
+from . import hints, surrogate
+from .compression import (
+    compress_async_stream, compress_bytes, compress_stream, is_compressible,
+    minify_html, negotiate_encoding,
+)
+from .metrics import registry, render_prometheus
+from .template_profiler import profile_templates
+
+logger = logging.getLogger(__name__)
+
+
+class AnonymousFastPathMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware that leaves the session alone for visitors
+
+    Without a session cookie nobody can be logged in, so ``request.user``
+    is AnonymousUser straight away. The stock lazy user still reads the
+    session to find that out, which marks it accessed and makes
+    SessionMiddleware add ``Vary: Cookie``, keeping the page out of the
+    front-end cache.
+    """
+
+    def process_request(self, request):
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return super().process_request(request)
+        request.user = AnonymousUser()
+
+        async def auser():
+            return request.user
+
+        request.auser = auser
+
+
+class TemplateProfilerMiddleware:
+    """
+    Profile template rendering for one request on demand
+
+    With settings.TEMPLATE_PROFILER enabled, a staff user adding
+    ``?profile_templates`` to a URL gets the per-template, per-include and
+    per-tag breakdown logged and the top entries in a Server-Timing header
+    (visible in the browser dev tools).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def should_profile(self, request):
+        if not getattr(settings, 'TEMPLATE_PROFILER', False) or 'profile_templates' not in request.GET:
+            return False
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_staff)
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        with profile_templates() as profile:
+            response = self.get_response(request)
+
+        logger.info(f"Template profile for {request.path}\n{profile.report()}")
+        response['Server-Timing'] = profile.server_timing()
+        return response
+
+
+class HealthCheckMiddleware:
+    """
+    Answer /healthz, /readyz and /metrics before the rest of the stack
+
+    Sits first in MIDDLEWARE so probes skip the SSL redirect, host
+    validation, sessions and URL resolution:
+
+    * /healthz: the process is up, touches nothing
+    * /readyz: one ``SELECT 1`` and a cache round-trip
+    * /metrics: Prometheus text, aggregated across workers; requires
+      ``Authorization: Bearer <METRICS_TOKEN>``, and is only open without
+      a token under DEBUG (otherwise it is a 404)
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.routes = {
+            '/healthz': self.healthz,
+            '/readyz': self.readyz,
+            '/metrics': self.metrics,
+        }
+
+    def __call__(self, request):
+        handler = self.routes.get(request.path_info.rstrip('/'))
+        if handler is None or request.method not in ('GET', 'HEAD'):
+            return self.get_response(request)
+        response = handler(request)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def healthz(self, request):
+        return HttpResponse('ok', content_type='text/plain')
+
+    def readyz(self, request):
+        checks = {}
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            checks['database'] = 'ok'
+        except Exception as e:
+            logger.warning(f"Readiness check: database unavailable: {e}")
+            checks['database'] = 'error'
+
+        try:
+            cache.set('readyz', 1, 10)
+            checks['cache'] = 'ok' if cache.get('readyz') == 1 else 'error'
+        except Exception as e:
+            logger.warning(f"Readiness check: cache unavailable: {e}")
+            checks['cache'] = 'error'
+
+        ready = all(status == 'ok' for status in checks.values())
+        return JsonResponse({'status': 'ok' if ready else 'error', 'checks': checks}, status=200 if ready else 503)
+
+    def metrics(self, request):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        if not token and not settings.DEBUG:
+            # Route and view names are not for the public
+            return HttpResponse('Not Found', status=404, content_type='text/plain')
+        if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+        registry.flush(force=True)
+        return HttpResponse(
+            render_prometheus(registry.collect()),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
+
+
+class RequestMetricsMiddleware:
+    """Count requests, latency and database queries per URL name"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_query):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unresolved'
+        registry.inc('http_requests_total', (('view', view), ('method', request.method), ('status', str(response.status_code))))
+        registry.observe('http_request_duration_seconds', (('view', view),), elapsed)
+        if queries[0]:
+            registry.inc('db_queries_total', (('view', view),), queries[0])
+        registry.flush()
+        return response
+
+
+class SurrogateKeyMiddleware:
+    """
+    Mark anonymous, cookie-free GET responses cacheable by the front-end cache
+
+    Adds ``Cache-Control: public, max-age=0, s-maxage=..., stale-while-revalidate=...``
+    and a ``Surrogate-Key`` header listing what the page rendered. Must
+    sit above SessionMiddleware and CsrfViewMiddleware so cookies they set
+    are seen here and the response is left uncached.
+    """
+
+    PRIVATE_DIRECTIVES = ('private', 'no-cache', 'no-store')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return self.get_response(request)
+
+        keys = surrogate.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            surrogate.end()
+
+        if self.cacheable(request, response):
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=0,
+                s_maxage=settings.SURROGATE_CACHE_SECONDS,
+                stale_while_revalidate=settings.SURROGATE_STALE_SECONDS,
+            )
+            if keys:
+                response['Surrogate-Key'] = ' '.join(sorted(keys))
+        return response
+
+    def cacheable(self, request, response):
+        if response.status_code != 200 or response.cookies or response.streaming:
+            return False
+        if any(name in request.COOKIES for name in settings.SURROGATE_BYPASS_COOKIES):
+            return False
+        cache_control = response.get('Cache-Control', '')
+        return not any(directive in cache_control for directive in self.PRIVATE_DIRECTIVES)
+
+
+class PreloadMiddleware:
+    """
+    Send the critical resources of HTML pages as a ``Link`` header
+
+    settings.CRITICAL_RESOURCES apply to every page, followed by whatever
+    the view declared with ``core.hints.preload``. Admin and CKEditor pages
+    don't use the site's fonts and are skipped. See core/hints.py.
+    """
+
+    excluded_prefixes = ('/admin/', '/ckeditor/')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.site_links = hints.site_links(settings.CRITICAL_RESOURCES)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            request.method not in ('GET', 'HEAD')
+            or response.status_code != 200
+            or not response.get('Content-Type', '').startswith('text/html')
+            or request.path_info.startswith(self.excluded_prefixes)
+        ):
+            return response
+
+        links = self.site_links + getattr(request, 'preload_links', [])
+        if response.has_header('Link'):
+            links = [response['Link']] + links
+        if links:
+            response['Link'] = ', '.join(links)
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Minify rendered HTML and compress text responses with Brotli or gzip
+
+    Replaces django.middleware.gzip.GZipMiddleware. Responses that already
+    have a Content-Encoding (WhiteNoise's precompressed static files) are
+    left alone, as are bodies under settings.COMPRESSION_MIN_BYTES.
+    Bytes before and after are counted per URL name.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method == 'HEAD' or response.has_header('Content-Encoding'):
+            return response
+        if not is_compressible(response.get('Content-Type', '')):
+            return response
+
+        view = self.view_name(request)
+        if not response.streaming and settings.HTML_MINIFY and response['Content-Type'].startswith('text/html'):
+            original = len(response.content)
+            response.content = minify_html(response.content.decode(response.charset)).encode(response.charset)
+            if response.has_header('Content-Length'):
+                # Set by CommonMiddleware for the unminified body
+                response.headers['Content-Length'] = str(len(response.content))
+        else:
+            original = None if response.streaming else len(response.content)
+
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_BYTES:
+            self.record(view, original, len(response.content))
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            if not response.streaming:
+                self.record(view, original, len(response.content))
+            return response
+
+        if response.streaming:
+            counter = partial(self.record, view)
+            if response.is_async:
+                response.streaming_content = compress_async_stream(response.streaming_content, encoding, counter)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, encoding, counter)
+            # Unknown until the stream has been sent
+            del response.headers['Content-Length']
+        else:
+            compressed = compress_bytes(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                self.record(view, original, len(response.content))
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+            self.record(view, original, len(compressed))
+
+        # A strong ETag names the identity body; the encoded one only matches weakly
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def view_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        return (match.view_name if match else None) or 'unresolved'
+
+    def record(self, view, original, sent):
+        registry.inc('http_response_bytes_total', (('view', view), ('stage', 'original')), original)
+        registry.inc('http_response_bytes_total', (('view', view), ('stage', 'sent')), sent)
@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-19 13:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_sitesettings_about_full_html'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EditorUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Storage name', max_length=255, unique=True)),
+                ('size', models.BigIntegerField(blank=True, null=True)),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('is_image', models.BooleanField(default=False)),
+                ('thumbnail', models.CharField(blank=True, help_text='Storage name of the 75px thumbnail', max_length=255)),
+                ('uploaded_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('uploaded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-uploaded_at', '-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def render_html(apps, schema_editor):
+    # Templates output only the sanitized copy, so rows saved before it existed need one
+    from core.richtext import render_stored_rich_text
+    render_stored_rich_text(apps.get_model('core', 'SiteSettings'), ('about_full',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_mediaasset'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_html, migrations.RunPython.noop),
+    ]
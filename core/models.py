@@ -1,9 +1,15 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 from ckeditor.fields import RichTextField
 
+from .images import ImageMetadataModel
+from .media import media_url, name_url
+from .richtext import PrerenderedRichTextMixin
 
-class SiteSettings(models.Model):
+
+class SiteSettings(PrerenderedRichTextMixin, models.Model):
     site_name = models.CharField(max_length=100, default="Tilojnet Exclusive")
     tagline = models.CharField(max_length=200)
     logo = models.ImageField(upload_to='site/')
@@ -18,9 +24,12 @@ class SiteSettings(models.Model):
     whatsapp_number = models.CharField(max_length=20)
     about_short = models.TextField()
     about_full = RichTextField()
+    about_full_html = models.TextField(blank=True, editable=False)
     mission = models.TextField(blank=True)
     vision = models.TextField(blank=True)
     meta_description = models.TextField()
+
+    rich_text_fields = ('about_full',)
     
     class Meta:
         verbose_name = "Site Settings"
@@ -30,7 +39,7 @@ class SiteSettings(models.Model):
         return self.site_name
 
 
-class HeroSlide(models.Model):
+class HeroSlide(ImageMetadataModel):
     title = models.CharField(max_length=200)
     subtitle = models.CharField(max_length=300)
     image = models.ImageField(upload_to='hero/')
@@ -42,6 +51,10 @@ class HeroSlide(models.Model):
     class Meta:
         ordering = ['order']
     
+    @property
+    def image_url(self):
+        return media_url(self.image)
+
     def __str__(self):
         return self.title
 
@@ -59,6 +72,10 @@ class Testimonial(models.Model):
     class Meta:
         ordering = ['-created_at']
     
+    @property
+    def client_image_url(self):
+        return media_url(self.client_image)
+
     def __str__(self):
         return f"{self.client_name} - {self.rating} stars"
 
@@ -79,5 +96,59 @@ class TeamMember(models.Model):
     class Meta:
         ordering = ['order']
     
+    @property
+    def image_url(self):
+        return media_url(self.image)
+
+    def __str__(self):
+        return self.name
+
+
+class EditorUpload(models.Model):
+    """A file uploaded through CKEditor, so the browse dialog never lists the bucket"""
+    name = models.CharField(max_length=255, unique=True, help_text="Storage name")
+    size = models.BigIntegerField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    is_image = models.BooleanField(default=False)
+    thumbnail = models.CharField(max_length=255, blank=True, help_text="Storage name of the 75px thumbnail")
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+'
+    )
+    uploaded_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-uploaded_at', '-id']
+
+    @property
+    def url(self):
+        return name_url(self.name)
+
+    @property
+    def thumbnail_url(self):
+        return name_url(self.thumbnail) if self.thumbnail else self.url
+
+    @property
+    def filename(self):
+        return self.name.rsplit('/', 1)[-1]
+
+    def __str__(self):
+        return self.name
+
+
+class MediaAsset(models.Model):
+    """A stored media file by content, so identical uploads share one object (core.dedup)"""
+    name = models.CharField(max_length=255, unique=True, help_text="Storage name")
+    sha256 = models.CharField(max_length=64, db_index=True)
+    phash = models.CharField(max_length=16, blank=True, help_text="64-bit difference hash of images, hex")
+    size = models.BigIntegerField(null=True, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
@@ -0,0 +1,124 @@
+"""
+Batched surrogate-key purges.
+
+Model changes queue their keys (see ``core.surrogate.instance_keys``) once
+the transaction commits. A background thread waits SURROGATE_PURGE_DELAY
+seconds for more keys to arrive, then POSTs them to SURROGATE_PURGE_URL in
+batches of at most SURROGATE_PURGE_BATCH keys: space separated in a
+``Surrogate-Key`` header (the Fastly convention) and as a JSON body
+``{"keys": [...]}`` for anything else. SURROGATE_PURGE_HEADERS carries
+the credentials.
+
+With no SURROGATE_PURGE_URL configured nothing is queued.
+"""
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.db import transaction
+
+from .surrogate import instance_keys
+
+logger = logging.getLogger(__name__)
+
+
+class PurgeDispatcher:
+
+    def __init__(self):
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return bool(getattr(settings, 'SURROGATE_PURGE_URL', ''))
+
+    def queue(self, keys):
+        """Schedule keys for purging; they are sent by the background thread"""
+        if not keys or not self.enabled:
+            return
+        with self._lock:
+            self._pending.update(keys)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='surrogate-purge', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def pending(self):
+        with self._lock:
+            return set(self._pending)
+
+    def flush(self):
+        """Send everything queued now; returns the number of keys purged"""
+        with self._lock:
+            keys = sorted(self._pending)
+            self._pending.clear()
+        sent, failed = self.purge(keys)
+        if failed:
+            # Keep them for the next flush rather than serve stale pages
+            with self._lock:
+                self._pending.update(failed)
+        return sent
+
+    def purge(self, keys):
+        """
+        Purge keys right away, in batches
+
+        Returns:
+            Tuple of (keys purged, list of keys that failed)
+        """
+        keys = sorted(keys)
+        sent, failed = 0, []
+        batch_size = settings.SURROGATE_PURGE_BATCH
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            if self.send(batch):
+                sent += len(batch)
+            else:
+                failed.extend(batch)
+        return sent, failed
+
+    def send(self, keys, retries=3):
+        body = json.dumps({'keys': keys}).encode()
+        headers = {
+            'Content-Type': 'application/json',
+            'Surrogate-Key': ' '.join(keys),
+            **getattr(settings, 'SURROGATE_PURGE_HEADERS', {}),
+        }
+        for attempt in range(retries):
+            request = urllib.request.Request(settings.SURROGATE_PURGE_URL, data=body, headers=headers, method='POST')
+            try:
+                with urllib.request.urlopen(request, timeout=settings.SURROGATE_PURGE_TIMEOUT) as response:
+                    logger.info(f"Purged {len(keys)} surrogate keys ({response.status})")
+                    return True
+            except (urllib.error.URLError, OSError) as e:
+                logger.warning(f"Surrogate purge attempt {attempt + 1} failed: {e}")
+                time.sleep(0.5 * 2 ** attempt)
+        return False
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # Let a burst of changes (an admin save with inlines, an import) coalesce
+            time.sleep(settings.SURROGATE_PURGE_DELAY)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Surrogate purge failed: {e}")
+
+
+purge_dispatcher = PurgeDispatcher()
+
+
+def purge_instance(sender, instance, **kwargs):
+    """post_save/post_delete receiver"""
+    if not purge_dispatcher.enabled:
+        return
+    keys = instance_keys(instance)
+    transaction.on_commit(lambda: purge_dispatcher.queue(keys))
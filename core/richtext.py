@@ -0,0 +1,299 @@
+"""
+Save-time rendering of CKEditor rich text.
+
+Rich text is stored as CKEditor produced it. ``render_rich_text`` turns it
+into the HTML the templates output, once per save instead of per request:
+
+* Only allow-listed tags, attributes and inline styles are kept.
+  ``<script>``, ``<style>``, ``<iframe>`` and friends are dropped with
+  their content, and event handlers and ``javascript:`` URLs are removed.
+* Every ``<img>`` gets ``loading="lazy"``, ``decoding="async"`` and its
+  width and height (from the tag, its inline style or the stored file),
+  so the page does not reflow as images arrive.
+* Images stored in media storage (CKEditor uploads) are served through the
+  resize endpoint (MEDIA_THUMBNAIL_URL) at most RICH_TEXT_IMAGE_MAX_WIDTH
+  wide, with a ``srcset`` of smaller derivatives.
+
+Models list their rich text fields in ``rich_text_fields`` and inherit
+``PrerenderedRichTextMixin``; the result is stored in ``<field>_html``.
+The ``render_rich_text`` command backfills existing rows.
+"""
+import logging
+import re
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+
+from .media import thumbnail_name_url
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'caption', 'cite', 'code', 'div',
+    'em', 'figcaption', 'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr',
+    'i', 'img', 'li', 'ol', 'p', 'pre', 's', 'small', 'span', 'strong',
+    'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'u',
+    'ul',
+}
+# Dropped together with everything inside them
+DROPPED_TAGS = {'script', 'style', 'iframe', 'object', 'noscript', 'template', 'svg', 'math', 'form'}
+VOID_TAGS = {'br', 'hr', 'img'}
+
+ALLOWED_ATTRIBUTES = {
+    '*': {'class', 'style', 'title'},
+    'a': {'href', 'target', 'rel'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'ol': {'start'},
+}
+ALLOWED_STYLES = {
+    'text-align', 'float', 'width', 'height', 'margin', 'margin-left',
+    'margin-right', 'margin-top', 'margin-bottom', 'padding', 'border',
+    'border-width', 'border-style', 'border-color', 'color',
+    'background-color', 'font-weight', 'font-style', 'text-decoration',
+    'vertical-align',
+}
+ALLOWED_SCHEMES = {'http', 'https', 'mailto', 'tel'}
+
+UNSAFE_STYLE_RE = re.compile(r'url\s*\(|expression|javascript:|[\\<>]|/\*', re.IGNORECASE)
+PIXELS_RE = re.compile(r'^\s*(\d+)(?:px)?\s*$')
+IMAGE_SIZE_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def safe_url(value):
+    """The URL if it is relative or uses an allowed scheme, else None"""
+    cleaned = re.sub(r'[\x00-\x20]', '', value)
+    scheme, colon, _ = cleaned.partition(':')
+    if colon and not re.search(r'[/?#]', scheme):
+        return value.strip() if scheme.lower() in ALLOWED_SCHEMES else None
+    return value.strip()
+
+
+def clean_style(value):
+    declarations = []
+    for declaration in value.split(';'):
+        prop, colon, val = declaration.partition(':')
+        prop, val = prop.strip().lower(), val.strip()
+        if colon and prop in ALLOWED_STYLES and val and not UNSAFE_STYLE_RE.search(val):
+            declarations.append(f'{prop}: {val}')
+    return '; '.join(declarations)
+
+
+def media_name(src):
+    """Storage name of an image URL served from media storage, or None"""
+    for prefix in {settings.MEDIA_URL, '/media/'}:
+        if prefix and src.startswith(prefix):
+            return unquote(src[len(prefix):].split('?', 1)[0])
+    return None
+
+
+def image_size(name):
+    """
+    Natural (width, height) of a stored image, cached by name
+
+    Stored names are never overwritten (AWS_S3_FILE_OVERWRITE=False), so
+    the size of a name never changes. Returns None if it can't be read.
+    """
+    key = f'rich_text_image_size:{name}'
+    size = cache.get(key)
+    if size is None:
+        from PIL import Image
+        try:
+            with default_storage.open(name) as fh, Image.open(fh) as image:
+                size = image.size
+        except Exception as e:
+            logger.warning(f"Could not read the size of {name}: {e}")
+            return None
+        cache.set(key, size, IMAGE_SIZE_TIMEOUT)
+    return tuple(size)
+
+
+def _pixels(value):
+    match = PIXELS_RE.match(value or '')
+    return int(match.group(1)) if match else None
+
+
+def process_image(attrs):
+    """Lazy-load, size and downsize one ``<img>``; returns the new attributes"""
+    src = attrs['src']
+    styles = dict(
+        (part.split(':', 1)[0].strip(), part.split(':', 1)[1].strip())
+        for part in attrs.get('style', '').split(';') if ':' in part
+    )
+    width = _pixels(attrs.get('width')) or _pixels(styles.get('width'))
+    height = _pixels(attrs.get('height')) or _pixels(styles.get('height'))
+
+    name = media_name(src)
+    if name:
+        natural = image_size(name)
+        if natural:
+            natural_width, natural_height = natural
+            if not width and not height:
+                width, height = natural_width, natural_height
+            elif not height:
+                height = round(width * natural_height / natural_width)
+            elif not width:
+                width = round(height * natural_width / natural_height)
+
+            if getattr(settings, 'MEDIA_THUMBNAIL_URL', ''):
+                display_width = min(width, natural_width)
+                target = min(settings.RICH_TEXT_IMAGE_MAX_WIDTH, natural_width)
+                # Twice the displayed width covers high-density screens
+                target = min(target, display_width * 2)
+                attrs['src'] = thumbnail_name_url(name, target, resize='contain')
+                candidates = [w for w in settings.RICH_TEXT_IMAGE_WIDTHS if w < target]
+                attrs['srcset'] = ', '.join(
+                    [f'{thumbnail_name_url(name, w, resize="contain")} {w}w' for w in candidates]
+                    + [f"{attrs['src']} {target}w"]
+                )
+                attrs['sizes'] = f'(max-width: {display_width}px) 100vw, {display_width}px'
+
+    if width and height:
+        attrs['width'], attrs['height'] = str(width), str(height)
+    attrs['loading'] = 'lazy'
+    attrs['decoding'] = 'async'
+    return attrs
+
+
+class RichTextSanitizer(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.output = []
+        self.open_tags = []
+        self.dropping = None
+        self.drop_depth = 0
+
+    def clean_attributes(self, tag, attrs):
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+        cleaned = {}
+        for name, value in attrs:
+            name = name.lower()
+            if name not in allowed or value is None:
+                continue
+            if name in ('href', 'src'):
+                value = safe_url(value)
+            elif name == 'style':
+                value = clean_style(value)
+            if value:
+                cleaned[name] = value
+        if tag == 'a' and cleaned.get('target') == '_blank':
+            cleaned['rel'] = 'noopener noreferrer'
+        return cleaned
+
+    def handle_starttag(self, tag, attrs):
+        if self.dropping:
+            if tag == self.dropping:
+                self.drop_depth += 1
+            return
+        if tag in DROPPED_TAGS:
+            self.dropping, self.drop_depth = tag, 1
+            return
+        if tag not in ALLOWED_TAGS:
+            return
+
+        attrs = self.clean_attributes(tag, attrs)
+        if tag == 'img':
+            if not attrs.get('src'):
+                return
+            attrs = process_image(attrs)
+        rendered = ''.join(f' {name}="{escape(value)}"' for name, value in attrs.items())
+        self.output.append(f'<{tag}{rendered}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if self.dropping or tag in DROPPED_TAGS:
+            # Self-closed, so there is no content to drop and no end tag to wait for
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.dropping:
+            if tag == self.dropping:
+                self.drop_depth -= 1
+                if not self.drop_depth:
+                    self.dropping = None
+            return
+        if tag not in self.open_tags:
+            return
+        # Close anything left open inside it
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.output.append(f'</{open_tag}>')
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.output.append(escape(data, quote=False))
+
+    def handle_entityref(self, name):
+        if not self.dropping:
+            self.output.append(f'&{name};')
+
+    def handle_charref(self, name):
+        if not self.dropping:
+            self.output.append(f'&#{name};')
+
+    def render(self, html):
+        self.feed(html)
+        self.close()
+        while self.open_tags:
+            self.output.append(f'</{self.open_tags.pop()}>')
+        return ''.join(self.output).strip()
+
+
+def render_rich_text(html):
+    """Sanitized HTML with lazy, sized and downsized images"""
+    if not html or not html.strip():
+        return ''
+    return RichTextSanitizer().render(html)
+
+
+def render_stored_rich_text(model, fields, chunk_size=200):
+    """
+    Fill ``<field>_html`` of every row of ``model``
+
+    For data migrations, which get historical models without the mixin.
+    """
+    html_fields = [f'{field}_html' for field in fields]
+    queryset = model.objects.order_by('pk').only('pk', *fields, *html_fields)
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        for obj in chunk:
+            for field in fields:
+                setattr(obj, f'{field}_html', render_rich_text(getattr(obj, field)))
+        model.objects.bulk_update(chunk, html_fields)
+
+
+class PrerenderedRichTextMixin:
+    """Keep ``<field>_html`` in step with each field in ``rich_text_fields``"""
+
+    rich_text_fields = ()
+
+    def render_rich_text(self, fields=None):
+        for field in self.rich_text_fields if fields is None else fields:
+            setattr(self, f'{field}_html', render_rich_text(getattr(self, field)))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.render_rich_text()
+        else:
+            fields = [field for field in self.rich_text_fields if field in update_fields]
+            self.render_rich_text(fields)
+            kwargs['update_fields'] = {*update_fields, *(f'{field}_html' for field in fields)}
+        super().save(*args, **kwargs)
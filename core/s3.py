@@ -0,0 +1,60 @@
+"""
+Supabase S3 media backend.
+
+Kept apart from ``core.storage`` because importing it pulls in boto3 and
+botocore, the slowest imports of the project; it is only loaded when the
+default storage is first used.
+"""
+import threading
+
+from botocore.config import Config
+from django.conf import settings
+from storages.backends.s3boto3 import S3Boto3Storage
+
+from .storage import MediaStorageMixin
+
+# boto3 clients are thread-safe, resources are not: one resource (and its
+# client's connection pool) per process, and per thread a new instance of
+# its class around the same client, which builds no session or client
+_shared_resources = {}
+_shared_resources_lock = threading.Lock()
+_thread_resources = threading.local()
+
+
+class MediaStorage(MediaStorageMixin, S3Boto3Storage):
+    """Supabase S3 storage with a pooled, retrying, process-wide client."""
+
+    @property
+    def connection(self):
+        key = (self.endpoint_url, self.access_key, self.region_name)
+        resources = getattr(_thread_resources, 'by_key', None)
+        if resources is None:
+            resources = _thread_resources.by_key = {}
+        resource = resources.get(key)
+        if resource is None:
+            shared = self._shared_resource(key)
+            resource = resources[key] = type(shared)(client=shared.meta.client)
+        return resource
+
+    def _shared_resource(self, key):
+        resource = _shared_resources.get(key)
+        if resource is None:
+            with _shared_resources_lock:
+                resource = _shared_resources.get(key)
+                if resource is None:
+                    resource = _shared_resources[key] = self._create_session().resource(
+                        's3',
+                        region_name=self.region_name,
+                        use_ssl=self.use_ssl,
+                        endpoint_url=self.endpoint_url,
+                        config=self._pooled_config(),
+                        verify=self.verify,
+                    )
+        return resource
+
+    def _pooled_config(self):
+        pooled = Config(
+            max_pool_connections=settings.MEDIA_UPLOAD_WORKERS * 2,
+            retries={'max_attempts': settings.MEDIA_UPLOAD_RETRIES, 'mode': 'standard'},
+        )
+        return self.config.merge(pooled) if self.config else pooled
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .purge import purge_instance
+from .surrogate import collect_instance_keys, surrogate_models
+
+
+def connect_surrogate_keys():
+    for model, _ in surrogate_models():
+        post_init.connect(collect_instance_keys, sender=model, dispatch_uid=f'surrogate_keys_{model._meta.label}')
+        post_save.connect(purge_instance, sender=model, dispatch_uid=f'surrogate_purge_save_{model._meta.label}')
+        post_delete.connect(purge_instance, sender=model, dispatch_uid=f'surrogate_purge_delete_{model._meta.label}')
@@ -0,0 +1,341 @@
+"""
+Media storage backends.
+
+``MediaStorage`` wraps the Supabase S3 backend with:
+
+* one pooled, retrying boto3 client shared by every thread in the
+  process (each thread gets its own resource around it, as resources are
+  not thread-safe) instead of a new session per thread
+* collision-free upload names, so ``AWS_S3_FILE_OVERWRITE=False`` no longer
+  costs a HEAD round-trip per file
+* upload timing metrics (``upload_metrics``)
+* content-addressed saves: a file whose bytes are already stored gets the
+  existing name instead of a second upload (``core.dedup``)
+* optional deferred uploads: files are written to a local staging area and
+  pushed to the bucket by a background worker (or ``flush_media_uploads``).
+  Until then they exist only on this instance's disk: another instance
+  cannot serve them, and an ephemeral disk (Render) loses whatever is
+  still staged on redeploy or restart. Off by default; only turn it on
+  with a persistent disk and a single instance
+
+``LocalMediaStorage`` layers the same behaviour over the filesystem backend
+for development and tests.
+
+``MediaStorage`` lives in ``core.s3`` and is resolved lazily on attribute
+access, so processes that never touch media (most management commands)
+do not import boto3.
+"""
+import logging
+import os
+import posixpath
+import queue
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import connections, models
+
+logger = logging.getLogger(__name__)
+
+
+def __getattr__(name):
+    # Keeps 'core.storage.MediaStorage' importable without loading boto3 up front
+    if name == 'MediaStorage':
+        from .s3 import MediaStorage
+        return MediaStorage
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class UploadMetrics:
+    """Thread-safe, process-local upload counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.uploads = 0
+            self.failures = 0
+            self.bytes = 0
+            self.total_seconds = 0.0
+            self.max_seconds = 0.0
+            self.deduplicated = 0
+            self.bytes_saved = 0
+
+    def record(self, seconds, size=0, ok=True):
+        with self._lock:
+            if ok:
+                self.uploads += 1
+                self.bytes += size
+            else:
+                self.failures += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def record_duplicate(self, size=0):
+        with self._lock:
+            self.deduplicated += 1
+            self.bytes_saved += size
+
+    def snapshot(self):
+        with self._lock:
+            attempts = self.uploads + self.failures
+            return {
+                'uploads': self.uploads,
+                'failures': self.failures,
+                'bytes': self.bytes,
+                'total_seconds': self.total_seconds,
+                'max_seconds': self.max_seconds,
+                'avg_seconds': self.total_seconds / attempts if attempts else 0.0,
+                'deduplicated': self.deduplicated,
+                'bytes_saved': self.bytes_saved,
+            }
+
+
+upload_metrics = UploadMetrics()
+
+
+class DeferredUploadQueue:
+    """Single background thread pushing staged files to their storage."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, storage, name):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='deferred-media-uploads', daemon=True
+                )
+                self._thread.start()
+        self._queue.put((storage, name))
+
+    def join(self):
+        self._queue.join()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            storage, name = self._queue.get()
+            try:
+                storage.upload_staged(name)
+            except Exception as e:
+                # The staged copy is kept, flush_media_uploads will retry it
+                logger.error(f"Deferred upload of {name} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+
+deferred_uploads = DeferredUploadQueue()
+
+# Set by upload_pending_files in its worker threads, which leave the
+# registry to the calling thread
+_registry_local = threading.local()
+
+
+def releases_connections(task):
+    """
+    Wrap a thread-pool task that may use the ORM
+
+    Its database connections are closed (handed back to the pool) when it
+    ends: only request threads get that from request_finished, and a
+    connection a worker keeps would hold a pool slot.
+    """
+    @wraps(task)
+    def wrapper(*args, **kwargs):
+        try:
+            return task(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return wrapper
+
+
+class MediaStorageMixin:
+    """Upload behaviour shared by the S3 and filesystem media backends."""
+
+    def get_available_name(self, name, max_length=None):
+        """
+        Return a name that cannot collide with an existing file.
+
+        A random token replaces the exists() probing of the base class, which
+        on S3 is a HEAD request per upload.
+        """
+        dir_name, file_name = posixpath.split(str(name).replace('\\', '/'))
+        root, ext = posixpath.splitext(file_name)
+        token = f'_{secrets.token_hex(4)}'
+
+        if max_length is not None:
+            overflow = len(posixpath.join(dir_name, root + token + ext)) - max_length
+            if overflow > 0:
+                root = root[:-overflow]
+        return posixpath.join(dir_name, f'{root}{token}{ext}')
+
+    # ============= DEFERRED UPLOADS =============
+
+    @property
+    def defer_uploads(self):
+        return getattr(settings, 'MEDIA_DEFERRED_UPLOADS', False)
+
+    def staged_path(self, name):
+        return os.path.join(settings.MEDIA_STAGING_ROOT, *name.split('/'))
+
+    def _save(self, name, content):
+        asset = None
+        if (getattr(settings, 'MEDIA_DEDUPLICATE', False) and hasattr(content, 'seek')
+                and not getattr(_registry_local, 'skip', False)):
+            from .dedup import describe, find_asset
+            asset = describe(name, content)
+            existing = find_asset(asset['sha256'])
+            if existing:
+                upload_metrics.record_duplicate(asset['size'])
+                logger.debug(f"Reusing {existing} for {name} (same content)")
+                return existing
+
+        if self.defer_uploads:
+            name = self._stage(name, content)
+        else:
+            name = self._upload(name, content)
+
+        if asset is not None:
+            from .dedup import register_asset
+            register_asset(name, **asset)
+        return name
+
+    def _upload(self, name, content):
+        size = getattr(content, 'size', 0) or 0
+        started = time.perf_counter()
+        try:
+            name = super()._save(name, content)
+        except Exception:
+            upload_metrics.record(time.perf_counter() - started, ok=False)
+            raise
+        elapsed = time.perf_counter() - started
+        upload_metrics.record(elapsed, size)
+        logger.debug(f"Uploaded {name} ({size} bytes) in {elapsed * 1000:.0f}ms")
+        return name
+
+    def _stage(self, name, content):
+        path = self.staged_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        with open(path, 'wb') as fh:
+            for chunk in content.chunks():
+                fh.write(chunk)
+        deferred_uploads.put(self, name)
+        return name
+
+    def upload_staged(self, name):
+        """Push one staged file to the backend and drop the local copy."""
+        path = self.staged_path(name)
+        with open(path, 'rb') as fh:
+            self._upload(name, File(fh, name=name))
+        os.remove(path)
+
+    def staged_names(self):
+        root = settings.MEDIA_STAGING_ROOT
+        for dir_path, _, file_names in os.walk(root):
+            for file_name in file_names:
+                relative = os.path.relpath(os.path.join(dir_path, file_name), root)
+                yield relative.replace(os.sep, '/')
+
+    def exists(self, name):
+        return os.path.exists(self.staged_path(name)) or super().exists(name)
+
+    def _open(self, name, mode='rb'):
+        path = self.staged_path(name)
+        if os.path.exists(path):
+            return File(open(path, mode), name=name)
+        return super()._open(name, mode)
+
+
+class LocalMediaStorage(MediaStorageMixin, FileSystemStorage):
+    """Filesystem media storage with the same upload behaviour, for dev and tests."""
+
+
+def upload_pending_files(instances, workers=None):
+    """
+    Upload the uncommitted files of ``instances`` concurrently.
+
+    Mirrors what ``FileField.pre_save`` does for each instance, so the
+    following ``save()`` finds the files committed and skips the upload.
+    The worker threads read, hash and upload; the media registry
+    (core.dedup) is queried and written here, in the calling thread, with
+    one query each.
+    """
+    pending = [
+        (instance, field, field_file)
+        for instance in instances
+        for field in instance._meta.fields
+        if isinstance(field, models.FileField)
+        for field_file in [getattr(instance, field.attname)]
+        if field_file and not field_file._committed
+    ]
+    if not pending:
+        return 0
+
+    from .dedup import describe, register_assets, stored_names
+    deduplicate = settings.MEDIA_DEDUPLICATE
+
+    def prepare(item):
+        instance, field, field_file = item
+        # Read image metadata (core.images) while the upload is still local
+        if getattr(instance, 'image_metadata_field', None) == field.name:
+            instance.update_image_metadata()
+        return describe(field_file.name, field_file.file) if deduplicate else None
+
+    def commit(item):
+        instance, field, field_file = item
+        _registry_local.skip = True
+        try:
+            field_file.save(field_file.name, field_file.file, save=False)
+        finally:
+            _registry_local.skip = False
+
+    def reuse(item, name, asset):
+        instance, field, _ = item
+        upload_metrics.record_duplicate(asset['size'])
+        # What FieldFile.save does, minus the upload
+        setattr(instance, field.attname, name)
+
+    def stored_name(item):
+        instance, field, _ = item
+        return getattr(instance, field.attname).name
+
+    workers = workers or settings.MEDIA_UPLOAD_WORKERS
+    with ThreadPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+        assets = list(pool.map(releases_connections(prepare), pending))
+
+        existing = stored_names({asset['sha256'] for asset in assets if asset}) if deduplicate else {}
+        uploads, repeats, first = [], [], {}
+        for item, asset in zip(pending, assets):
+            digest = asset['sha256'] if asset else None
+            if digest in existing:
+                reuse(item, existing[digest], asset)
+            elif digest in first:
+                # The same file twice in this batch: uploaded once
+                repeats.append((item, asset, first[digest]))
+            else:
+                if digest:
+                    first[digest] = item
+                uploads.append((item, asset))
+        list(pool.map(releases_connections(commit), [item for item, _ in uploads]))
+
+    for item, asset, source in repeats:
+        reuse(item, stored_name(source), asset)
+    for instance, field, _ in pending:
+        if getattr(instance, 'image_metadata_field', None) == field.name:
+            instance._image_metadata_name = getattr(instance, field.attname).name
+    if deduplicate:
+        register_assets([(stored_name(item), asset) for item, asset in uploads if asset])
+    return len(pending)
@@ -0,0 +1,84 @@
+"""
+Surrogate keys for a front-end HTTP cache.
+
+While a request is handled, every catalog/content instance loaded from the
+database tags the response with its key (``project:42``) and its
+collection key (``projects``); cached helpers that skip the ORM tag
+explicitly with ``add_surrogate_keys``. ``SurrogateKeyMiddleware`` sends
+the keys in a ``Surrogate-Key`` header alongside ``s-maxage`` /
+``stale-while-revalidate``, and ``core.purge`` purges exactly those keys
+when an instance changes.
+
+Keys use primary keys rather than slugs so they are known even when a
+queryset defers the slug.
+"""
+import threading
+
+from django.apps import apps
+
+# model label: (instance key prefix, collection key, parent (fk attname, prefix) or None)
+# Gallery images are rendered and purged under their parent's key.
+SURROGATE_KEY_MODELS = {
+    'core.SiteSettings': ('site-settings', None, None),
+    'core.HeroSlide': ('hero-slide', 'hero-slides', None),
+    'core.Testimonial': ('testimonial', 'testimonials', None),
+    'core.TeamMember': ('team-member', 'team-members', None),
+    'services.ServiceCategory': ('category', 'categories', None),
+    'services.CategoryItem': ('item', 'items', None),
+    'services.CategoryItemImage': (None, None, ('item_id', 'item')),
+    'projects.ProjectCategory': ('project-category', 'project-categories', None),
+    'projects.Project': ('project', 'projects', None),
+    'projects.ProjectImage': (None, None, ('project_id', 'project')),
+}
+
+_local = threading.local()
+
+
+def surrogate_models():
+    for label, spec in SURROGATE_KEY_MODELS.items():
+        yield apps.get_model(label), spec
+
+
+def instance_keys(instance):
+    """Keys a change to ``instance`` must purge"""
+    prefix, collection, parent = SURROGATE_KEY_MODELS[instance._meta.label]
+    keys = set()
+    if prefix == 'site-settings':
+        keys.add(prefix)
+    elif prefix and instance.pk is not None:
+        keys.add(f'{prefix}:{instance.pk}')
+    if collection:
+        keys.add(collection)
+    if parent:
+        attname, parent_prefix = parent
+        parent_id = instance.__dict__.get(attname)
+        if parent_id is not None:
+            keys.add(f'{parent_prefix}:{parent_id}')
+    return keys
+
+
+def current_keys():
+    """Key set of the response being built in this thread, or None outside a request"""
+    return getattr(_local, 'keys', None)
+
+
+def add_surrogate_keys(*keys):
+    collected = current_keys()
+    if collected is not None:
+        collected.update(keys)
+
+
+def collect_instance_keys(sender, instance, **kwargs):
+    """post_init receiver tagging the current response with a loaded instance"""
+    collected = current_keys()
+    if collected is not None:
+        collected.update(instance_keys(instance))
+
+
+def begin():
+    _local.keys = set()
+    return _local.keys
+
+
+def end():
+    _local.keys = None
@@ -0,0 +1,166 @@
+"""
+Template rendering profiler.
+
+Times every template render, ``{% include %}`` and tag while a profile is
+active in the current thread::
+
+    with profile_templates() as profile:
+        response = view(request)
+    logger.info(profile.report())
+
+Each entry records how often it ran, its inclusive time and its self time
+(inclusive minus everything rendered inside it). Inclusive times of nested
+entries overlap, self times add up to the total.
+
+The hooks are installed on first use and stay in place; with no active
+profile they cost one thread-local lookup per node. Per-request profiling
+in production is done by ``TemplateProfilerMiddleware``; the
+``profile_templates`` command profiles a page offline.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.template.base import Node, Template, VariableNode
+from django.template.loader_tags import IncludeNode
+
+_local = threading.local()
+_install_lock = threading.Lock()
+_installed = False
+
+
+class Stat:
+
+    __slots__ = ('count', 'total', 'own')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.own = 0.0
+
+
+class TemplateProfile:
+    """Timings collected during one profiled render"""
+
+    def __init__(self):
+        self.stats = defaultdict(Stat)
+        self.total = 0.0
+        self._stack = []
+
+    def enter(self):
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def exit(self, kind, name):
+        started, children = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        stat = self.stats[(kind, name)]
+        stat.count += 1
+        stat.total += elapsed
+        stat.own += elapsed - children
+        if self._stack:
+            self._stack[-1][1] += elapsed
+        else:
+            self.total += elapsed
+
+    def top(self, kind=None, limit=None, key='own'):
+        entries = [
+            (entry_kind, name, stat)
+            for (entry_kind, name), stat in self.stats.items()
+            if kind is None or entry_kind == kind
+        ]
+        entries.sort(key=lambda entry: getattr(entry[2], key), reverse=True)
+        return entries[:limit] if limit else entries
+
+    def report(self, limit=25):
+        lines = [
+            f"Template render time {self.total * 1000:.2f}ms",
+            f"{'kind':<9} {'name':<48} {'calls':>6} {'total ms':>9} {'self ms':>9}",
+        ]
+        for kind, name, stat in self.top(limit=limit):
+            lines.append(
+                f"{kind:<9} {name[:48]:<48} {stat.count:>6} "
+                f"{stat.total * 1000:>9.2f} {stat.own * 1000:>9.2f}"
+            )
+        return '\n'.join(lines)
+
+    def server_timing(self, limit=5):
+        """Server-Timing header value: the total plus the most expensive entries by self time"""
+        entries = [f'tpl;dur={self.total * 1000:.2f};desc="templates"']
+        for index, (kind, name, stat) in enumerate(self.top(limit=limit)):
+            desc = f'{kind} {name}'.replace('"', "'")
+            entries.append(f'tpl{index};dur={stat.own * 1000:.2f};desc="{desc}"')
+        return ', '.join(entries)
+
+
+def active_profile():
+    return getattr(_local, 'profile', None)
+
+
+def _tag_name(node):
+    token = getattr(node, 'token', None)
+    if token is None:
+        return type(node).__name__
+    return token.contents.split(None, 1)[0] if token.contents else type(node).__name__
+
+
+def install():
+    """Wrap the template render entry points; idempotent"""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+
+        render_template = Template._render
+        render_node = Node.render_annotated
+        render_include = IncludeNode.render
+
+        def profiled_template_render(self, context):
+            profile = active_profile()
+            if profile is None:
+                return render_template(self, context)
+            profile.enter()
+            try:
+                return render_template(self, context)
+            finally:
+                profile.exit('template', self.origin.template_name or self.name or '<string>')
+
+        def profiled_node_render(self, context):
+            profile = active_profile()
+            if profile is None:
+                return render_node(self, context)
+            profile.enter()
+            try:
+                return render_node(self, context)
+            finally:
+                if isinstance(self, VariableNode):
+                    profile.exit('variable', str(self.filter_expression.var))
+                else:
+                    profile.exit('tag', _tag_name(self))
+
+        def profiled_include_render(self, context):
+            profile = active_profile()
+            if profile is None:
+                return render_include(self, context)
+            profile.enter()
+            try:
+                return render_include(self, context)
+            finally:
+                profile.exit('include', str(self.template.var))
+
+        Template._render = profiled_template_render
+        Node.render_annotated = profiled_node_render
+        IncludeNode.render = profiled_include_render
+        _installed = True
+
+
+@contextmanager
+def profile_templates():
+    """Profile every template rendered in this thread inside the block"""
+    install()
+    previous = active_profile()
+    profile = _local.profile = TemplateProfile()
+    try:
+        yield profile
+    finally:
+        _local.profile = previous
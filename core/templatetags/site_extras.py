@@ -2,16 +2,63 @@ from django import template
 from django.core.cache import cache
 from django.db.utils import OperationalError, ProgrammingError
 from django.conf import settings
+from django.utils.html import format_html
+
+from core.media import media_url as resolve_media_url
+from core.metrics import registry
+from core.surrogate import add_surrogate_keys
 
 register = template.Library()
 
 
+def record_lookup(cache_name, hit):
+    registry.inc('site_cache_lookups_total', (('cache', cache_name), ('result', 'hit' if hit else 'miss')))
+
+
+@register.filter
+def media_url(image):
+    """
+    Memoized public URL of an image field
+    Usage: {{ site_settings.logo|media_url }}
+    """
+    return resolve_media_url(image)
+
+
+@register.simple_tag
+def image_dimensions(obj):
+    """
+    width/height attributes from the stored image metadata (core.images)
+    Usage: <img src="..." {% image_dimensions project %}>
+    """
+    width, height = getattr(obj, 'image_width', None), getattr(obj, 'image_height', None)
+    if not (width and height):
+        return ''
+    return format_html('width="{}" height="{}"', width, height)
+
+
+@register.filter
+def placeholder_style(obj):
+    """
+    Dominant colour and blurred preview to show until the image loads
+    Usage: <img ... style="{{ project|placeholder_style }}">
+    """
+    color = getattr(obj, 'image_color', '')
+    placeholder = getattr(obj, 'image_placeholder', '')
+    if placeholder:
+        return f'background: {color or "transparent"} url({placeholder}) center / cover no-repeat;'
+    if color:
+        return f'background-color: {color};'
+    return ''
+
+
 @register.simple_tag
 def get_site_settings():
     """Get site settings with caching and error handling"""
     try:
         # Try to get from cache first
         site_settings = cache.get('site_settings')
+        record_lookup('site_settings', site_settings is not None)
+        add_surrogate_keys('site-settings')
         if site_settings is None:
             from core.models import SiteSettings
             site_settings = SiteSettings.objects.first()
@@ -34,11 +81,23 @@ def get_site_settings():
         return get_fallback_settings()
 
 
+@register.simple_tag
+def spam_guard():
+    """
+    Honeypot and timing fields checked by contact.ratelimit
+    Usage: {% spam_guard %} inside public POST forms
+    """
+    from contact.ratelimit import spam_guard_fields
+    return spam_guard_fields()
+
+
 @register.simple_tag
 def get_nav_categories():
     """Get navigation categories with caching and error handling"""
     try:
         categories = cache.get('nav_categories')
+        record_lookup('nav_categories', categories is not None)
+        add_surrogate_keys('categories')
         if categories is None:
             from services.models import ServiceCategory
             categories = list(ServiceCategory.objects.all()[:6])
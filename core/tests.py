@@ -1,3 +1,994 @@
-from django.test import TestCase
+import fcntl
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.template import engines
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+from projects.models import Project
+from services.models import ServiceCategory
+
+from .compression import minify_html, negotiate_encoding
+from .dbpool import ConnectionPool, PoolTimeout
+from .dedup import BKTree, hamming, perceptual_hash
+from .defaults import DEFAULT_HERO_SLIDES
+from .media import media_url
+from .metrics import MetricsRegistry, registry, render_prometheus
+from .middleware import AnonymousFastPathMiddleware
+from .models import EditorUpload, HeroSlide, MediaAsset, SiteSettings
+from .purge import purge_dispatcher
+from .richtext import render_rich_text
+from .storage import LocalMediaStorage, deferred_uploads, upload_metrics, upload_pending_files
+from .template_profiler import profile_templates
+from .warmup import iter_template_names, release_before_fork, self_request, warm_up, warm_up_on_boot
+
+
+class MediaStorageTests(TestCase):
+    """Upload layer behaviour, exercised against the filesystem backend."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.staging_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.addCleanup(shutil.rmtree, self.staging_root)
+        self.storage = LocalMediaStorage(location=self.media_root)
+        upload_metrics.reset()
+
+    def test_available_name_skips_exists_round_trip(self):
+        with mock.patch.object(LocalMediaStorage, 'exists') as exists:
+            first = self.storage.get_available_name('hero/slide.jpg')
+            second = self.storage.get_available_name('hero/slide.jpg')
+        exists.assert_not_called()
+        self.assertNotEqual(first, second)
+        self.assertTrue(first.startswith('hero/slide_') and first.endswith('.jpg'))
+
+    def test_available_name_respects_max_length(self):
+        name = self.storage.get_available_name('hero/' + 'a' * 200 + '.jpg', max_length=100)
+        self.assertEqual(len(name), 100)
+
+    def test_save_records_upload_metrics(self):
+        self.storage.save('hero/slide.jpg', ContentFile(b'x' * 10))
+        stats = upload_metrics.snapshot()
+        self.assertEqual(stats['uploads'], 1)
+        self.assertEqual(stats['bytes'], 10)
+
+    def test_deferred_upload_stages_then_uploads(self):
+        with self.settings(MEDIA_DEFERRED_UPLOADS=True, MEDIA_STAGING_ROOT=self.staging_root):
+            name = self.storage.save('hero/slide.jpg', ContentFile(b'data'))
+            self.assertTrue(self.storage.exists(name))
+            deferred_uploads.join()
+            self.assertEqual(list(self.storage.staged_names()), [])
+
+        with self.storage.open(name) as fh:
+            self.assertEqual(fh.read(), b'data')
+        self.assertEqual(upload_metrics.snapshot()['uploads'], 1)
+
+    def test_upload_pending_files_commits_every_instance(self):
+        with self.settings(DEFAULT_FILE_STORAGE='core.storage.LocalMediaStorage', MEDIA_ROOT=self.media_root,
+                           MEDIA_DEDUPLICATE=False):
+            slides = [HeroSlide(title=f'Slide {i}', subtitle='-') for i in range(5)]
+            for slide in slides:
+                slide.image = ContentFile(b'img', name='slide.jpg')
+
+            self.assertEqual(upload_pending_files(slides, workers=3), 5)
+
+        self.assertTrue(all(slide.image._committed for slide in slides))
+        self.assertEqual(len({slide.image.name for slide in slides}), 5)
+        for slide in slides:
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, slide.image.name)))
+
+
+class MediaURLTests(TestCase):
+    """The memoized resolver must match what the storage backend would return."""
+
+    def test_matches_storage_url(self):
+        slide = HeroSlide(image='hero/summer sale (1).jpg')
+        self.assertEqual(media_url(slide.image), slide.image.storage.url(slide.image.name))
+        self.assertEqual(slide.image_url, slide.image.url)
+
+    def test_empty_image(self):
+        self.assertEqual(HeroSlide().image_url, '')
+
+    def test_falls_back_to_storage_when_not_precomputable(self):
+        slide = HeroSlide(image='hero/slide.jpg')
+        with self.settings(MEDIA_URL_PRECOMPUTE=False), \
+                mock.patch('core.storage.MediaStorage.url', return_value='signed') as url:
+            self.assertEqual(media_url(slide.image), 'signed')
+        url.assert_called_once()
+
+
+class WarmUpTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_compiles_templates_and_primes_caches(self):
+        with self.assertLogs('core.warmup', 'INFO') as logs:
+            timings = warm_up(self_requests=False)
+
+        self.assertEqual(set(timings), {'database', 'urls', 'templates', 'caches', 'total'})
+        self.assertIsNotNone(cache.get('site_settings'))
+        self.assertIsNotNone(cache.get('nav_categories'))
+        self.assertGreater(sum(1 for _ in iter_template_names(engines['django'])), 10)
+        self.assertNotIn('could not compile', '\n'.join(logs.output))
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_self_requests_go_through_the_wsgi_handler(self):
+        results = self_request(get_wsgi_application(), ['home', 'about'])
+        self.assertEqual({path: status for path, (status, _) in results.items()}, {'/': 200, '/about/': 200})
+
+    @override_settings(WARMUP_ON_BOOT=True)
+    def test_connections_are_closed_before_a_fork(self):
+        with mock.patch('core.warmup.warm_up'), mock.patch('os.register_at_fork') as register_at_fork, \
+                mock.patch('core.warmup._fork_guard', []):
+            warm_up_on_boot()
+            warm_up_on_boot()
+        register_at_fork.assert_called_once_with(before=release_before_fork)
+
+        with mock.patch('core.warmup.connections') as connections, \
+                mock.patch('core.dbpool.close_pools') as close_pools:
+            release_before_fork()
+        connections.close_all.assert_called_once_with()
+        close_pools.assert_called_once_with()
+
+    def test_failing_step_does_not_stop_boot(self):
+        with mock.patch('core.warmup.prime_caches', side_effect=RuntimeError('cache down')):
+            with self.assertLogs('core.warmup', 'WARNING'):
+                timings = warm_up(self_requests=False)
+        self.assertIn('total', timings)
+
+
+class TemplateProfilerTests(TestCase):
+
+    def test_records_templates_includes_and_tags(self):
+        engine = engines['django']
+        template = engine.from_string(
+            '{% load site_extras %}{% get_site_settings as s %}'
+            '{% for i in items %}{% include "errors/500.html" %}{% endfor %}{{ s.site_name }}'
+        )
+        with profile_templates() as profile:
+            template.render({'items': [1, 2]})
+
+        names = {(kind, name): stat.count for kind, name, stat in profile.top()}
+        self.assertEqual(names[('tag', 'get_site_settings')], 1)
+        self.assertEqual(names[('include', 'errors/500.html')], 2)
+        self.assertEqual(names[('template', 'errors/500.html')], 2)
+        self.assertEqual(names[('variable', 's.site_name')], 1)
+        self.assertAlmostEqual(sum(stat.own for _, _, stat in profile.top()), profile.total, places=6)
+
+    def test_inactive_outside_block(self):
+        with profile_templates() as profile:
+            pass
+        engines['django'].from_string('{% if True %}x{% endif %}').render({})
+        self.assertEqual(profile.stats, {})
+
+    @override_settings(TEMPLATE_PROFILER=True, SECURE_SSL_REDIRECT=False)
+    def test_middleware_profiles_staff_requests_only(self):
+        response = self.client.get('/about/?profile_templates')
+        self.assertNotIn('Server-Timing', response)
+
+        staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+        with self.assertLogs('core.middleware', 'INFO'):
+            response = self.client.get('/about/?profile_templates')
+        self.assertIn('desc="templates"', response['Server-Timing'])
+
+
+class StartupBudgetTests(SimpleTestCase):
+    """Cold django.setup() as every manage.py invocation pays it, in a fresh interpreter"""
+
+    BUDGET_SECONDS = float(os.environ.get('BOOT_BUDGET_SECONDS', '2.0'))
+    PROBE = (
+        'import json, sys, time\n'
+        'started = time.perf_counter()\n'
+        'import django\n'
+        'django.setup()\n'
+        'print(json.dumps({"seconds": time.perf_counter() - started, '
+        '"heavy": [m for m in ("boto3", "botocore", "storages.backends.s3boto3") if m in sys.modules]}))\n'
+    )
+
+    def boot(self):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        output = subprocess.run(
+            [sys.executable, '-c', self.PROBE],
+            env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def test_setup_does_not_import_s3_client(self):
+        self.assertEqual(self.boot()['heavy'], [])
+
+    def test_setup_within_budget(self):
+        # Best of three, so a noisy CI neighbour does not fail the build
+        best = min(self.boot()['seconds'] for _ in range(3))
+        self.assertLess(best, self.BUDGET_SECONDS, f'django.setup() took {best:.2f}s')
+
+    def test_media_storage_resolves_lazily(self):
+        from core.s3 import MediaStorage
+        self.assertIs(import_string('core.storage.MediaStorage'), MediaStorage)
+
+    def test_threads_get_their_own_resource_around_one_client(self):
+        from core.s3 import MediaStorage
+        storage = MediaStorage(access_key='key', secret_key='secret', bucket_name='media',
+                               endpoint_url='http://127.0.0.1:9', region_name='us-east-1')
+        other = []
+        thread = threading.Thread(target=lambda: other.append(storage.connection))
+        thread.start()
+        thread.join()
+
+        self.assertIs(storage.connection, storage.connection)
+        self.assertIsNot(storage.connection, other[0])
+        self.assertIs(storage.connection.meta.client, other[0].meta.client)
+
+        # Later threads build no session or client of their own
+        with mock.patch.object(MediaStorage, '_create_session') as create_session:
+            thread = threading.Thread(target=lambda: other.append(storage.connection))
+            thread.start()
+            thread.join()
+        create_session.assert_not_called()
+        self.assertIs(other[1].meta.client, other[0].meta.client)
+        self.assertEqual(other[1].Bucket('media').name, 'media')
+
+
+class BootstrapCommandTests(TestCase):
+
+    def test_seeds_once_and_skips_migrate_when_nothing_pending(self):
+        out = StringIO()
+        with mock.patch('core.management.commands.bootstrap.call_command') as migrate:
+            call_command('bootstrap', stdout=out)
+            call_command('bootstrap', stdout=out)
+
+        migrate.assert_not_called()
+        self.assertIn('No pending migrations', out.getvalue())
+        self.assertEqual(SiteSettings.objects.count(), 1)
+        self.assertEqual(HeroSlide.objects.count(), len(DEFAULT_HERO_SLIDES))
+        self.assertIsNotNone(cache.get('site_settings'))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, METRICS_DIR='', METRICS_TOKEN='')
+class HealthAndMetricsTests(TestCase):
+
+    def setUp(self):
+        registry.reset()
+        cache.clear()
+
+    def test_healthz_skips_database_and_host_checks(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/healthz', HTTP_HOST='10.0.0.5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+
+    @override_settings(SECURE_SSL_REDIRECT=True)
+    def test_readyz_pings_database_and_cache(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.json(), {'status': 'ok', 'checks': {'database': 'ok', 'cache': 'ok'}})
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_count_requests_queries_and_cache_lookups(self):
+        self.client.get(reverse('about'))
+        self.client.get(reverse('about'))
+        body = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').content.decode()
+
+        self.assertIn('http_requests_total{view="about",method="GET",status="200"} 2', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="about",le="+Inf"} 2', body)
+        self.assertIn('http_request_duration_seconds_count{view="about"} 2', body)
+        self.assertIn('db_queries_total{view="about"}', body)
+        self.assertIn('site_cache_lookups_total{cache="site_settings",result="hit"}', body)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+
+    def test_histograms_render_their_own_buckets(self):
+        for wait in (0.0002, 0.0007, 0.002, 0.003):
+            registry.observe('db_pool_wait_seconds', (('alias', 'default'),), wait)
+        body = render_prometheus(registry.snapshot())
+
+        buckets = re.findall(r'db_pool_wait_seconds_bucket\{alias="default",le="([^"]+)"\} (\d+)', body)
+        counts = [int(count) for _, count in buckets]
+        self.assertEqual(buckets[:4], [('0.0005', '1'), ('0.001', '2'), ('0.0025', '3'), ('0.005', '4')])
+        self.assertEqual(counts, sorted(counts))
+        self.assertEqual(buckets[-1], ('+Inf', '4'))
+        self.assertIn('db_pool_wait_seconds_count{alias="default"} 4', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_without_token_only_under_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_aggregates_worker_snapshots(self):
+        metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, metrics_dir)
+        dead_worker = {'pid': 999999999, 'metrics': [
+            ['http_requests_total', [['view', 'home'], ['method', 'GET'], ['status', '200']], 5],
+            ['media_deferred_uploads_pending', [], 7],
+        ]}
+        with open(os.path.join(metrics_dir, 'worker-999999999-0a1b2c.json'), 'w') as fh:
+            json.dump(dead_worker, fh)
+
+        requests = ('http_requests_total', (('view', 'home'), ('method', 'GET'), ('status', '200')))
+        registry.inc(*requests, 2)
+        with self.settings(METRICS_DIR=metrics_dir):
+            totals = registry.collect()
+            self.assertEqual(totals[requests], 7)
+            # Gauges of exited workers are dropped
+            self.assertEqual(totals[('media_deferred_uploads_pending', ())], 0)
+
+            # The exited worker's counters moved to base.json and stay counted
+            self.assertEqual(sorted(os.listdir(metrics_dir)), ['base.json', 'base.lock'])
+            self.assertEqual(registry.collect()[requests], 7)
+
+    def test_collect_waits_for_a_fold_in_progress(self):
+        metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, metrics_dir)
+        requests = ('http_requests_total', (('view', 'home'), ('method', 'GET'), ('status', '200')))
+        with open(os.path.join(metrics_dir, 'worker-999999999-0a1b2c.json'), 'w') as fh:
+            json.dump({'pid': 999999999, 'metrics': [[requests[0], [list(l) for l in requests[1]], 5]]}, fh)
+
+        with self.settings(METRICS_DIR=metrics_dir):
+            results = []
+            with registry._base_lock(fcntl.LOCK_EX):
+                # Another scrape folding: this one must not read half of it
+                scrape = threading.Thread(target=lambda: results.append(registry.collect()[requests]))
+                scrape.start()
+                scrape.join(timeout=0.2)
+                self.assertTrue(scrape.is_alive())
+            scrape.join()
+        self.assertEqual(results, [5])
+
+    def test_worker_files_are_unique_per_process(self):
+        with self.settings(METRICS_DIR='/metrics'):
+            first, second = MetricsRegistry().worker_path(), MetricsRegistry().worker_path()
+        self.assertNotEqual(first, second)
+        self.assertIn(f'worker-{os.getpid()}-', first)
+
+
+class PurgeEndpoint(BaseHTTPRequestHandler):
+    """Stand-in for the CDN purge API, recording what it receives"""
+
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.received.append((dict(self.headers), json.loads(body)))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, SURROGATE_PURGE_URL='')
+class SurrogateKeyTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.category = ServiceCategory.objects.create(
+            name='Kitchens', slug='kitchens', description='-', icon='fa-utensils',
+            featured_image='categories/kitchens.jpg',
+        )
+
+    def test_anonymous_page_is_cacheable_and_tagged(self):
+        response = self.client.get(reverse('category_detail', args=['kitchens']))
+        self.assertIn('s-maxage=300', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+        keys = response['Surrogate-Key'].split()
+        self.assertIn(f'category:{self.category.pk}', keys)
+        self.assertIn('categories', keys)
+        self.assertIn('site-settings', keys)
+
+    def test_cookies_bypass_the_cache(self):
+        self.client.cookies['sessionid'] = 'abc'
+        response = self.client.get(reverse('category_detail', args=['kitchens']))
+        self.assertNotIn('Surrogate-Key', response)
+        self.assertNotIn('s-maxage', response.get('Cache-Control', ''))
+
+        self.client.cookies.clear()
+        response = self.client.get(reverse('form_token'))
+        self.assertIn('csrftoken', response.cookies)
+        self.assertNotIn('Surrogate-Key', response)
+
+    def test_admin_is_never_cached(self):
+        user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(user)
+        response = self.client.get(reverse('admin:index'))
+        self.assertNotIn('Surrogate-Key', response)
+
+    def test_save_purges_instance_keys(self):
+        server = HTTPServer(('127.0.0.1', 0), PurgeEndpoint)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        PurgeEndpoint.received = []
+
+        url = f'http://127.0.0.1:{server.server_port}/purge'
+        with self.settings(SURROGATE_PURGE_URL=url, SURROGATE_PURGE_HEADERS={'Fastly-Key': 'token'},
+                           SURROGATE_PURGE_DELAY=60):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.category.name = 'Kitchen Design'
+                self.category.save()
+            self.assertEqual(purge_dispatcher.flush(), 2)
+
+        headers, body = PurgeEndpoint.received[0]
+        self.assertEqual(body, {'keys': ['categories', f'category:{self.category.pk}']})
+        self.assertEqual(headers['Surrogate-Key'], f'categories category:{self.category.pk}')
+        self.assertEqual(headers['Fastly-Key'], 'token')
+        self.assertFalse(purge_dispatcher.pending())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, METRICS_DIR='')
+class CompressionTests(TestCase):
+
+    def test_minify_keeps_preformatted_blocks(self):
+        html = (
+            '<div>\n    <p>Hello  world</p>\n    <!-- note -->\n'
+            '<pre>  a\n    b</pre>\n  <textarea>\n x\n</textarea>\n'
+            '<script>\n  var a = 1;\n</script>\n  <!--[if IE]>ie<![endif]-->\n</div>\n'
+        )
+        self.assertEqual(minify_html(html), (
+            '<div>\n<p>Hello  world</p>\n'
+            '<pre>  a\n    b</pre>\n<textarea>\n x\n</textarea>\n'
+            '<script>\n  var a = 1;\n</script>\n<!--[if IE]>ie<![endif]-->\n</div>'
+        ))
+
+    def test_negotiate_encoding(self):
+        self.assertEqual(negotiate_encoding('gzip, deflate'), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0, identity'))
+        self.assertIsNone(negotiate_encoding(''))
+        with mock.patch('core.compression.available_encodings', return_value=('br', 'gzip')):
+            self.assertEqual(negotiate_encoding('gzip, deflate, br'), 'br')
+            self.assertEqual(negotiate_encoding('br;q=0.5, gzip'), 'gzip')
+
+    def test_page_is_minified_and_gzipped(self):
+        registry.reset()
+        plain = self.client.get(reverse('about'))
+        self.assertNotIn('Content-Encoding', plain)
+        content = plain.content.decode()
+        self.assertNotIn('\n    <div', content)
+        self.assertIn('\n--charcoal: #2C2C2C;\n', content)
+
+        response = self.client.get(reverse('about'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(zlib.decompress(response.content, 31), plain.content)
+
+        totals = registry.snapshot()
+        original = totals[('http_response_bytes_total', (('view', 'about'), ('stage', 'original')))]
+        sent = totals[('http_response_bytes_total', (('view', 'about'), ('stage', 'sent')))]
+        self.assertLess(sent, original / 2)
+
+    @override_settings(COMPRESSION_MIN_BYTES=10 ** 6)
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(reverse('about'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+    def test_minified_body_has_its_own_content_length(self):
+        for name in ('home', 'about', 'contact'):
+            response = self.client.get(reverse(name))
+            self.assertNotIn('Content-Encoding', response)
+            self.assertEqual(int(response['Content-Length']), len(response.content))
+
+    def test_streaming_response(self):
+        from .middleware import CompressionMiddleware
+        body = [b'id,name\n'] + [f'{i},row {i}\n'.encode() for i in range(500)]
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(body), content_type='text/csv')
+        )
+        response = middleware(RequestFactory().get('/export', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(zlib.decompress(b''.join(response.streaming_content), 31), b''.join(body))
+
+
+class RichTextTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        from PIL import Image
+        os.makedirs(os.path.join(self.media_root, 'uploads'))
+        Image.new('RGB', (2400, 1200)).save(os.path.join(self.media_root, 'uploads', 'kitchen.jpg'))
+
+    def test_sanitizes(self):
+        html = (
+            '<p onclick="steal()" style="text-align: center; background: url(x.png)">Hi &amp; bye'
+            '<script>alert(1)</script></p><a href="javascript:alert(1)" target="_blank">x</a>'
+            '<iframe src="https://example.com"><p>inside</p></iframe><unknown>kept text</unknown><ul><li>open'
+        )
+        self.assertEqual(render_rich_text(html), (
+            '<p style="text-align: center">Hi &amp; bye</p>'
+            '<a target="_blank" rel="noopener noreferrer">x</a>kept text<ul><li>open</li></ul>'
+        ))
+
+    def test_self_closed_dropped_tags_keep_what_follows(self):
+        self.assertEqual(render_rich_text('<p>a</p><svg/><p>visible?</p>'), '<p>a</p><p>visible?</p>')
+        self.assertEqual(render_rich_text('<p>a</p><iframe src="https://example.com" /><p>b</p><script/>c'),
+                         '<p>a</p><p>b</p>c')
+
+    def test_images_are_lazy_sized_and_downsized(self):
+        src = f'{settings.MEDIA_URL}uploads/kitchen.jpg'
+        with self.settings(DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+                           MEDIA_ROOT=self.media_root, MEDIA_THUMBNAIL_URL='https://img.example.com/'):
+            html = render_rich_text(f'<p><img alt="Kitchen" src="{src}" style="width:800px"></p>')
+
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('decoding="async"', html)
+        self.assertIn('width="800" height="400"', html)
+        self.assertIn('src="https://img.example.com/uploads/kitchen.jpg?width=1600&amp;resize=contain"', html)
+        self.assertIn('https://img.example.com/uploads/kitchen.jpg?width=480&amp;resize=contain 480w', html)
+        self.assertIn('sizes="(max-width: 800px) 100vw, 800px"', html)
+
+    def test_rendered_on_save_and_backfilled(self):
+        project = Project.objects.create(
+            title='Borrowdale Home', location='Harare', project_date='2024-01-01',
+            short_description='-', full_description='<p>Open plan<script>x</script></p>',
+            featured_image='projects/home.jpg',
+        )
+        self.assertEqual(project.full_description_html, '<p>Open plan</p>')
+
+        project.challenge = '<p>Tight <b>budget</b></p>'
+        project.save(update_fields=['challenge'])
+        project.refresh_from_db()
+        self.assertEqual(project.challenge_html, '<p>Tight <b>budget</b></p>')
+
+        Project.objects.update(full_description_html='', challenge_html='')
+        out = StringIO()
+        call_command('render_rich_text', '--model', 'projects.Project', stdout=out)
+        project.refresh_from_db()
+        self.assertEqual(project.full_description_html, '<p>Open plan</p>')
+        self.assertIn('projects.Project: 1 of 1 rows re-rendered', out.getvalue())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CKEDITOR_BROWSE_PAGE_SIZE=2, CKEDITOR_RESTRICT_BY_DATE=False)
+class EditorUploadTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        storage_settings = self.settings(DEFAULT_FILE_STORAGE='core.storage.LocalMediaStorage', MEDIA_ROOT=self.media_root)
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+        # ckeditor_uploader resolves its storage once, at import
+        for target in ('ckeditor_uploader.views.storage', 'ckeditor_uploader.utils.storage'):
+            patcher = mock.patch(target, storages['default'])
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.staff = get_user_model().objects.create_user('editor', password='pw', is_staff=True)
+        self.client.force_login(self.staff)
+
+    def _image(self, name, size=(300, 200)):
+        from PIL import Image
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, format='JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_is_registered(self):
+        response = self.client.post(reverse('ckeditor_upload'), {'upload': self._image('kitchen.jpg')})
+        self.assertEqual(response.json()['uploaded'], '1')
+
+        upload = EditorUpload.objects.get()
+        self.assertTrue(upload.name.startswith('uploads/kitchen'))
+        self.assertEqual((upload.width, upload.height), (300, 200))
+        self.assertEqual(upload.uploaded_by, self.staff)
+        self.assertTrue(upload.is_image)
+        self.assertTrue(storages['default'].exists(upload.thumbnail))
+
+    def test_browse_pages_the_registry_without_listing_storage(self):
+        for name in ('uploads/a-kitchen.jpg', 'uploads/b-bathroom.jpg', 'uploads/c-kitchen.jpg'):
+            EditorUpload.objects.create(name=name, size=1000, width=10, height=10, is_image=True)
+
+        with mock.patch('core.storage.LocalMediaStorage.listdir') as listdir:
+            first = self.client.get(reverse('ckeditor_browse'), {'CKEditorFuncNum': '3'})
+            search = self.client.get(reverse('ckeditor_browse'), {'CKEditorFuncNum': '3', 'q': 'kitchen'})
+        listdir.assert_not_called()
+
+        self.assertEqual(len(first.context['page'].object_list), 2)
+        self.assertContains(first, 'CKEditorFuncNum=3&amp;page=2')
+        self.assertEqual(
+            [upload.name for upload in search.context['page'].object_list],
+            ['uploads/c-kitchen.jpg', 'uploads/a-kitchen.jpg'],
+        )
+
+    def test_browse_requires_staff(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('ckeditor_browse')).status_code, 302)
+
+    def test_sync_adds_links_and_prunes(self):
+        storage = storages['default']
+        photo = storage.save('uploads/photo.jpg', self._image('photo.jpg', (40, 30)))
+        # As PillowBackend names it: '<photo>_thumb.jpg', then tokenized by the storage
+        thumbnail = storage.save(photo.replace('.jpg', '_thumb.jpg'), ContentFile(b'thumb'))
+        manual = storage.save('uploads/manual.pdf', ContentFile(b'%PDF'))
+        EditorUpload.objects.create(name='uploads/deleted.jpg', is_image=True)
+
+        out = StringIO()
+        call_command('sync_editor_uploads', '--prune', '--chunk-size', '1', stdout=out)
+
+        self.assertEqual(set(EditorUpload.objects.values_list('name', flat=True)), {photo, manual})
+        upload = EditorUpload.objects.get(name=photo)
+        self.assertEqual((upload.width, upload.height, upload.thumbnail), (40, 30, thumbnail))
+        self.assertFalse(EditorUpload.objects.get(name=manual).is_image)
+        self.assertIn('2 added, 1 thumbnails linked, 1 pruned', out.getvalue())
+
+
+class ImageMetadataTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        storage_settings = self.settings(DEFAULT_FILE_STORAGE='core.storage.LocalMediaStorage', MEDIA_ROOT=self.media_root)
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+    def _image(self, name, size=(300, 200), orientation=None):
+        from PIL import Image
+        image = Image.new('RGB', size, (200, 30, 30))
+        exif = Image.Exif()
+        if orientation:
+            exif[0x0112] = orientation
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_stores_metadata(self):
+        upload = self._image('slide.jpg')
+        slide = HeroSlide.objects.create(title='Slide', subtitle='-', image=upload)
+
+        slide = HeroSlide.objects.get(pk=slide.pk)
+        self.assertEqual((slide.image_width, slide.image_height), (300, 200))
+        self.assertEqual(slide.image_bytes, upload.size)
+        red, green, blue = (int(slide.image_color[i:i + 2], 16) for i in (1, 3, 5))
+        self.assertTrue(red > 150 and green < 80 and blue < 80)
+        self.assertTrue(slide.image_placeholder.startswith('data:image/jpeg;base64,'))
+        self.assertLess(len(slide.image_placeholder), 1500)
+
+    def test_exif_rotation_swaps_dimensions(self):
+        slide = HeroSlide.objects.create(title='Slide', subtitle='-', image=self._image('slide.jpg', orientation=6))
+        self.assertEqual((slide.image_width, slide.image_height), (200, 300))
+
+    def test_unchanged_image_is_not_read_again(self):
+        slide = HeroSlide.objects.create(title='Slide', subtitle='-', image=self._image('slide.jpg'))
+        slide = HeroSlide.objects.get(pk=slide.pk)
+        with mock.patch('core.images.read_image_metadata') as read:
+            slide.title = 'Renamed'
+            slide.save()
+            HeroSlide.objects.only('pk', 'title').get(pk=slide.pk).save(update_fields=['title'])
+        read.assert_not_called()
+
+    def test_upload_pending_files_measures_before_upload(self):
+        slides = [HeroSlide(title=f'Slide {i}', subtitle='-', image=self._image('slide.jpg', (40, 20))) for i in range(3)]
+        upload_pending_files(slides, workers=3)
+        with mock.patch('core.images.read_image_metadata') as read:
+            HeroSlide.objects.bulk_create(slides)
+            for slide in slides:
+                slide.save()
+        read.assert_not_called()
+        self.assertEqual(HeroSlide.objects.filter(image_width=40, image_height=20).count(), 3)
+
+    def test_backfill_fills_missing_metadata(self):
+        measured = HeroSlide.objects.create(title='A', subtitle='-', image=self._image('a.jpg', (60, 40)))
+        missing = HeroSlide.objects.create(title='B', subtitle='-', image=self._image('b.jpg', (50, 100)))
+        HeroSlide.objects.filter(pk=missing.pk).update(
+            image_width=None, image_height=None, image_bytes=None, image_color='', image_placeholder=''
+        )
+        broken = HeroSlide.objects.create(title='C', subtitle='-', image='hero/gone.jpg')
+
+        out = StringIO()
+        with mock.patch.object(HeroSlide, 'update_image_metadata', autospec=True,
+                               side_effect=HeroSlide.update_image_metadata) as update:
+            call_command('backfill_image_metadata', '--model', 'core.HeroSlide', '--chunk-size', '1', stdout=out)
+
+        self.assertEqual({call.args[0].pk for call in update.call_args_list}, {missing.pk, broken.pk})
+        missing.refresh_from_db()
+        self.assertEqual((missing.image_width, missing.image_height), (50, 100))
+        self.assertTrue(missing.image_placeholder)
+        self.assertIsNone(HeroSlide.objects.get(pk=broken.pk).image_width)
+        self.assertIn('1 images measured, 1 unreadable', out.getvalue())
+
+    def test_template_tags(self):
+        slide = HeroSlide(image_width=300, image_height=200, image_color='#c81e1e',
+                          image_placeholder='data:image/jpeg;base64,AAAA')
+        template = engines['django'].from_string(
+            '{% load site_extras %}<img {% image_dimensions slide %} style="{{ slide|placeholder_style }}">'
+        )
+        self.assertEqual(
+            template.render({'slide': slide}),
+            '<img width="300" height="200" '
+            'style="background: #c81e1e url(data:image/jpeg;base64,AAAA) center / cover no-repeat;">',
+        )
+        self.assertEqual(template.render({'slide': HeroSlide()}), '<img  style="">')
+
+
+class MediaDedupTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        storage_settings = self.settings(DEFAULT_FILE_STORAGE='core.storage.LocalMediaStorage', MEDIA_ROOT=self.media_root)
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+        self.storage = storages['default']
+        upload_metrics.reset()
+
+    def _photo(self, size=(320, 240), quality=90, mirror=False):
+        from PIL import Image, ImageDraw, ImageOps
+        image = Image.new('RGB', size, (240, 235, 220))
+        draw = ImageDraw.Draw(image)
+        draw.rectangle((0, 0, size[0] // 2, size[1] // 3), fill=(40, 60, 90))
+        draw.ellipse((size[0] // 2, size[1] // 2, size[0], size[1]), fill=(160, 40, 30))
+        if mirror:
+            image = ImageOps.mirror(image)
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', quality=quality)
+        return buffer.getvalue()
+
+    def test_same_bytes_reuse_the_stored_file(self):
+        first = self.storage.save('projects/kitchen.jpg', ContentFile(self._photo()))
+        again = self.storage.save('projects/gallery/kitchen-copy.jpg', ContentFile(self._photo()))
+        other = self.storage.save('projects/kitchen.jpg', ContentFile(self._photo(quality=60)))
+
+        self.assertEqual(again, first)
+        self.assertNotEqual(other, first)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.media_root, 'projects'))),
+                         sorted(name.split('/')[-1] for name in (first, other)))
+        stats = upload_metrics.snapshot()
+        self.assertEqual((stats['uploads'], stats['deduplicated']), (2, 1))
+        asset = MediaAsset.objects.get(name=first)
+        self.assertEqual((asset.width, asset.height, len(asset.phash)), (320, 240, 16))
+
+    def test_upload_pending_files_uses_the_registry_from_the_calling_thread(self):
+        stored = self.storage.save('hero/stored.jpg', ContentFile(self._photo()))
+        slides = [
+            HeroSlide(title=str(i), subtitle='-', image=ContentFile(data, name='slide.jpg'))
+            for i, data in enumerate([self._photo(), self._photo(quality=60), self._photo(quality=60)])
+        ]
+        from .dedup import stored_names
+        callers = []
+
+        def lookup(digests):
+            callers.append(threading.current_thread())
+            return stored_names(digests)
+
+        with mock.patch('core.dedup.stored_names', lookup), \
+                mock.patch('core.dedup.find_asset', side_effect=AssertionError('queried from a worker')):
+            upload_pending_files(slides, workers=3)
+
+        self.assertEqual(callers, [threading.current_thread()])
+        self.assertEqual(slides[0].image.name, stored)
+        self.assertEqual(slides[1].image.name, slides[2].image.name)
+        self.assertEqual(upload_metrics.snapshot()['uploads'], 2)
+        self.assertTrue(MediaAsset.objects.filter(name=slides[1].image.name).exists())
+
+    def test_disabled_uploads_every_copy(self):
+        with self.settings(MEDIA_DEDUPLICATE=False):
+            names = {self.storage.save('hero/a.jpg', ContentFile(self._photo())) for _ in range(2)}
+        self.assertEqual(len(names), 2)
+        self.assertFalse(MediaAsset.objects.exists())
+
+    def test_perceptual_hash_survives_resizing_and_reencoding(self):
+        original, _, _ = perceptual_hash(BytesIO(self._photo()))
+        resized, _, _ = perceptual_hash(BytesIO(self._photo((160, 120), quality=40)))
+        different, _, _ = perceptual_hash(BytesIO(self._photo(mirror=True)))
+        self.assertLessEqual(hamming(original, resized), 4)
+        self.assertGreater(hamming(original, different), 10)
+        self.assertEqual(perceptual_hash(BytesIO(b'%PDF')), ('', None, None))
+
+    def test_bk_tree_matches_linear_scan(self):
+        import random
+        rng = random.Random(7)
+        hashes = [f'{rng.getrandbits(64):016x}' for _ in range(300)]
+        tree = BKTree()
+        for key in hashes:
+            tree.add(key, key)
+        query = hashes[0]
+        expected = sorted(key for key in hashes if hamming(query, key) <= 24)
+        self.assertEqual(sorted(item for _, item in tree.search(query, 24)), expected)
+
+    def test_find_duplicate_media_merges_copies(self):
+        with self.settings(MEDIA_DEDUPLICATE=False):
+            slides = [
+                HeroSlide.objects.create(title=title, subtitle='-', image=ContentFile(data, name='slide.jpg'))
+                for title, data in (
+                    ('Original', self._photo()),
+                    ('Copy', self._photo()),
+                    ('Smaller', self._photo((160, 120), quality=40)),
+                )
+            ]
+        original, copy, smaller = slides
+
+        out = StringIO()
+        call_command('find_duplicate_media', '--register', '--merge', '--delete-files', stdout=out)
+        self.assertIn('3 files: 1 exact duplicate groups, 1 near-duplicate groups', out.getvalue())
+        copy.refresh_from_db()
+        smaller.refresh_from_db()
+        self.assertEqual(copy.image.name, original.image.name)
+        self.assertNotEqual(smaller.image.name, original.image.name)
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, 'hero'))), 2)
+
+        smaller_name = smaller.image.name
+        out = StringIO()
+        call_command('find_duplicate_media', '--merge-near', '--delete-files', stdout=out)
+        smaller.refresh_from_db()
+        self.assertEqual(smaller.image.name, original.image.name)
+        # A different image now: left for backfill_image_metadata
+        self.assertIsNone(smaller.image_width)
+        # Near duplicates are only deleted when confirmed
+        self.assertIn('add --confirm-near-delete', out.getvalue())
+        self.assertTrue(storages['default'].exists(smaller_name))
+
+        call_command('find_duplicate_media', '--merge-near', '--delete-files', '--confirm-near-delete',
+                     stdout=StringIO())
+        self.assertFalse(storages['default'].exists(smaller_name))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, METRICS_DIR='', CRITICAL_RESOURCES=[
+    ('https://fonts.gstatic.com', 'preconnect', {'crossorigin': True}),
+    ('https://cdn.example.com/icons.css', 'preload', {'as_': 'style'}),
+])
+class PreloadTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_home_preloads_the_first_hero_slide(self):
+        slide = HeroSlide.objects.create(title='Living', subtitle='-', image='hero/living.jpg', order=1)
+        HeroSlide.objects.create(title='Kitchen', subtitle='-', image='hero/kitchen.jpg', order=2)
+
+        link = self.client.get(reverse('home'))['Link']
+        self.assertEqual(link.split(', '), [
+            '<https://fonts.gstatic.com>; rel=preconnect; crossorigin',
+            '<https://cdn.example.com/icons.css>; rel=preload; as=style',
+            f'<{slide.image_url}>; rel=preload; as=image; fetchpriority=high',
+        ])
+
+    def test_project_preloads_its_featured_image(self):
+        project = Project.objects.create(
+            title='Borrowdale Home', location='Harare', project_date='2024-01-01',
+            short_description='-', full_description='-', featured_image='projects/home.jpg',
+        )
+        response = self.client.get(reverse('project_detail', args=[project.slug]))
+        self.assertIn(f'<{project.featured_image_url}>; rel=preload; as=image', response['Link'])
+
+    def test_only_site_pages(self):
+        self.assertFalse(self.client.get(reverse('admin:login')).has_header('Link'))
+        self.assertFalse(self.client.get('/api/v1/testimonials/').has_header('Link'))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, METRICS_DIR='')
+class AnonymousFastPathTests(TestCase):
+
+    def test_catalog_pages_skip_session_and_auth(self):
+        for name in ('home', 'categories_list', 'projects_list', 'about', 'contact', 'quote_request'):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(name))
+            self.assertNotIn('Cookie', response.get('Vary', ''), name)
+            self.assertFalse(response.cookies, name)
+            self.assertFalse([q for q in queries if 'django_session' in q['sql'] or 'auth_user' in q['sql']], name)
+
+    def test_user_is_resolved_without_the_session(self):
+        seen = {}
+
+        def view(request):
+            seen['user'] = request.user
+            return HttpResponse()
+
+        handler = SessionMiddleware(AnonymousFastPathMiddleware(view))
+        response = handler(RequestFactory().get('/'))
+        self.assertFalse(seen['user'].is_authenticated)
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_logged_in_users_are_loaded(self):
+        staff = get_user_model().objects.create_user('editor', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('admin:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'], staff)
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+        self.alive = True
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def _pool(self, **options):
+        def ping(conn):
+            if not conn.alive:
+                raise ConnectionError('gone')
+        return ConnectionPool('test', connect=FakeConnection, ping=ping, **options)
+
+    def test_reuses_connections_up_to_max_size(self):
+        pool = self._pool(max_size=2, timeout=0.05)
+        first, second = pool.acquire(), pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(pool.stats['opened'], 2)
+
+        # A waiting thread gets the next connection returned
+        pool.timeout = 1
+        threading.Timer(0.01, pool.release, [second]).start()
+        self.assertIs(pool.acquire(), second)
+
+    def test_idle_connections_are_checked_and_reaped(self):
+        pool = self._pool(min_size=1, max_size=5, check_after=0, max_idle=0.01)
+        connections = [pool.acquire() for _ in range(3)]
+        for conn in connections:
+            pool.release(conn)
+
+        connections[-1].alive = False
+        replacement = pool.acquire()
+        self.assertTrue(connections[-1].closed)
+        self.assertIs(replacement, connections[1])
+        pool.release(replacement)
+
+        time.sleep(0.02)
+        self.assertEqual(pool.reap(), 1)
+        self.assertEqual((pool.size, pool.idle), (1, 1))
+
+    def test_broken_connections_are_discarded(self):
+        pool = self._pool()
+        conn = pool.acquire()
+        pool.release(conn, discard=True)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.size, 0)
+        self.assertIsNot(pool.acquire(), conn)
+
+    def test_connections_of_exited_threads_are_reclaimed(self):
+        pool = self._pool(max_size=1, timeout=1)
+        leaked = []
+        thread = threading.Thread(target=lambda: leaked.append(pool.acquire()))
+        thread.start()
+        thread.join()
+
+        with self.assertLogs('core.dbpool', 'WARNING'):
+            conn = pool.acquire()
+        self.assertIsNot(conn, leaked[0])
+        self.assertTrue(leaked[0].closed)
+        self.assertEqual(pool.size, 1)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_db_pool', '--threads', '4', '--requests', '5', '--pool-size', '2',
+                     '--hold-ms', '0', stdout=out)
+        self.assertIn('Connections opened: 20 without the pool', out.getvalue())
@@ -0,0 +1,118 @@
+"""
+Registry of CKEditor uploads.
+
+ckeditor_uploader's browse view walks ``CKEDITOR_UPLOAD_PATH`` in storage
+on every open: paginated bucket listings on S3, plus a request per
+thumbnail. Here every upload is recorded in ``EditorUpload`` as it is
+saved (``RegistryPillowBackend``), and the browse dialog pages through
+that table with a search box. ``sync_editor_uploads`` reconciles the table
+with the bucket for files uploaded before the registry existed or removed
+behind its back.
+
+Both views replace the ones ``ckeditor_uploader.urls`` would mount, under
+the same URL names.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.paginator import Paginator
+from django.shortcuts import render
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt
+
+from ckeditor_uploader.backends import PillowBackend
+from ckeditor_uploader.utils import is_valid_image_extension
+from ckeditor_uploader.views import ImageUploadView, _get_user_path
+
+from .models import EditorUpload
+
+_local = threading.local()
+
+
+def read_dimensions(file_object):
+    """(width, height) of an image file object, or (None, None) if unreadable"""
+    from PIL import Image
+    try:
+        file_object.seek(0)
+        with Image.open(file_object) as image:
+            return image.size
+    except Exception:
+        return None, None
+    finally:
+        file_object.seek(0)
+
+
+def register_upload(name, size=None, width=None, height=None, user=None, thumbnail=''):
+    """Create or refresh the registry row of a stored file"""
+    upload, _ = EditorUpload.objects.update_or_create(
+        name=name,
+        defaults={
+            'size': size,
+            'width': width,
+            'height': height,
+            'is_image': is_valid_image_extension(name),
+            'thumbnail': thumbnail,
+            'uploaded_by': user,
+        },
+    )
+    return upload
+
+
+class RegistryPillowBackend(PillowBackend):
+    """The stock Pillow backend, recording each saved file in the registry"""
+
+    thumbnail_name = ''
+
+    def create_thumbnail(self, file_object, file_path):
+        # The storage picks its own collision-free name for the thumbnail too
+        self.thumbnail_name = super().create_thumbnail(file_object, file_path)
+        return self.thumbnail_name
+
+    def save_as(self, filepath):
+        width = height = None
+        if self.is_image:
+            width, height = read_dimensions(self.file_object)
+        saved_path = super().save_as(filepath)
+        register_upload(
+            saved_path, size=self.file_object.size, width=width, height=height,
+            user=getattr(_local, 'user', None), thumbnail=self.thumbnail_name,
+        )
+        return saved_path
+
+
+class RegistryUploadView(ImageUploadView):
+
+    def post(self, request, **kwargs):
+        # The backend is built by the parent view and only gets the file
+        _local.user = request.user if request.user.is_authenticated else None
+        try:
+            return super().post(request, **kwargs)
+        finally:
+            _local.user = None
+
+
+upload = csrf_exempt(staff_member_required(RegistryUploadView.as_view()))
+
+
+@never_cache
+@staff_member_required
+def browse(request):
+    uploads = EditorUpload.objects.only(
+        'name', 'size', 'width', 'height', 'is_image', 'thumbnail', 'uploaded_at'
+    )
+    if getattr(settings, 'CKEDITOR_RESTRICT_BY_USER', False) and not request.user.is_superuser:
+        user_path = os.path.join(settings.CKEDITOR_UPLOAD_PATH, _get_user_path(request.user), '')
+        uploads = uploads.filter(name__startswith=user_path)
+
+    query = request.GET.get('q', '').strip()
+    if query:
+        uploads = uploads.filter(name__icontains=query)
+
+    page = Paginator(uploads, settings.CKEDITOR_BROWSE_PAGE_SIZE).get_page(request.GET.get('page'))
+    return render(request, 'ckeditor/browse_registry.html', {
+        'page': page,
+        'query': query,
+        'func_num': request.GET.get('CKEditorFuncNum', ''),
+    })
@@ -2,6 +2,8 @@ from django.shortcuts import render
 from django.db.models import Count
 from django.db.utils import ProgrammingError, OperationalError
 
+from .hints import preload_image
+from .images import IMAGE_METADATA_FIELDS
 from .models import HeroSlide, Testimonial, TeamMember
 from services.models import ServiceCategory
 from projects.models import Project
@@ -52,7 +54,8 @@ def home(request):
                   .prefetch_related('service_categories')
                   .only(
                       'id', 'slug', 'title', 'featured_image', 
-                      'location', 'short_description', 'category'
+                      'location', 'short_description', 'category',
+                      *IMAGE_METADATA_FIELDS
                   )
                   [:6]
         )
@@ -90,6 +93,10 @@ def home(request):
         print(f"Warning: Could not load team members: {e}")
         team_members = []
     
+    if hero_slides:
+        # The first slide is the largest contentful paint
+        preload_image(request, hero_slides[0].image_url)
+
     context = {
         'hero_slides': hero_slides,
         'featured_categories': featured_categories,
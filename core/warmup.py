@@ -0,0 +1,186 @@
+"""
+Process-local warm-up, run once per worker before it serves traffic.
+
+Without it the first requests after a deploy or worker recycle pay for
+opening the database connection, populating the URL resolver, compiling
+templates and filling the ``site_settings`` / ``nav_categories`` caches.
+``warm_up()`` does all of that up front and logs how long each step took.
+
+It is called from ``tilojnet/wsgi.py`` and ``tilojnet/asgi.py`` when
+settings.WARMUP_ON_BOOT is set. Gunicorn imports the WSGI module in each
+worker after forking, so every worker warms its own templates, caches and
+connection. With ``--preload`` the import (and so the warm-up) runs once
+in the master instead: its compiled templates are inherited by every
+worker, but a database connection must not be, as all workers would talk
+over the one socket. ``warm_up_on_boot`` therefore closes the process's
+connections before any fork (``release_before_fork``), and the
+``post_fork`` hook in ``gunicorn.conf.py`` opens a fresh one in each
+worker.
+"""
+import io
+import logging
+import os
+import sys
+import time
+
+from django.conf import settings
+from django.db import connection, connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+
+def iter_template_names(engine):
+    """Relative names of every .html template in the engine's DIRS"""
+    for template_dir in engine.engine.dirs:
+        for dir_path, _, file_names in os.walk(template_dir):
+            for file_name in sorted(file_names):
+                if file_name.endswith('.html'):
+                    relative = os.path.relpath(os.path.join(dir_path, file_name), template_dir)
+                    yield relative.replace(os.sep, '/')
+
+
+def compile_templates():
+    """Load every project template through the engine so its loader cache holds it compiled"""
+    compiled = 0
+    for engine in engines.all():
+        if not hasattr(engine, 'engine'):
+            continue
+        for name in iter_template_names(engine):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as e:
+                logger.warning(f"Warm-up could not compile {name}: {e}")
+                continue
+            compiled += 1
+    return compiled
+
+
+def open_database():
+    connection.ensure_connection()
+
+
+def populate_urls():
+    get_resolver()._populate()
+    reverse('home')
+
+
+def prime_caches():
+    from core.templatetags.site_extras import get_nav_categories, get_site_settings
+    get_site_settings()
+    get_nav_categories()
+
+
+def wsgi_get(application, path, host):
+    """GET a path through a WSGI application in-process; returns the status code"""
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '443',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': host,
+        'wsgi.url_scheme': 'https',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+    status = []
+    response = application(environ, lambda code, headers, exc_info=None: status.append(code))
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return int(status[0].split()[0])
+
+
+def default_host():
+    return next((host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')), 'localhost')
+
+
+def self_request(application, url_names):
+    """GET the given URL names through the worker's own WSGI handler; returns {path: (status, ms)}"""
+    host = default_host()
+    results = {}
+    for name in url_names:
+        path = reverse(name)
+        started = time.perf_counter()
+        status = wsgi_get(application, path, host)
+        results[path] = (status, (time.perf_counter() - started) * 1000)
+    return results
+
+
+def warm_up(application=None, self_requests=None):
+    """
+    Warm this process up
+
+    Every step is best effort: a failure is logged and the worker still
+    boots.
+
+    Args:
+        application: The worker's WSGI application, needed for self-requests
+        self_requests: GET settings.WARMUP_URLS through ``application``
+            afterwards, default settings.WARMUP_SELF_REQUESTS
+
+    Returns:
+        Dict of step name to milliseconds, plus 'total'
+    """
+    if self_requests is None:
+        self_requests = settings.WARMUP_SELF_REQUESTS
+
+    steps = [
+        ('database', open_database),
+        ('urls', populate_urls),
+        ('templates', compile_templates),
+        ('caches', prime_caches),
+    ]
+    if self_requests and application is not None:
+        steps.append(('requests', lambda: self_request(application, settings.WARMUP_URLS)))
+
+    timings = {}
+    details = {}
+    started = time.perf_counter()
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            details[name] = step()
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+        timings[name] = (time.perf_counter() - step_started) * 1000
+    timings['total'] = (time.perf_counter() - started) * 1000
+
+    summary = ', '.join(f'{name} {ms:.0f}ms' for name, ms in timings.items() if name != 'total')
+    logger.info(
+        f"Worker {os.getpid()} warmed up in {timings['total']:.0f}ms "
+        f"({summary}; {details.get('templates', 0)} templates)"
+    )
+    for path, (status, ms) in (details.get('requests') or {}).items():
+        logger.info(f"  warm-up GET {path}: {status} in {ms:.0f}ms")
+    return timings
+
+
+def release_before_fork():
+    """Close this process's database connections, so a forked child never shares their sockets"""
+    from .dbpool import close_pools
+    connections.close_all()
+    close_pools()
+
+
+_fork_guard = []
+
+
+def warm_up_on_boot(application=None):
+    """
+    Entry point for the WSGI/ASGI modules
+
+    Self-requests need a WSGI application; the ASGI module passes none.
+    """
+    if getattr(settings, 'WARMUP_ON_BOOT', False):
+        warm_up(application)
+        if not _fork_guard:
+            # gunicorn --preload: this ran in the master, which forks the workers next
+            os.register_at_fork(before=release_before_fork)
+            _fork_guard.append(True)
@@ -0,0 +1,19 @@
+"""
+Gunicorn settings, read from the working directory on start.
+
+``tilojnet/wsgi.py`` warms each worker up as it is imported. With
+``--preload`` that import happens once in the master, which closes its
+database connections before forking (see core/warmup.py); ``post_fork``
+then opens each worker's own connection so its first request does not
+pay for it.
+"""
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        # The worker imports the app, and warms up, after this hook
+        return
+    from django.conf import settings
+    if getattr(settings, 'WARMUP_ON_BOOT', False):
+        from core.warmup import open_database
+        open_database()
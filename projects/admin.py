@@ -1,5 +1,9 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.html import format_html
+
+from core.admin import ConcurrentUploadMixin
+from core.media import thumbnail_url
 from .models import *
 
 @admin.register(ProjectCategory)
@@ -8,10 +12,16 @@ class ProjectCategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     list_editable = ['order']
     list_filter = ['service_category']
+    list_select_related = ['service_category']
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_project_count=Count('projects'))
     
     def project_count(self, obj):
-        return obj.projects.count()
+        return obj._project_count
     project_count.short_description = 'Projects'
+    project_count.admin_order_field = '_project_count'
 
 
 class ProjectImageInline(admin.TabularInline):
@@ -21,10 +31,12 @@ class ProjectImageInline(admin.TabularInline):
 
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(ConcurrentUploadMixin, admin.ModelAdmin):
     list_display = ['title', 'category', 'status', 'location', 'is_featured', 'is_published', 'views_count', 'image_preview']
     list_filter = ['category', 'service_categories', 'status', 'is_featured', 'is_published', 'project_date']
     list_editable = ['is_featured', 'is_published']
+    list_select_related = ['category']
+    show_full_result_count = False
     search_fields = ['title', 'client_name', 'location']
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'project_date'
@@ -55,6 +67,6 @@ class ProjectAdmin(admin.ModelAdmin):
     
     def image_preview(self, obj):
         if obj.featured_image:
-            return format_html('<img src="{}" width="80" />', obj.featured_image.url)
+            return format_html('<img src="{}" width="80" />', thumbnail_url(obj.featured_image, 160))
         return '-'
     image_preview.short_description = 'Preview'
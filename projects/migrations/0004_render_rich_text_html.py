@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def render_html(apps, schema_editor):
+    # Templates output only the sanitized copy, so rows saved before it existed need one
+    from core.richtext import render_stored_rich_text
+    render_stored_rich_text(apps.get_model('projects', 'Project'), ('full_description', 'challenge', 'solution', 'result'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_image_metadata'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_html, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
 from django.utils.text import slugify
 from ckeditor.fields import RichTextField
+
+from core.images import ImageMetadataModel
+from core.media import media_url
+from core.richtext import PrerenderedRichTextMixin
 from services.models import ServiceCategory
 from .managers import ProjectManager
 
@@ -28,7 +32,7 @@ class ProjectCategory(models.Model):
         return self.name
 
 
-class Project(models.Model):
+class Project(PrerenderedRichTextMixin, ImageMetadataModel):
     STATUS_CHOICES = [
         ('completed', 'Completed'),
         ('ongoing', 'Ongoing'),
@@ -58,6 +62,12 @@ class Project(models.Model):
     solution = RichTextField(blank=True)
     result = RichTextField(blank=True)
 
+    # Rendered by PrerenderedRichTextMixin on save
+    full_description_html = models.TextField(blank=True, editable=False)
+    challenge_html = models.TextField(blank=True, editable=False)
+    solution_html = models.TextField(blank=True, editable=False)
+    result_html = models.TextField(blank=True, editable=False)
+
     featured_image = models.ImageField(upload_to='projects/')
     budget_range = models.CharField(max_length=100, blank=True)
     duration = models.CharField(max_length=100, blank=True)
@@ -74,6 +84,9 @@ class Project(models.Model):
 
     objects = ProjectManager()
 
+    rich_text_fields = ('full_description', 'challenge', 'solution', 'result')
+    image_metadata_field = 'featured_image'
+
     class Meta:
         ordering = ['-project_date', '-created_at']
 
@@ -82,11 +95,15 @@ class Project(models.Model):
             self.slug = slugify(self.title)
         super().save(*args, **kwargs)
 
+    @property
+    def featured_image_url(self):
+        return media_url(self.featured_image)
+
     def __str__(self):
         return self.title
 
 
-class ProjectImage(models.Model):
+class ProjectImage(ImageMetadataModel):
     project = models.ForeignKey(
         Project, on_delete=models.CASCADE, related_name='images'
     )
@@ -97,5 +114,9 @@ class ProjectImage(models.Model):
     class Meta:
         ordering = ['order']
 
+    @property
+    def image_url(self):
+        return media_url(self.image)
+
     def __str__(self):
         return f"{self.project.title} - Image {self.order}"
\ No newline at end of file
@@ -1,3 +1,83 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from services.models import ServiceCategory
+from .models import Project, ProjectCategory
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ProjectAdminChangelistTests(TestCase):
+    """Changelist query count must not grow with the number of rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.service_category = ServiceCategory.objects.create(
+            name='Kitchens', icon='fa-utensils', description='Kitchens',
+            featured_image='categories/kitchens.jpg',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def _create_rows(self, total):
+        categories = ProjectCategory.objects.bulk_create(
+            ProjectCategory(
+                name=f'Category {i}', slug=f'category-{i}', description='-',
+                service_category=self.service_category,
+            )
+            for i in range(total)
+        )
+        Project.objects.bulk_create(
+            Project(
+                title=f'Project {i}', slug=f'project-{i}',
+                category=categories[i % len(categories)],
+                location='Harare', project_date=datetime.date(2024, 1, 1),
+                short_description='-', full_description='-',
+                featured_image=f'projects/project-{i}.jpg',
+            )
+            for i in range(total)
+        )
+
+    def _changelist_queries(self, url_name):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_changelist_query_count_is_constant(self):
+        for url_name in ('admin:projects_project_changelist',
+                         'admin:projects_projectcategory_changelist'):
+            counts = []
+            for total in (10, 100, 1000):
+                Project.objects.all().delete()
+                ProjectCategory.objects.all().delete()
+                self._create_rows(total)
+                counts.append(self._changelist_queries(url_name))
+            self.assertEqual(len(set(counts)), 1, f'{url_name}: {counts}')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, METRICS_DIR='')
+class ProjectDetailTests(TestCase):
+
+    def test_rich_text_sanitized_to_nothing_is_not_shown_raw(self):
+        category = ProjectCategory.objects.create(name='Residential', description='-')
+        project = Project.objects.create(
+            title='Villa', category=category, location='Harare', project_date=datetime.date(2024, 1, 1),
+            short_description='-', full_description='<script>alert(1)</script>',
+            challenge='<p>Tight <b>site</b></p><img src=x onerror=alert(2)>',
+            featured_image='projects/villa.jpg',
+        )
+        self.assertEqual(project.full_description_html, '')
+
+        response = self.client.get(reverse('project_detail', args=[project.slug]))
+        self.assertNotContains(response, 'alert(1)')
+        self.assertNotContains(response, 'onerror')
+        self.assertContains(response, 'Tight <b>site</b>')
@@ -2,6 +2,9 @@ from django.shortcuts import render, get_object_or_404
 from django.core.paginator import Paginator
 from django.db.models import F
 
+from core.hints import preload_image
+from core.images import IMAGE_METADATA_FIELDS
+
 from .models import Project, ProjectCategory
 
 
@@ -47,10 +50,12 @@ def project_detail(request, slug):
         Project.objects.filter(is_published=True, category=project.category)
                       .exclude(id=project.id)
                       .select_related('category')
-                      .only('id', 'slug', 'title', 'featured_image', 'location', 'category')
+                      .only('id', 'slug', 'title', 'featured_image', 'location', 'category', *IMAGE_METADATA_FIELDS)
                       [:3]
     )
     
+    preload_image(request, project.featured_image_url)
+
     context = {
         'project': project,
         'related_projects': related_projects,
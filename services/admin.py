@@ -1,5 +1,9 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.html import format_html
+
+from core.admin import ConcurrentUploadMixin
+from core.media import thumbnail_url
 from .models import *
 
 @admin.register(ServiceCategory)
@@ -9,6 +13,7 @@ class ServiceCategoryAdmin(admin.ModelAdmin):
     list_editable = ['order', 'is_featured']
     list_filter = ['is_featured', 'created_at']
     search_fields = ['name', 'description']
+    show_full_result_count = False
     
     fieldsets = (
         ('Basic Information', {
@@ -22,14 +27,17 @@ class ServiceCategoryAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_item_count=Count('items'))
+    
     def item_count(self, obj):
-        count = obj.items.count()
-        return format_html('<span class="badge badge-info">{}</span>', count)
+        return format_html('<span class="badge badge-info">{}</span>', obj._item_count)
     item_count.short_description = 'Items'
+    item_count.admin_order_field = '_item_count'
     
     def image_preview(self, obj):
         if obj.featured_image:
-            return format_html('<img src="{}" width="80" />', obj.featured_image.url)
+            return format_html('<img src="{}" width="80" />', thumbnail_url(obj.featured_image, 160))
         return '-'
     image_preview.short_description = 'Preview'
 
@@ -41,10 +49,12 @@ class CategoryItemImageInline(admin.TabularInline):
 
 
 @admin.register(CategoryItem)
-class CategoryItemAdmin(admin.ModelAdmin):
+class CategoryItemAdmin(ConcurrentUploadMixin, admin.ModelAdmin):
     list_display = ['name', 'category', 'price_range', 'duration', 'is_popular', 'is_new', 'order', 'image_preview']
     list_filter = ['category', 'is_popular', 'is_new', 'created_at']
     list_editable = ['is_popular', 'is_new', 'order']
+    list_select_related = ['category']
+    show_full_result_count = False
     search_fields = ['name', 'short_description', 'full_description']
     prepopulated_fields = {'slug': ('name',)}
     date_hierarchy = 'created_at'
@@ -74,7 +84,7 @@ class CategoryItemAdmin(admin.ModelAdmin):
     
     def image_preview(self, obj):
         if obj.featured_image:
-            return format_html('<img src="{}" width="80" />', obj.featured_image.url)
+            return format_html('<img src="{}" width="80" />', thumbnail_url(obj.featured_image, 160))
         return '-'
     image_preview.short_description = 'Preview'
 
@@ -0,0 +1,636 @@
+"""
+Bulk import/export of catalog content.
+
+Catalog records are plain dicts with a ``type`` key (one of RECORD_TYPES)
+plus model field values. Related rows are referenced by slug, gallery
+images are nested lists of ``{"image", "caption", "order"}`` dicts, and
+image values are paths relative to an image directory (or already-stored
+storage names when no directory is given).
+
+Slugs are the natural key: a record whose slug already exists updates that
+row, anything else is created. A record without a slug gets one made from
+its name, which may only match a row of the same name (a re-import); a
+generated slug that would take over a differently named row, or another
+record of the import, is rejected with the record's number. Writes go
+through ``bulk_create`` / ``bulk_update`` one chunk per transaction, so the
+per-row ``save()`` slug path on the models is never hit.
+"""
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+from django.utils.text import slugify
+
+from api.cache import bump_api_version
+from core.images import IMAGE_METADATA_FIELDS, ImageMetadataModel
+from core.purge import purge_dispatcher
+from core.richtext import PrerenderedRichTextMixin
+from core.storage import releases_connections
+from projects.models import Project, ProjectCategory, ProjectImage
+from .choices import bump_choices_version
+from .models import ServiceCategory, CategoryItem, CategoryItemImage
+
+logger = logging.getLogger(__name__)
+
+# Dependency order: parents are written before the rows referencing them
+RECORD_TYPES = ('category', 'project_category', 'item', 'project')
+
+CATALOG_MODELS = {
+    'category': ServiceCategory,
+    'project_category': ProjectCategory,
+    'item': CategoryItem,
+    'project': Project,
+}
+
+CATALOG_FIELDS = {
+    'category': [
+        'name', 'slug', 'description', 'icon', 'featured_image',
+        'banner_image', 'is_featured', 'order',
+    ],
+    'project_category': [
+        'name', 'slug', 'description', 'service_category', 'order',
+    ],
+    'item': [
+        'category', 'name', 'slug', 'short_description', 'full_description',
+        'featured_image', 'price_range', 'duration', 'ideal_space_size',
+        'key_features', 'materials_used', 'design_styles', 'is_popular',
+        'is_new', 'order', 'gallery',
+    ],
+    'project': [
+        'title', 'slug', 'category', 'service_categories', 'client_name',
+        'location', 'project_date', 'status', 'short_description',
+        'full_description', 'challenge', 'solution', 'result',
+        'featured_image', 'budget_range', 'duration', 'area_sqm', 'tags',
+        'is_featured', 'is_published', 'images',
+    ],
+}
+
+# Nested gallery key and model per record type
+GALLERIES = {
+    'item': ('gallery', CategoryItemImage, 'item_id'),
+    'project': ('images', ProjectImage, 'project_id'),
+}
+
+# Every page showing imported content carries one of these (see core.surrogate)
+CATALOG_SURROGATE_KEYS = {'categories', 'items', 'project-categories', 'projects'}
+
+# Fields referencing other rows by slug, not stored as plain columns
+REFERENCE_FIELDS = {'category', 'service_category', 'service_categories'}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y', 't')
+
+
+def decode_csv_row(row, record_type):
+    """Convert a flat CSV row into a catalog record."""
+    record_type = row.pop('type', None) or record_type
+    model = CATALOG_MODELS[record_type]
+    record = {'type': record_type}
+
+    for key, value in row.items():
+        if key is None or value is None:
+            continue
+        if key in ('gallery', 'images', 'service_categories'):
+            record[key] = json.loads(value) if value else []
+            continue
+        if key in REFERENCE_FIELDS:
+            record[key] = value or None
+            continue
+
+        field = model._meta.get_field(key)
+        if isinstance(field, models.BooleanField):
+            record[key] = _parse_bool(value)
+        elif isinstance(field, models.IntegerField):
+            record[key] = int(value) if value else field.get_default()
+        elif isinstance(field, models.JSONField):
+            record[key] = json.loads(value) if value else []
+        elif value == '' and field.null:
+            record[key] = None
+        else:
+            record[key] = value
+    return record
+
+
+def read_records(stream, fmt='jsonl', record_type=None):
+    """Yield catalog records from a JSONL or CSV text stream."""
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield decode_csv_row(row, record_type)
+        return
+
+    for line in stream:
+        line = line.strip()
+        if line:
+            record = json.loads(line)
+            record.setdefault('type', record_type)
+            yield record
+
+
+class CatalogImporter:
+    """
+    Chunked, transactional catalog importer.
+
+    Images referenced by a chunk are uploaded concurrently before the
+    chunk's transaction opens, so slow storage round-trips never hold
+    database locks.
+    """
+
+    def __init__(self, image_dir=None, chunk_size=500, workers=8,
+                 dry_run=False, progress=None):
+        self.image_dir = image_dir
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.dry_run = dry_run
+        self.progress = progress
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        # slug -> {'id': ..., 'name': ...} caches shared across chunks
+        self.categories = {}
+        self.project_categories = {}
+        self._numbers = {}
+
+    def run(self, records):
+        started = time.monotonic()
+        processed = 0
+
+        # A dry run keeps every chunk in one outer transaction so later
+        # chunks can still resolve slugs created earlier, then discards it.
+        with transaction.atomic() if self.dry_run else nullcontext():
+            for chunk in chunked(records, self.chunk_size):
+                self.import_chunk(chunk, first_number=processed + 1)
+                processed += len(chunk)
+                if self.progress:
+                    self.progress(processed, time.monotonic() - started)
+            if self.dry_run:
+                transaction.set_rollback(True)
+
+        if not self.dry_run:
+            # bulk writes skip the model signals that normally do this
+            bump_choices_version()
+            purge_dispatcher.queue(CATALOG_SURROGATE_KEYS)
+            bump_api_version()
+        return self.stats
+
+    def import_chunk(self, records, first_number=1):
+        # Record numbers (1-based, across chunks) for error messages
+        self._numbers = {id(record): first_number + i for i, record in enumerate(records)}
+        by_type = defaultdict(list)
+        for record in records:
+            record_type = record.get('type')
+            if record_type not in CATALOG_MODELS:
+                raise ValueError(f"Unknown catalog record type: {record_type!r}")
+            by_type[record_type].append(record)
+
+        self._upload_images(records)
+
+        with transaction.atomic():
+            for record_type in RECORD_TYPES:
+                if by_type[record_type]:
+                    getattr(self, f'_import_{record_type}s')(by_type[record_type])
+
+    # ============= IMAGES =============
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _image_slots(self, record):
+        """Yield (container, key, upload_to) for every image in a record."""
+        model = CATALOG_MODELS[record['type']]
+        for field in model._meta.fields:
+            if isinstance(field, models.ImageField) and record.get(field.name):
+                yield record, field.name, field.upload_to
+
+        if record['type'] in GALLERIES:
+            key, gallery_model, _ = GALLERIES[record['type']]
+            upload_to = gallery_model._meta.get_field('image').upload_to
+            for entry in record.get(key) or []:
+                if entry.get('image'):
+                    yield entry, 'image', upload_to
+
+    def _upload_images(self, records):
+        if not self.image_dir:
+            return
+
+        slots = [slot for record in records for slot in self._image_slots(record)]
+        pending = list({(upload_to, container[key]) for container, key, upload_to in slots})
+        if not pending:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            stored = dict(zip(pending, pool.map(releases_connections(self._upload_image), pending)))
+
+        for container, key, upload_to in slots:
+            container[key] = stored[(upload_to, container[key])]
+
+    def _upload_image(self, target):
+        upload_to, relative_path = target
+        path = os.path.join(self.image_dir, relative_path)
+        name = upload_to + os.path.basename(relative_path)
+
+        if not os.path.isfile(path):
+            logger.warning(f"Catalog image not found: {path}")
+            self._count('missing_images')
+            return relative_path
+
+        if self.dry_run:
+            return name
+
+        with open(path, 'rb') as fh:
+            name = default_storage.save(name, File(fh))
+        self._count('images_uploaded')
+        return name
+
+    # ============= LOOKUPS =============
+
+    def _resolve(self, cache, model, slugs):
+        missing = {slug for slug in slugs if slug and slug not in cache}
+        if missing:
+            for row in model.objects.filter(slug__in=missing).values('id', 'slug', 'name'):
+                cache[row['slug']] = row
+        return cache
+
+    def _remember(self, cache, objs):
+        for obj in objs:
+            cache[obj.slug] = {'id': obj.pk, 'slug': obj.slug, 'name': obj.name}
+
+    # ============= WRITES =============
+
+    def _build(self, record):
+        model = CATALOG_MODELS[record['type']]
+        data = {
+            name: record[name]
+            for name in CATALOG_FIELDS[record['type']]
+            if name in record and name not in REFERENCE_FIELDS and name not in ('gallery', 'images')
+        }
+        obj = model(**data)
+        if isinstance(obj, PrerenderedRichTextMixin):
+            # bulk writes skip save(), which normally renders these
+            obj.render_rich_text()
+        return obj
+
+    def _update_fields(self, model, records, extra=()):
+        provided = {
+            name for record in records for name in record
+            if name in CATALOG_FIELDS[record['type']]
+            and name not in REFERENCE_FIELDS and name not in ('slug', 'gallery', 'images')
+        }
+        provided |= {f'{name}_html' for name in provided if name in getattr(model, 'rich_text_fields', ())}
+        if issubclass(model, ImageMetadataModel) and model.image_metadata_field in provided:
+            # Cleared for backfill_image_metadata: bulk writes skip save(), which measures the image
+            provided |= set(IMAGE_METADATA_FIELDS)
+        fields = sorted(provided | set(extra))
+        if any(field.name == 'updated_at' for field in model._meta.fields):
+            fields.append('updated_at')
+        return fields
+
+    def _generate_slug(self, record, obj, source, generated):
+        """Fill in a missing slug from ``source``, noting the record for _check_generated_slugs"""
+        if not obj.slug:
+            obj.slug = slugify(source)
+            generated.add(id(record))
+
+    def _check_generated_slugs(self, model, pairs, key, generated):
+        """
+        Reject generated slugs that would update a differently named row
+
+        Two names can slugify alike ("Kitchen & Bath", "Kitchen Bath"), and
+        upserting on the slug would silently overwrite the other row.
+        """
+        if not generated:
+            return
+        name_field = 'title' if model is Project else 'name'
+        groups = defaultdict(list)
+        for record, obj in pairs:
+            groups[key(obj)].append((record, obj))
+        groups = {k: members for k, members in groups.items() if any(id(r) in generated for r, _ in members)}
+
+        key_fields = ['category'] if model is CategoryItem else []
+        owners = {
+            key(obj): getattr(obj, name_field)
+            for obj in model.objects.filter(slug__in={obj.slug for members in groups.values() for _, obj in members})
+                                    .only('id', 'slug', name_field, *key_fields)
+        }
+
+        label = model._meta.verbose_name
+        for k, members in groups.items():
+            if not members[0][1].slug:
+                number = self._numbers.get(id(members[0][0]), '?')
+                name = getattr(members[0][1], name_field)
+                raise ValueError(f"Record {number}: no {label} slug can be made from {name!r}; give it a slug")
+            # The first to hold the slug keeps it: the stored row, else the earliest record
+            first = owners.get(k, getattr(members[0][1], name_field))
+            clash = next(((r, o) for r, o in members if getattr(o, name_field) != first), None)
+            if clash is None:
+                continue
+            if id(clash[0]) in generated:
+                record, other = clash[0], first
+            else:
+                # An explicit slug taking over a generated one
+                record = next(r for r, _ in members if id(r) in generated)
+                other = getattr(clash[1], name_field)
+            raise ValueError(
+                f"Record {self._numbers.get(id(record), '?')}: {label} slug {clash[1].slug!r} "
+                f"made from its name is already used by {other!r}; give it its own slug"
+            )
+
+    def _upsert(self, model, pairs, key, update_fields, generated=()):
+        """
+        Create or update ``(record, obj)`` pairs matched on ``key(obj)``.
+
+        Later records win when a chunk repeats a key. ``generated`` holds the
+        ids of records whose slug was made from their name. Returns the
+        de-duplicated pairs with primary keys populated.
+        """
+        self._check_generated_slugs(model, pairs, key, generated)
+        pairs = list({key(obj): (record, obj) for record, obj in pairs}.values())
+        slugs = {obj.slug for _, obj in pairs}
+        key_fields = ['category'] if model is CategoryItem else []
+        existing = {
+            key(obj): obj.pk
+            for obj in model.objects.filter(slug__in=slugs).only('id', 'slug', *key_fields)
+        }
+
+        now = timezone.now()
+        created, updated = [], []
+        for _, obj in pairs:
+            pk = existing.get(key(obj))
+            if pk is None:
+                created.append(obj)
+            else:
+                obj.pk = pk
+                if hasattr(obj, 'updated_at'):
+                    obj.updated_at = now
+                updated.append(obj)
+
+        label = model._meta.model_name
+        if created:
+            model.objects.bulk_create(created, batch_size=self.chunk_size)
+            self._count(f'{label}_created', len(created))
+        if updated and update_fields:
+            model.objects.bulk_update(updated, update_fields, batch_size=self.chunk_size)
+            self._count(f'{label}_updated', len(updated))
+        return pairs
+
+    def _replace_gallery(self, record_type, pairs):
+        key, gallery_model, fk_name = GALLERIES[record_type]
+        pairs = [(record, obj) for record, obj in pairs if key in record]
+        if not pairs:
+            return
+
+        gallery_model.objects.filter(**{f'{fk_name}__in': [obj.pk for _, obj in pairs]}).delete()
+        images = [
+            gallery_model(**{
+                fk_name: obj.pk,
+                'image': entry['image'],
+                'caption': entry.get('caption', ''),
+                'order': entry.get('order', position),
+            })
+            for record, obj in pairs
+            for position, entry in enumerate(record[key] or [])
+            if entry.get('image')
+        ]
+        gallery_model.objects.bulk_create(images, batch_size=self.chunk_size)
+        self._count(f'{gallery_model._meta.model_name}_created', len(images))
+
+    def _skip(self, record, reason):
+        logger.warning(f"Skipping {record['type']} {record.get('slug') or record.get('name') or record.get('title')!r}: {reason}")
+        self._count('skipped')
+
+    def _import_categorys(self, records):
+        pairs, generated = [], set()
+        for record in records:
+            obj = self._build(record)
+            self._generate_slug(record, obj, obj.name, generated)
+            pairs.append((record, obj))
+
+        pairs = self._upsert(
+            ServiceCategory, pairs, key=lambda obj: obj.slug,
+            update_fields=self._update_fields(ServiceCategory, records), generated=generated,
+        )
+        self._remember(self.categories, [obj for _, obj in pairs])
+
+    def _import_project_categorys(self, records):
+        self._resolve(self.categories, ServiceCategory, {r.get('service_category') for r in records})
+
+        pairs, generated = [], set()
+        for record in records:
+            obj = self._build(record)
+            self._generate_slug(record, obj, obj.name, generated)
+            parent = self.categories.get(record.get('service_category'))
+            obj.service_category_id = parent['id'] if parent else None
+            pairs.append((record, obj))
+
+        extra = ['service_category'] if any('service_category' in r for r in records) else []
+        pairs = self._upsert(
+            ProjectCategory, pairs, key=lambda obj: obj.slug,
+            update_fields=self._update_fields(ProjectCategory, records, extra), generated=generated,
+        )
+        self._remember(self.project_categories, [obj for _, obj in pairs])
+
+    def _import_items(self, records):
+        self._resolve(self.categories, ServiceCategory, {r.get('category') for r in records})
+
+        pairs, generated = [], set()
+        for record in records:
+            category = self.categories.get(record.get('category'))
+            if category is None:
+                self._skip(record, f"unknown category {record.get('category')!r}")
+                continue
+            obj = self._build(record)
+            obj.category_id = category['id']
+            self._generate_slug(record, obj, f"{category['name']}-{obj.name}", generated)
+            pairs.append((record, obj))
+
+        pairs = self._upsert(
+            CategoryItem, pairs, key=lambda obj: (obj.category_id, obj.slug),
+            update_fields=self._update_fields(CategoryItem, records), generated=generated,
+        )
+        self._replace_gallery('item', pairs)
+
+    def _import_projects(self, records):
+        self._resolve(self.project_categories, ProjectCategory, {r.get('category') for r in records})
+        self._resolve(self.categories, ServiceCategory, {
+            slug for r in records for slug in r.get('service_categories') or []
+        })
+
+        pairs, generated = [], set()
+        for record in records:
+            obj = self._build(record)
+            self._generate_slug(record, obj, obj.title, generated)
+            category = self.project_categories.get(record.get('category'))
+            obj.category_id = category['id'] if category else None
+            pairs.append((record, obj))
+
+        extra = ['category'] if any('category' in r for r in records) else []
+        pairs = self._upsert(
+            Project, pairs, key=lambda obj: obj.slug,
+            update_fields=self._update_fields(Project, records, extra), generated=generated,
+        )
+        self._replace_gallery('project', pairs)
+        self._set_service_categories(pairs)
+
+    def _set_service_categories(self, pairs):
+        through = Project.service_categories.through
+        pairs = [(record, obj) for record, obj in pairs if 'service_categories' in record]
+        if not pairs:
+            return
+
+        through.objects.filter(project_id__in=[obj.pk for _, obj in pairs]).delete()
+        links = [
+            through(project_id=obj.pk, servicecategory_id=self.categories[slug]['id'])
+            for record, obj in pairs
+            for slug in dict.fromkeys(record['service_categories'] or [])
+            if slug in self.categories
+        ]
+        through.objects.bulk_create(links, batch_size=self.chunk_size)
+
+
+class CatalogExporter:
+    """
+    Stream catalog records chunk by chunk.
+
+    Querysets are read with ``.iterator(chunk_size=...)`` so prefetches run
+    once per chunk and memory stays flat. When ``image_dir`` is set, the
+    stored images of each chunk are downloaded concurrently before the
+    chunk's records are yielded.
+    """
+
+    def __init__(self, image_dir=None, chunk_size=500, workers=8):
+        self.image_dir = image_dir
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.images_downloaded = 0
+
+    def records(self, record_types=RECORD_TYPES):
+        for record_type in RECORD_TYPES:
+            if record_type not in record_types:
+                continue
+            rows = getattr(self, f'_export_{record_type}s')()
+            for chunk in chunked(rows, self.chunk_size):
+                self._download_images(chunk)
+                yield from chunk
+
+    def _row(self, record_type, obj):
+        record = {'type': record_type}
+        for name in CATALOG_FIELDS[record_type]:
+            if name in REFERENCE_FIELDS or name in ('gallery', 'images'):
+                continue
+            value = getattr(obj, name)
+            record[name] = value.name if isinstance(value, FieldFile) else value
+        return record
+
+    def _gallery(self, images):
+        return [
+            {'image': img.image.name, 'caption': img.caption, 'order': img.order}
+            for img in images
+        ]
+
+    def _export_categorys(self):
+        for obj in ServiceCategory.objects.order_by('pk').iterator(chunk_size=self.chunk_size):
+            yield self._row('category', obj)
+
+    def _export_project_categorys(self):
+        queryset = ProjectCategory.objects.select_related('service_category').order_by('pk')
+        for obj in queryset.iterator(chunk_size=self.chunk_size):
+            record = self._row('project_category', obj)
+            record['service_category'] = obj.service_category.slug if obj.service_category else None
+            yield record
+
+    def _export_items(self):
+        queryset = (
+            CategoryItem.objects.select_related('category')
+                               .prefetch_related('gallery')
+                               .order_by('pk')
+        )
+        for obj in queryset.iterator(chunk_size=self.chunk_size):
+            record = self._row('item', obj)
+            record['category'] = obj.category.slug
+            record['gallery'] = self._gallery(obj.gallery.all())
+            yield record
+
+    def _export_projects(self):
+        queryset = (
+            Project.objects.select_related('category')
+                          .prefetch_related('service_categories', 'images')
+                          .order_by('pk')
+        )
+        for obj in queryset.iterator(chunk_size=self.chunk_size):
+            record = self._row('project', obj)
+            record['category'] = obj.category.slug if obj.category else None
+            record['service_categories'] = [c.slug for c in obj.service_categories.all()]
+            record['images'] = self._gallery(obj.images.all())
+            yield record
+
+    def _download_images(self, records):
+        if not self.image_dir:
+            return
+
+        names = set()
+        for record in records:
+            model = CATALOG_MODELS[record['type']]
+            for field in model._meta.fields:
+                if isinstance(field, models.ImageField) and record.get(field.name):
+                    names.add(record[field.name])
+            if record['type'] in GALLERIES:
+                key = GALLERIES[record['type']][0]
+                names.update(entry['image'] for entry in record.get(key) or [] if entry['image'])
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            self.images_downloaded += sum(pool.map(self._download_image, names))
+
+    def _download_image(self, name):
+        path = os.path.join(self.image_dir, name)
+        if os.path.exists(path):
+            return 0
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with default_storage.open(name, 'rb') as src, open(path, 'wb') as dst:
+                for block in src.chunks():
+                    dst.write(block)
+            return 1
+        except Exception as e:
+            logger.warning(f"Could not download catalog image {name}: {e}")
+            return 0
+
+
+def write_records(records, stream, fmt='jsonl', record_type=None):
+    """Write catalog records to a text stream as JSONL or CSV."""
+    if fmt == 'jsonl':
+        for record in records:
+            stream.write(json.dumps(record, cls=DjangoJSONEncoder) + '\n')
+            yield record
+        return
+
+    fieldnames = ['type'] + CATALOG_FIELDS[record_type]
+    writer = csv.DictWriter(stream, fieldnames=fieldnames)
+    writer.writeheader()
+    for record in records:
+        row = {
+            key: json.dumps(value, cls=DjangoJSONEncoder) if isinstance(value, (list, dict)) else value
+            for key, value in record.items()
+        }
+        writer.writerow(row)
+        yield record
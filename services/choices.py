@@ -0,0 +1,68 @@
+"""
+Cached choice data for the quote form.
+
+Category and item choices are cached under a version number that the
+catalog signals bump on every change, so stale entries simply stop being
+read and expire on their own. The bump only reaches the workers that share
+the cache, so with a per-worker cache (LocMemCache) entries are kept for
+just settings.CATALOG_CHOICES_CACHE_SECONDS.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.surrogate import add_surrogate_keys
+
+from .models import ServiceCategory, CategoryItem
+
+VERSION_KEY = 'catalog_choices_version'
+
+
+def get_choices_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_choices_version():
+    """Invalidate every cached choice list."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, None)
+
+
+def _cached(name, loader):
+    key = f'catalog_choices:{name}:v{get_choices_version()}'
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        cache.set(key, value, settings.CATALOG_CHOICES_CACHE_SECONDS)
+    return value
+
+
+def get_category_choices():
+    """List of {'id', 'name', 'slug'} dicts for every service category."""
+    add_surrogate_keys('categories')
+    return _cached('categories', lambda: list(
+        ServiceCategory.objects.values('id', 'name', 'slug')
+    ))
+
+
+def get_items_by_category():
+    """Map of category id to its list of {'id', 'name', 'slug'} item dicts."""
+    add_surrogate_keys('categories', 'items')
+    def load():
+        grouped = defaultdict(list)
+        for item in CategoryItem.objects.values('id', 'name', 'slug', 'category_id'):
+            category_id = item.pop('category_id')
+            grouped[category_id].append(item)
+        return dict(grouped)
+    return _cached('items_by_category', load)
+
+
+def get_category_items(category_id):
+    return get_items_by_category().get(category_id, [])
@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from services.catalog import CATALOG_MODELS, CatalogImporter, read_records
+
+
+class Command(BaseCommand):
+    help = 'Bulk import catalog content (categories, items, projects) from JSONL or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, or "-" for stdin')
+        parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+        parser.add_argument(
+            '--type', dest='record_type', choices=list(CATALOG_MODELS),
+            help='Record type for rows without a "type" column (required for CSV without one)',
+        )
+        parser.add_argument('--images', dest='image_dir', help='Directory holding the referenced image files')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent image uploads')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and roll back without writing')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+
+        importer = CatalogImporter(
+            image_dir=options['image_dir'],
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+            progress=self.report_progress,
+        )
+
+        try:
+            stats = importer.run(read_records(stream, options['format'], options['record_type']))
+        except (ValueError, KeyError, IntegrityError) as e:
+            raise CommandError(f'❌ Import failed: {e}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        summary = ', '.join(f'{key}={value}' for key, value in sorted(stats.items())) or 'nothing imported'
+        prefix = '🔎 Dry run (rolled back)' if options['dry_run'] else '✅ Imported catalog'
+        self.stdout.write(self.style.SUCCESS(f'{prefix}: {summary}'))
+
+    def report_progress(self, processed, elapsed):
+        rate = processed / elapsed if elapsed else 0
+        self.stderr.write(f'  {processed} records processed ({rate:.0f}/s)')
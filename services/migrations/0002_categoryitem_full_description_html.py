@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-19 13:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoryitem',
+            name='full_description_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
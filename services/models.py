@@ -2,7 +2,11 @@ from django.db import models
 from django.utils.text import slugify
 from ckeditor.fields import RichTextField
 
-class ServiceCategory(models.Model):
+from core.images import ImageMetadataModel
+from core.media import media_url
+from core.richtext import PrerenderedRichTextMixin
+
+class ServiceCategory(ImageMetadataModel):
     """Main service categories like Kitchens, Ceilings, Bedrooms, etc."""
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True, blank=True)
@@ -16,6 +20,8 @@ class ServiceCategory(models.Model):
     order = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    image_metadata_field = 'featured_image'
+
     class Meta:
         ordering = ['order']
         verbose_name_plural = "Service Categories"
@@ -25,6 +31,14 @@ class ServiceCategory(models.Model):
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
+    @property
+    def featured_image_url(self):
+        return media_url(self.featured_image)
+
+    @property
+    def banner_image_url(self):
+        return media_url(self.banner_image)
+
     def __str__(self):
         return self.name
 
@@ -32,7 +46,7 @@ class ServiceCategory(models.Model):
         return self.items.count()
 
 
-class CategoryItem(models.Model):
+class CategoryItem(PrerenderedRichTextMixin, ImageMetadataModel):
     """Individual items under each category"""
     category = models.ForeignKey(ServiceCategory, on_delete=models.CASCADE, related_name='items')
     name = models.CharField(max_length=200)
@@ -40,6 +54,7 @@ class CategoryItem(models.Model):
 
     short_description = models.TextField(max_length=300)
     full_description = RichTextField()
+    full_description_html = models.TextField(blank=True, editable=False)
     featured_image = models.ImageField(upload_to='category_items/')
 
     price_range = models.CharField(max_length=100, blank=True)
@@ -57,6 +72,9 @@ class CategoryItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    rich_text_fields = ('full_description',)
+    image_metadata_field = 'featured_image'
+
     class Meta:
         ordering = ['order', 'name']
         verbose_name_plural = "Category Items"
@@ -66,11 +84,15 @@ class CategoryItem(models.Model):
             self.slug = slugify(f"{self.category.name}-{self.name}")
         super().save(*args, **kwargs)
 
+    @property
+    def featured_image_url(self):
+        return media_url(self.featured_image)
+
     def __str__(self):
         return f"{self.category.name} - {self.name}"
 
 
-class CategoryItemImage(models.Model):
+class CategoryItemImage(ImageMetadataModel):
     item = models.ForeignKey(CategoryItem, on_delete=models.CASCADE, related_name='gallery')
     image = models.ImageField(upload_to='category_items/gallery/')
     caption = models.CharField(max_length=200, blank=True)
@@ -79,6 +101,10 @@ class CategoryItemImage(models.Model):
     class Meta:
         ordering = ['order']
 
+    @property
+    def image_url(self):
+        return media_url(self.image)
+
     def __str__(self):
         return f"{self.item.name} - Image {self.order}"
 
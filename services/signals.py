@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .choices import bump_choices_version
+from .models import ServiceCategory, CategoryItem
+
+
+@receiver([post_save, post_delete], sender=ServiceCategory)
+@receiver([post_save, post_delete], sender=CategoryItem)
+def invalidate_catalog_choices(sender, **kwargs):
+    bump_choices_version()
@@ -1,3 +1,150 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from projects.models import Project
+from .catalog import CatalogExporter, CatalogImporter
+from .models import ServiceCategory, CategoryItem
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ServicesAdminChangelistTests(TestCase):
+    """Changelist query count must not grow with the number of rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def _create_rows(self, total):
+        categories = ServiceCategory.objects.bulk_create(
+            ServiceCategory(
+                name=f'Category {i}', slug=f'category-{i}', description='-',
+                icon='fa-star', featured_image=f'categories/category-{i}.jpg',
+            )
+            for i in range(total)
+        )
+        CategoryItem.objects.bulk_create(
+            CategoryItem(
+                category=categories[i % len(categories)],
+                name=f'Item {i}', slug=f'item-{i}',
+                short_description='-', full_description='-',
+                featured_image=f'category_items/item-{i}.jpg',
+            )
+            for i in range(total)
+        )
+
+    def test_changelist_query_count_is_constant(self):
+        for url_name in ('admin:services_servicecategory_changelist',
+                         'admin:services_categoryitem_changelist'):
+            counts = []
+            for total in (10, 100, 1000):
+                ServiceCategory.objects.all().delete()
+                self._create_rows(total)
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(reverse(url_name))
+                self.assertEqual(response.status_code, 200)
+                counts.append(len(ctx.captured_queries))
+            self.assertEqual(len(set(counts)), 1, f'{url_name}: {counts}')
+
+
+class CatalogImportExportTests(TestCase):
+    """Bulk catalog import resolves slugs in bulk and round-trips through export."""
+
+    records = [
+        {'type': 'category', 'name': 'Kitchens', 'description': 'Kitchens',
+         'icon': 'fa-utensils', 'featured_image': 'categories/kitchens.jpg'},
+        {'type': 'item', 'category': 'kitchens', 'name': 'Island Kitchen',
+         'short_description': '-', 'full_description': '-',
+         'featured_image': 'category_items/island.jpg',
+         'key_features': ['Island'], 'is_popular': True,
+         'gallery': [{'image': 'category_items/gallery/a.jpg', 'caption': 'A'},
+                     {'image': 'category_items/gallery/b.jpg'}]},
+        {'type': 'project_category', 'name': 'Residential', 'description': '-',
+         'service_category': 'kitchens'},
+        {'type': 'project', 'title': 'Borrowdale Home', 'category': 'residential',
+         'service_categories': ['kitchens'], 'location': 'Harare',
+         'project_date': '2024-05-01', 'short_description': '-',
+         'full_description': '-', 'featured_image': 'projects/borrowdale.jpg',
+         'images': [{'image': 'projects/gallery/one.jpg', 'order': 1}]},
+    ]
+
+    def _import(self, records, **kwargs):
+        return CatalogImporter(chunk_size=2, **kwargs).run(iter(records))
+
+    def test_import_creates_rows_with_generated_slugs(self):
+        stats = self._import(self.records)
+
+        item = CategoryItem.objects.get()
+        self.assertEqual(item.slug, 'kitchens-island-kitchen')
+        self.assertEqual(item.gallery.count(), 2)
+        project = Project.objects.get(slug='borrowdale-home')
+        self.assertEqual(project.category.slug, 'residential')
+        self.assertEqual([c.slug for c in project.service_categories.all()], ['kitchens'])
+        self.assertEqual(stats['categoryitem_created'], 1)
+
+    def test_reimport_updates_instead_of_duplicating(self):
+        self._import(self.records)
+        changed = [dict(r) for r in self.records]
+        changed[1]['price_range'] = '$5,000+'
+        changed[1]['gallery'] = [{'image': 'category_items/gallery/c.jpg'}]
+        stats = self._import(changed)
+
+        item = CategoryItem.objects.get()
+        self.assertEqual(item.price_range, '$5,000+')
+        self.assertEqual(list(item.gallery.values_list('image', flat=True)), ['category_items/gallery/c.jpg'])
+        self.assertEqual(stats['categoryitem_updated'], 1)
+        self.assertEqual(ServiceCategory.objects.count(), 1)
+
+    def test_generated_slug_collisions_are_rejected(self):
+        category = {'type': 'category', 'description': '-', 'icon': 'fa-bath',
+                    'featured_image': 'categories/bath.jpg'}
+        with self.assertRaisesMessage(ValueError, "Record 2: service category slug 'kitchen-bath'"):
+            self._import([{**category, 'name': 'Kitchen & Bath'}, {**category, 'name': 'Kitchen Bath'}])
+
+        self._import([{**category, 'name': 'Kitchen & Bath'}])
+        with self.assertRaisesMessage(ValueError, "Record 1: service category slug 'kitchen-bath' made from its "
+                                                  "name is already used by 'Kitchen & Bath'"):
+            self._import([{**category, 'name': 'Kitchen Bath'}])
+        self.assertEqual(ServiceCategory.objects.get().name, 'Kitchen & Bath')
+
+        # An explicit slug is still the way to add it
+        self._import([{**category, 'name': 'Kitchen Bath', 'slug': 'kitchen-bath-2'}])
+        self.assertEqual(ServiceCategory.objects.count(), 2)
+
+    def test_import_command_reports_rejected_records(self):
+        path = os.path.join(tempfile.mkdtemp(), 'catalog.jsonl')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w') as fh:
+            for name in ('Kitchen & Bath', 'Kitchen Bath'):
+                fh.write(json.dumps({'type': 'category', 'name': name, 'description': '-', 'icon': 'fa-bath'}) + '\n')
+        with self.assertRaisesMessage(CommandError, 'Record 2'):
+            call_command('import_catalog', path, stdout=StringIO(), stderr=StringIO())
+
+    def test_dry_run_rolls_back(self):
+        stats = self._import(self.records, dry_run=True)
+        self.assertEqual(stats['servicecategory_created'], 1)
+        self.assertFalse(ServiceCategory.objects.exists())
+
+    def test_export_round_trip(self):
+        self._import(self.records)
+        exported = list(CatalogExporter(chunk_size=2).records())
+
+        self.assertEqual([r['type'] for r in exported], ['category', 'project_category', 'item', 'project'])
+        item = exported[2]
+        self.assertEqual(item['category'], 'kitchens')
+        self.assertEqual(len(item['gallery']), 2)
+        self.assertEqual(exported[3]['service_categories'], ['kitchens'])
@@ -26,25 +26,37 @@ INSTALLED_APPS = [
     'storages',
     'crispy_forms',
     'crispy_bootstrap5',
+    'rest_framework',
     'core',
     'services',
     'projects',
     'contact',
+    'api',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.HealthCheckMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.SurrogateKeyMiddleware',
+    'core.middleware.PreloadMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.AnonymousFastPathMiddleware',
+    'core.middleware.TemplateProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'tilojnet.urls'
 
+# Flash messages travel in a signed cookie, never in the session, so
+# anonymous visitors don't get a session row (see AnonymousFastPathMiddleware)
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -71,6 +83,27 @@ DATABASES = {
     )
 }
 
+# Postgres connections come from an in-process pool shared by the threads
+# of a worker (core/dbpool.py). CONN_MAX_AGE=0 hands a connection back to
+# the pool after each request; the pool pings connections idle for more
+# than check_after seconds instead of every request, and closes those
+# idle for more than max_idle down to min_size.
+DB_POOL = os.environ.get('DB_POOL', 'True') == 'True'
+if DB_POOL and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default'].update({
+        'ENGINE': 'core.backends.postgresql_pool',
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': False,
+        'POOL': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', '300')),
+            'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', '3600')),
+            'check_after': float(os.environ.get('DB_POOL_CHECK_AFTER', '30')),
+        },
+    })
+
 AUTH_PASSWORD_VALIDATORS = [
     { 'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator', },
     { 'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator', },
@@ -88,7 +121,19 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
 
-DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+DEFAULT_FILE_STORAGE = os.environ.get('DEFAULT_FILE_STORAGE', 'core.storage.MediaStorage')
+
+# Media upload tuning (see core/storage.py)
+MEDIA_UPLOAD_WORKERS = int(os.environ.get('MEDIA_UPLOAD_WORKERS', '6'))
+MEDIA_UPLOAD_RETRIES = int(os.environ.get('MEDIA_UPLOAD_RETRIES', '5'))
+# Staged files live only on local disk until uploaded: lost on an ephemeral
+# disk's restart and invisible to other instances. Leave off unless the disk
+# is persistent and there is one instance.
+MEDIA_DEFERRED_UPLOADS = os.environ.get('MEDIA_DEFERRED_UPLOADS', 'False') == 'True'
+# Reuse the stored object when an upload's bytes are already in the bucket (core/dedup.py)
+MEDIA_DEDUPLICATE = os.environ.get('MEDIA_DEDUPLICATE', 'True') == 'True'
+MEDIA_STAGING_ROOT = BASE_DIR / 'media_staging'
+MEDIA_ROOT = BASE_DIR / 'media'
 
 SUPABASE_PROJECT_ID = os.environ.get('SUPABASE_PROJECT_ID', 'sxmlzrnvulfikfdxrikc')
 AWS_STORAGE_BUCKET_NAME = os.environ.get('SUPABASE_BUCKET_NAME', 'media')
@@ -107,6 +152,13 @@ AWS_S3_CUSTOM_DOMAIN = f'{SUPABASE_PROJECT_ID}.supabase.co/storage/v1/object/pub
 
 MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/'
 
+# Public media URLs are deterministic without querystring auth, so they are
+# built from MEDIA_URL instead of going through the storage backend
+MEDIA_URL_PRECOMPUTE = not AWS_QUERYSTRING_AUTH
+
+# Supabase image transformation endpoint, used for admin/listing thumbnails
+MEDIA_THUMBNAIL_URL = f'https://{SUPABASE_PROJECT_ID}.supabase.co/storage/v1/render/image/public/{AWS_STORAGE_BUCKET_NAME}/'
+
 AWS_S3_OBJECT_PARAMETERS = {
     'CacheControl': 'max-age=86400',
 }
@@ -118,7 +170,11 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 SITE_ID = 1
 
 CKEDITOR_UPLOAD_PATH = 'uploads/'
-CKEDITOR_IMAGE_BACKEND = 'pillow'
+# Pillow backend that also records each upload in core.EditorUpload; the
+# browse dialog pages through that table instead of listing the bucket
+# (refresh it with `sync_editor_uploads`)
+CKEDITOR_IMAGE_BACKEND = 'core.uploads.RegistryPillowBackend'
+CKEDITOR_BROWSE_PAGE_SIZE = int(os.environ.get('CKEDITOR_BROWSE_PAGE_SIZE', '48'))
 CKEDITOR_JQUERY_URL = 'https://ajax.googleapis.com/ajax/libs/jquery/2.2.4/jquery.min.js'
 CKEDITOR_CONFIGS = {
     'default': {
@@ -138,6 +194,96 @@ CACHES = {
         'LOCATION': 'unique-snowflake',
     }
 }
+# LocMemCache is per worker: a catalog change bumps the cache versions
+# (services/choices.py, api/cache.py) only in the worker that saved it, so
+# the other workers keep serving their copies until these expire. Cached
+# catalog data therefore lives briefly unless CACHES is shared
+# (Redis/Memcached).
+CACHE_IS_SHARED = 'locmem' not in CACHES['default']['BACKEND']
+CATALOG_CHOICES_CACHE_SECONDS = 60 * 60 if CACHE_IS_SHARED else 60
+
+# Token-bucket throttling for public form POSTs (see contact/ratelimit.py).
+# Each policy applies per client IP and per submitted email. LocMemCache
+# keeps buckets per worker; point CACHES at Redis/Memcached to share them.
+RATE_LIMITS = {
+    'contact': {'rate': 5, 'per': 3600, 'burst': 3},
+    'quote': {'rate': 5, 'per': 3600, 'burst': 3},
+    'newsletter': {'rate': 10, 'per': 3600, 'burst': 5},
+}
+# Proxies in front of the app that append to X-Forwarded-For (Render's load
+# balancer); the client IP is read that many entries from the right
+RATE_LIMIT_PROXY_HOPS = int(os.environ.get('RATE_LIMIT_PROXY_HOPS', '1' if RENDER_EXTERNAL_HOSTNAME else '0'))
+SPAM_MIN_SUBMIT_SECONDS = 3
+
+# Per-worker warm-up on boot (see core/warmup.py): opens the DB connection,
+# compiles templates and primes caches, optionally GETting WARMUP_URLS.
+WARMUP_ON_BOOT = os.environ.get('WARMUP_ON_BOOT', str(not DEBUG)) == 'True'
+WARMUP_SELF_REQUESTS = os.environ.get('WARMUP_SELF_REQUESTS', 'False') == 'True'
+WARMUP_URLS = ['home', 'categories_list', 'projects_list', 'about', 'contact', 'quote_request']
+
+# Lets staff append ?profile_templates to a URL for a per-template/tag
+# render breakdown (see core/template_profiler.py)
+TEMPLATE_PROFILER = os.environ.get('TEMPLATE_PROFILER', 'False') == 'True'
+
+# Per-worker metrics (see core/metrics.py). Workers share totals through
+# snapshot files in METRICS_DIR; leave it empty for a single process.
+# /metrics answers 404 unless METRICS_TOKEN is set (or DEBUG is on).
+METRICS_DIR = os.environ.get('METRICS_DIR', '/tmp/tilojnet-metrics')
+METRICS_FLUSH_SECONDS = 5
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Read-only catalog API (see api/views.py). Public and anonymous: no
+# session or CSRF work, JSON only.
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.AllowAny'],
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'UNAUTHENTICATED_USER': None,
+}
+# Short without a shared cache: see CACHE_IS_SHARED
+API_CACHE_SECONDS = 300 if CACHE_IS_SHARED else 30
+
+# Images embedded in rich text (see core/richtext.py) are served resized to
+# at most this width, with a srcset of the smaller widths
+RICH_TEXT_IMAGE_MAX_WIDTH = 1600
+RICH_TEXT_IMAGE_WIDTHS = [480, 800, 1200]
+
+# Rendered pages (see core/compression.py). Brotli is used when the
+# optional brotli package is installed, gzip otherwise.
+HTML_MINIFY = os.environ.get('HTML_MINIFY', 'True') == 'True'
+COMPRESSION_MIN_BYTES = 1024
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+
+# Resources every page needs before first paint, sent as a Link header
+# (see core/hints.py): (url, rel, params). The stylesheets must match the
+# ones linked in templates/base.html.
+CRITICAL_RESOURCES = [
+    ('https://fonts.gstatic.com', 'preconnect', {'crossorigin': True}),
+    ('https://fonts.googleapis.com/css2?family=Cormorant+Garamond:wght@300;400;500;600;700&family=Inter:wght@300;400;500;600&display=swap', 'preload', {'as_': 'style'}),
+    ('https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.2/css/all.min.css', 'preload', {'as_': 'style'}),
+    (f'https://{SUPABASE_PROJECT_ID}.supabase.co', 'preconnect', {}),
+]
+
+# Front-end HTTP cache (see core/surrogate.py, core/purge.py). Anonymous
+# pages are cached for SURROGATE_CACHE_SECONDS and purged by surrogate key
+# through SURROGATE_PURGE_URL when the content they show changes.
+SURROGATE_CACHE_SECONDS = int(os.environ.get('SURROGATE_CACHE_SECONDS', '300'))
+SURROGATE_STALE_SECONDS = int(os.environ.get('SURROGATE_STALE_SECONDS', '86400'))
+SURROGATE_BYPASS_COOKIES = ['sessionid', 'csrftoken', 'messages']
+SURROGATE_PURGE_URL = os.environ.get('SURROGATE_PURGE_URL', '')
+SURROGATE_PURGE_HEADERS = (
+    {'Authorization': f"Bearer {os.environ['SURROGATE_PURGE_TOKEN']}"}
+    if os.environ.get('SURROGATE_PURGE_TOKEN') else {}
+)
+SURROGATE_PURGE_BATCH = 256
+SURROGATE_PURGE_DELAY = 1.0
+SURROGATE_PURGE_TIMEOUT = 5
+
+# Leads in these statuses move to the ArchivedLead cold table once older
+# than LEAD_ARCHIVE_AFTER_DAYS (see contact/archive.py, archive_leads).
+LEAD_ARCHIVE_AFTER_DAYS = int(os.environ.get('LEAD_ARCHIVE_AFTER_DAYS', '365'))
+LEAD_ARCHIVE_STATUSES = ['archived', 'replied']
 
 if not DEBUG:
     SECURE_BROWSER_XSS_FILTER = True
@@ -1,8 +1,9 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from core import views as core_views
+from core import uploads as upload_views
 from services import views as service_views
 from projects import views as project_views
 from contact import views as contact_views
@@ -28,10 +29,16 @@ urlpatterns = [
     # Contact
     path('contact/', contact_views.contact, name='contact'),
     path('quote/', contact_views.quote_request, name='quote_request'),
+    path('quote/items/', contact_views.quote_category_items, name='quote_category_items'),
     path('newsletter/subscribe/', contact_views.newsletter_subscribe, name='newsletter_subscribe'),
+    path('forms/token/', contact_views.form_token, name='form_token'),
     
-    # CKEditor
-    path('ckeditor/', include('ckeditor_uploader.urls')),
+    # Read-only catalog API
+    path('api/v1/', include('api.urls')),
+
+    # CKEditor (upload registry in place of ckeditor_uploader.urls)
+    re_path(r'^ckeditor/upload/', upload_views.upload, name='ckeditor_upload'),
+    re_path(r'^ckeditor/browse/', upload_views.browse, name='ckeditor_browse'),
 ]
 
 # Serve media files in development